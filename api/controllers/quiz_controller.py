@@ -1,64 +1,53 @@
 import os
-import sys
-import tempfile
-import requests
+import json
 import logging
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import HTTPException
 from ..config.database import Database
+from ..models.schemas import LECTURE_DUPLICATE_KEY_FIELDS
+from ..utils.executor import PipelineExecutor
+from ..utils.job_queue import get_job_queue, cancel_local_jobs, JOB_PRIORITIES, JOB_MAX_ATTEMPTS
+from ..utils.checkpoints import checkpoints, reached
+from ..utils.transcripts import transcripts
+from ..utils.events import publish_local
+from ..utils.question_bank import question_bank, QUESTION_BANK_ENABLED
+from ..utils.read_cache import lecture_cache, status_cache, quiz_cache, invalidate_lecture
+from ..utils.singleflight import SingleFlight
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from script import run_pipeline
+from pipeline import aclean_transcript, agenerate_version
+from models import Quiz
+from usage import start_usage, end_usage
+from deadlines import start_deadline, end_deadline, check_deadline
+from metrics import pipeline_stage_duration, pipeline_resumed, pipeline_coalesced
 
 logger = logging.getLogger(__name__)
 
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "100"))
+
+# A lecture in one of these has a job; new processing requests join it instead of queueing another
+ACTIVE_STATUSES = ("queued", "processing")
+
+# Runs in flight in this process: by lecture, and quiz generation by transcript
+lecture_flights = SingleFlight()
+generation_flights = SingleFlight()
+
 class LectureController:
     
-    @staticmethod
-    async def check_duplicate_lecture(lecture_data):
-        """
-        Check if a lecture with the same details already exists
-        Returns the existing lecture if found, None otherwise
-        """
-        try:
-            collection = Database.db.lectures
-            
-            # Query for lectures with matching core details (excluding timestamps and status)
-            query = {
-                "courseCode": lecture_data["courseCode"],
-                "year": lecture_data["year"],
-                "quarter": lecture_data["quarter"],
-                "videoId": lecture_data["videoId"],
-                "videoUrl": lecture_data["videoUrl"],
-                "transcriptUrl": lecture_data["transcriptUrl"]
-            }
-            
-            existing_lecture = await collection.find_one(query)
-            return existing_lecture
-        except Exception as e:
-            logger.error(f"Error checking for duplicate lecture: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to check for duplicate lecture: {str(e)}")
-    
-    
     @staticmethod
     async def create_lecture(lecture_data):
         """
         Create a new lecture entry in the database
+        Duplicates are rejected by the unique index on LECTURE_DUPLICATE_KEY_FIELDS
         Returns the ID of the created document
         """
         try:
-            # Check for duplicate lecture first
-            existing_lecture = await LectureController.check_duplicate_lecture(lecture_data)
-            if existing_lecture:
-                raise HTTPException(
-                    status_code=409, 
-                    detail="A lecture with these details already exists"
-                )
-            
             collection = Database.db.lectures
             # Set timestamps
             lecture_data["createdAt"] = datetime.utcnow()
@@ -67,6 +56,11 @@ class LectureController:
             
             result = await collection.insert_one(lecture_data)
             return str(result.inserted_id)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=409, 
+                detail="A lecture with these details already exists"
+            )
         except HTTPException as e:
             # Re-raise HTTPException (including duplicate check error)
             raise e
@@ -74,6 +68,138 @@ class LectureController:
             logger.error(f"Error creating lecture: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to create lecture: {str(e)}")
         
+    @staticmethod
+    async def create_lectures(lectures):
+        """
+        Create many lectures with one duplicate query and one bulk insert
+        Returns a result per input item, in order
+        """
+        try:
+            collection = Database.db.lectures
+            results = [None] * len(lectures)
+            keys = [tuple(lecture[field] for field in LECTURE_DUPLICATE_KEY_FIELDS) for lecture in lectures]
+
+            # Find lectures that already exist in a single round trip
+            existing = {}
+            unique_keys = list(dict.fromkeys(keys))
+            if unique_keys:
+                cursor = collection.find(
+                    {"$or": [dict(zip(LECTURE_DUPLICATE_KEY_FIELDS, key)) for key in unique_keys]},
+                    {field: 1 for field in LECTURE_DUPLICATE_KEY_FIELDS}
+                )
+                async for doc in cursor:
+                    existing[tuple(doc.get(field) for field in LECTURE_DUPLICATE_KEY_FIELDS)] = str(doc["_id"])
+
+            to_insert = []
+            seen = set()
+            now = datetime.utcnow()
+            for index, (lecture, key) in enumerate(zip(lectures, keys)):
+                if key in existing:
+                    results[index] = {"index": index, "status": "duplicate", "id": existing[key]}
+                elif key in seen:
+                    results[index] = {"index": index, "status": "duplicate", "detail": "Repeated within batch"}
+                else:
+                    seen.add(key)
+                    lecture["createdAt"] = now
+                    lecture["updatedAt"] = now
+                    lecture["status"] = "not started"
+                    to_insert.append((index, lecture))
+
+            if to_insert:
+                failed = {}
+                try:
+                    await collection.insert_many([lecture for _, lecture in to_insert], ordered=False)
+                except BulkWriteError as e:
+                    for error in e.details.get("writeErrors", []):
+                        failed[error["index"]] = error
+                for position, (index, lecture) in enumerate(to_insert):
+                    error = failed.get(position)
+                    if error is None:
+                        results[index] = {"index": index, "status": "created", "id": str(lecture["_id"])}
+                    elif error.get("code") == 11000:
+                        results[index] = {"index": index, "status": "duplicate"}
+                    else:
+                        results[index] = {"index": index, "status": "error", "detail": error.get("errmsg")}
+            return results
+        except Exception as e:
+            logger.error(f"Error creating lectures: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to create lectures: {str(e)}")
+
+    @staticmethod
+    async def enqueue_lectures(lecture_ids, priority: str = "bulk", timeout_seconds: float = None):
+        """
+        Queue processing jobs for many lectures after a single status lookup
+        Returns a result per input ID, in order
+        """
+        try:
+            results = [None] * len(lecture_ids)
+            valid_ids = [ObjectId(lecture_id) for lecture_id in set(lecture_ids) if ObjectId.is_valid(lecture_id)]
+            lectures = {}
+            if valid_ids:
+                cursor = Database.db.lectures.find({"_id": {"$in": valid_ids}}, {"status": 1, "jobId": 1})
+                async for doc in cursor:
+                    lectures[str(doc["_id"])] = doc
+
+            candidates = {}
+            for index, lecture_id in enumerate(lecture_ids):
+                if not ObjectId.is_valid(lecture_id):
+                    results[index] = {"lectureId": lecture_id, "status": "invalid", "detail": "Invalid lecture ID format"}
+                elif lecture_id not in lectures:
+                    results[index] = {"lectureId": lecture_id, "status": "not_found"}
+                elif lecture_id in candidates:
+                    results[index] = {"lectureId": lecture_id, "status": "duplicate", "detail": "Repeated within batch"}
+                else:
+                    candidates[lecture_id] = index
+
+            # Claim every candidate in one round trip, then read back which claims won
+            claims = {
+                lecture_id: str(ObjectId()) for lecture_id in candidates
+                if lectures[lecture_id].get("status") not in ACTIVE_STATUSES + ("completed",)
+            }
+            if claims:
+                now = datetime.utcnow()
+                await Database.db.lectures.bulk_write([
+                    UpdateOne(
+                        {"_id": ObjectId(lecture_id), "status": {"$nin": list(ACTIVE_STATUSES + ("completed",))}},
+                        {"$set": {"status": "queued", "jobId": job_id, "updatedAt": now}}
+                    )
+                    for lecture_id, job_id in claims.items()
+                ], ordered=False)
+                for lecture_id in claims:
+                    invalidate_lecture(lecture_id)
+                cursor = Database.db.lectures.find(
+                    {"_id": {"$in": [ObjectId(lecture_id) for lecture_id in claims]}}, {"status": 1, "jobId": 1}
+                )
+                async for doc in cursor:
+                    lectures[str(doc["_id"])] = doc
+
+            to_enqueue = []
+            for lecture_id, index in candidates.items():
+                lecture = lectures[lecture_id]
+                if lecture_id in claims and lecture.get("jobId") == claims[lecture_id]:
+                    to_enqueue.append(lecture_id)
+                    publish_local(lecture_id, {"type": "status", "status": "queued"})
+                elif lecture.get("status") == "completed":
+                    results[index] = {"lectureId": lecture_id, "status": "completed"}
+                else:
+                    pipeline_coalesced.inc(scope="request")
+                    results[index] = {"lectureId": lecture_id, "status": "coalesced", "jobId": lecture.get("jobId")}
+
+            try:
+                job_ids = await get_job_queue().enqueue_many(
+                    to_enqueue, priority, timeout_seconds, [claims[lecture_id] for lecture_id in to_enqueue]
+                )
+            except Exception as e:
+                for lecture_id in to_enqueue:
+                    await LectureController.update_status(lecture_id, "failed", error=f"Failed to queue processing: {str(e)}")
+                raise
+            for lecture_id, job_id in zip(to_enqueue, job_ids):
+                results[candidates[lecture_id]] = {"lectureId": lecture_id, "status": "queued", "jobId": job_id}
+            return results
+        except Exception as e:
+            logger.error(f"Error queueing lectures: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to queue lectures: {str(e)}")
+
     @staticmethod
     async def get_lecture(lecture_id: str):
         """Get a lecture by ID"""
@@ -82,10 +208,16 @@ class LectureController:
             if not ObjectId.is_valid(lecture_id):
                 raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
+            lecture = lecture_cache.get(lecture_id)
+            if lecture is not None:
+                return lecture
+            generation = lecture_cache.generation(lecture_id)
+            
             collection = Database.db.lectures
             lecture = await collection.find_one({"_id": ObjectId(lecture_id)})
             if not lecture:
                 raise HTTPException(status_code=404, detail=f"Lecture with ID {lecture_id} not found")
+            lecture_cache.set(lecture_id, lecture, generation)
             return lecture
         except HTTPException:
             raise
@@ -94,144 +226,413 @@ class LectureController:
             raise HTTPException(status_code=500, detail=f"Failed to retrieve lecture: {str(e)}")
 
     @staticmethod
-    async def process_lecture(lecture_id: str):
-        """
-        Process a lecture to generate quiz
-        1. Download transcript
-        2. Run pipeline to generate quiz
-        3. Save quiz to database
-        4. Update lecture status
-        """
+    async def get_lecture_status(lecture_id: str):
+        """Get only the processing status of a lecture"""
         try:
-            # Validate ObjectId format
             if not ObjectId.is_valid(lecture_id):
                 raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
-            # Get lecture data
+            status = status_cache.get(lecture_id)
+            if status is not None:
+                return status
+            generation = status_cache.generation(lecture_id)
+            
             collection = Database.db.lectures
-            lecture = await collection.find_one({"_id": ObjectId(lecture_id)})
+            lecture = await collection.find_one({"_id": ObjectId(lecture_id)}, {"status": 1})
             if not lecture:
                 raise HTTPException(status_code=404, detail=f"Lecture with ID {lecture_id} not found")
-            
-            # Update lecture status to processing
-            await collection.update_one(
+            status_cache.set(lecture_id, lecture["status"], generation)
+            return lecture["status"]
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving lecture status: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve lecture status: {str(e)}")
+
+    @staticmethod
+    async def update_status(lecture_id: str, status: str, **fields):
+        """
+        Write a lecture status transition along with any extra fields
+        Cached reads of the lecture are invalidated
+        """
+        try:
+            await Database.db.lectures.update_one(
                 {"_id": ObjectId(lecture_id)},
-                {"$set": {"status": "processing", "updatedAt": datetime.utcnow()}}
+                {"$set": {"status": status, "updatedAt": datetime.utcnow(), **fields}}
             )
+        finally:
+            invalidate_lecture(lecture_id)
+        
+        event = {"type": "status", "status": status}
+        if fields.get("error"):
+            event["error"] = fields["error"]
+        if fields.get("quizId"):
+            event["quizId"] = str(fields["quizId"])
+        publish_local(lecture_id, event)
+
+    @staticmethod
+    async def report_progress(lecture_id: str, progress: dict):
+        """Record pipeline progress (e.g. chunks completed) on the lecture and notify subscribers"""
+        try:
+            await Database.db.lectures.update_one(
+                {"_id": ObjectId(lecture_id)},
+                {"$set": {"progress": progress, "updatedAt": datetime.utcnow()}}
+            )
+            lecture_cache.invalidate(str(lecture_id))
+            publish_local(lecture_id, {"type": "progress", **progress})
+        except Exception as e:
+            logger.warning(f"Failed to report progress for lecture {lecture_id}: {e}")
+
+    @staticmethod
+    async def claim_lecture(lecture_id: str, job_id: str, exclude=ACTIVE_STATUSES, **fields):
+        """
+        Atomically move a lecture to "queued" for job_id unless its status is in `exclude`
+        Returns the lecture as it was before the claim, or None if it is missing or excluded
+        """
+        try:
+            previous = await Database.db.lectures.find_one_and_update(
+                {"_id": ObjectId(lecture_id), "status": {"$nin": list(exclude)}},
+                {"$set": {"status": "queued", "jobId": job_id, "updatedAt": datetime.utcnow(), **fields}},
+                projection={"status": 1},
+                return_document=ReturnDocument.BEFORE
+            )
+        finally:
+            invalidate_lecture(lecture_id)
+        if previous:
+            publish_local(lecture_id, {"type": "status", "status": "queued"})
+        return previous
+
+    @staticmethod
+    async def request_processing(lecture_id: str, priority: str = "interactive", timeout_seconds: float = None):
+        """
+        Queue processing of a lecture unless it is completed, or join the job it already has
+        Concurrent requests race on an atomic status transition, so only one of them queues a job.
+        Returns {"status": "queued" | "coalesced" | "completed", "jobId": ...}
+        """
+        try:
+            if not ObjectId.is_valid(lecture_id):
+                raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
-            # Import utility function
-            from ..utils.quiz_utils import download_file
+            job_id = str(ObjectId())
+            # The claim only fails on a status that changed under it, so a retry settles it
+            for _ in range(3):
+                if await LectureController.claim_lecture(lecture_id, job_id, ACTIVE_STATUSES + ("completed",)):
+                    break
+                lecture = await Database.db.lectures.find_one({"_id": ObjectId(lecture_id)}, {"status": 1, "jobId": 1})
+                if not lecture:
+                    raise HTTPException(status_code=404, detail=f"Lecture with ID {lecture_id} not found")
+                if lecture["status"] == "completed":
+                    return {"status": "completed", "jobId": None}
+                if lecture["status"] in ACTIVE_STATUSES:
+                    pipeline_coalesced.inc(scope="request")
+                    return {"status": "coalesced", "lectureStatus": lecture["status"], "jobId": lecture.get("jobId")}
+            else:
+                raise HTTPException(status_code=409, detail=f"Lecture {lecture_id} changed status concurrently, try again")
             
             try:
-                # Download transcript
-                transcript_path = await download_file(lecture['transcriptUrl'], ".txt")
-                logger.info(f"Downloaded transcript to: {transcript_path}")
-            except HTTPException as e:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {"status": "failed", "updatedAt": datetime.utcnow(), "error": str(e.detail)}}
-                )
-                logger.error(f"Failed to download transcript: {e.detail}")
-                return
+                await get_job_queue().enqueue(lecture_id, priority, timeout_seconds, job_id=job_id)
             except Exception as e:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {"status": "failed", "updatedAt": datetime.utcnow(), "error": f"Download failed: {str(e)}"}}
-                )
-                logger.error(f"Failed to download transcript: {e}")
-                return
+                await LectureController.update_status(lecture_id, "failed", error=f"Failed to queue processing: {str(e)}")
+                raise
+            return {"status": "queued", "jobId": job_id}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error queueing lecture: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to queue lecture: {str(e)}")
+
+    @staticmethod
+    async def revise_lecture(lecture_id: str, transcript_url: str = None):
+        """
+        Point a lecture at a revised transcript and queue its regeneration
+        Without transcript_url the current URL is fetched again (e.g. after the file was replaced)
+        Returns the queued job ID
+        """
+        try:
+            if not ObjectId.is_valid(lecture_id):
+                raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
-            # Set up output path for markdown
-            temp_output_json = tempfile.NamedTemporaryFile(delete=False, suffix=".json").name
-            json_output_dir = os.path.join(os.path.dirname(__file__), '..', 'output', 'json')
-            os.makedirs(json_output_dir, exist_ok=True)
+            job_id = str(ObjectId())
+            fields = {"transcriptUrl": transcript_url} if transcript_url else {}
+            if not await LectureController.claim_lecture(lecture_id, job_id, **fields):
+                lecture = await Database.db.lectures.find_one({"_id": ObjectId(lecture_id)}, {"status": 1})
+                if not lecture:
+                    raise HTTPException(status_code=404, detail=f"Lecture with ID {lecture_id} not found")
+                raise HTTPException(status_code=409, detail=f"Lecture {lecture_id} is already being processed")
             
-            # Run pipeline to generate quiz
-            logger.info(f"Running pipeline for lecture {lecture_id}")
             try:
-                os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
-                os.environ["OPENAI_MODEL"] = os.getenv("OPENAI_MODEL", "gpt-4o")
-                run_pipeline(transcript_path, temp_output_json)
-                logger.info(f"Pipeline completed for lecture {lecture_id}")
+                return await get_job_queue().enqueue(lecture_id, "interactive", job_id=job_id)
             except Exception as e:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {"status": "failed", "updatedAt": datetime.utcnow(), "error": f"Pipeline failed: {str(e)}"}}
-                )
-                logger.error(f"Pipeline failed for lecture {lecture_id}: {e}")
-                return
+                await LectureController.update_status(lecture_id, "failed", error=f"Failed to queue processing: {str(e)}")
+                raise
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="A lecture with these details already exists")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error revising lecture: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to revise lecture: {str(e)}")
+
+    @staticmethod
+    async def cancel_lecture(lecture_id: str):
+        """
+        Cancel a lecture's queued processing jobs and stop its running one
+        A running job stops at its next await when it runs in this process, otherwise at its worker's next heartbeat
+        Returns the number of queued and running jobs cancelled
+        """
+        try:
+            if not ObjectId.is_valid(lecture_id):
+                raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
-            json_file = f"lecture_{lecture_id}_quiz.json"
-            permanent_json_path = os.path.join(json_output_dir, json_file)
+            lecture = await Database.db.lectures.find_one({"_id": ObjectId(lecture_id)}, {"status": 1})
+            if not lecture:
+                raise HTTPException(status_code=404, detail=f"Lecture with ID {lecture_id} not found")
             
-            import shutil
-            # Move temporary JSON file to permanent directory
-            try:
-                shutil.move(temp_output_json, permanent_json_path)
-                logger.info(f"Moved quiz file to: {permanent_json_path}")
-            except Exception as e:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {"status": "failed", "updatedAt": datetime.utcnow(), "error": f"File move failed: {str(e)}"}}
-                )
-                logger.error(f"Failed to move quiz file: {e}")
-                return
+            counts = await get_job_queue().cancel(lecture_id)
+            if not counts["queued"] and not counts["running"]:
+                raise HTTPException(status_code=409, detail=f"Lecture {lecture_id} has no queued or running job")
+            cancel_local_jobs(lecture_id)
+            if not counts["running"]:
+                await LectureController.update_status(lecture_id, "cancelled", error="Cancelled on request")
+            return counts
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error cancelling lecture: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to cancel lecture: {str(e)}")
+
+    @staticmethod
+    async def process_lecture(lecture_id: str, priority: int = JOB_PRIORITIES["normal"], timeout: float = None,
+                              job_id=None, resume: bool = False):
+        """
+        Process a lecture to generate quiz within `timeout` seconds (no deadline if None)
+        LLM calls stop retrying once the deadline would pass; priority orders admission to the pipeline executor.
+        A run continues from the checkpoint left by the same job_id, or by any earlier run when resume is set.
+        A second job for a lecture already running in this process waits for that run's result instead.
+        """
+        deadline_token = start_deadline(timeout)
+        try:
+            result, shared = await lecture_flights.do(
+                str(lecture_id), lambda: LectureController.run_processing(lecture_id, priority, job_id, resume)
+            )
+            if shared:
+                pipeline_coalesced.inc(scope="lecture")
+                logger.info(f"Job {job_id} joined the run already in progress for lecture {lecture_id}")
+            return result
+        finally:
+            end_deadline(deadline_token)
+
+    @staticmethod
+    async def run_processing(lecture_id: str, priority: int = JOB_PRIORITIES["normal"], job_id=None,
+                             resume: bool = False):
+        """
+        Process a lecture to generate quiz, checkpointing after each stage
+        1. Download transcript (downloaded)
+        2. Clean it (cleaned)
+        3. Run pipeline to generate quiz, reusing unchanged questions from the previous version (generated)
+        4. Save quiz to database as a new version (persisted)
+        5. Update the question bank and lecture status
+        Stages already in the lecture's checkpoint are skipped.
+        """
+        try:
+            # Validate ObjectId format
+            if not ObjectId.is_valid(lecture_id):
+                raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
-            json_file_url = f"/api/output/json/{json_file}"
+            # Get lecture data
+            collection = Database.db.lectures
+            lecture = await collection.find_one({"_id": ObjectId(lecture_id)})
+            if not lecture:
+                raise HTTPException(status_code=404, detail=f"Lecture with ID {lecture_id} not found")
             
-            # Save quiz to database
-            try:
-                quiz_collection = Database.db.quiz
+            checkpoint = await checkpoints.load(lecture_id, lecture["transcriptUrl"], job_id, resume)
+            if checkpoint:
+                pipeline_resumed.inc(stage=checkpoint["stage"])
+                logger.info(f"Resuming lecture {lecture_id} after stage {checkpoint['stage']}")
+            
+            # Update lecture status to processing
+            await LectureController.update_status(lecture_id, "processing")
+            
+            clean_transcript = None
+            if not reached(checkpoint, "cleaned"):
+                # Import utility function
+                from ..utils.quiz_utils import download_file
+                
+                transcript_path = checkpoint.get("transcriptPath") if checkpoint else None
+                if not transcript_path or not os.path.exists(transcript_path):
+                    try:
+                        # Download transcript
+                        with pipeline_stage_duration.time(stage="download"):
+                            transcript_path = await download_file(lecture['transcriptUrl'], ".txt")
+                        logger.info(f"Downloaded transcript to: {transcript_path}")
+                    except HTTPException as e:
+                        await LectureController.update_status(lecture_id, "failed", error=str(e.detail))
+                        logger.error(f"Failed to download transcript: {e.detail}")
+                        return
+                    except Exception as e:
+                        await LectureController.update_status(lecture_id, "failed", error=f"Download failed: {str(e)}")
+                        logger.error(f"Failed to download transcript: {e}")
+                        return
+                    await checkpoints.save(
+                        lecture_id, "downloaded", job_id,
+                        transcriptUrl=lecture["transcriptUrl"], transcriptPath=transcript_path
+                    )
+                
+                clean_transcript = await aclean_transcript(transcript_path)
+                # The transcript is stored once by content hash; the checkpoint and quiz version only reference it
+                transcript_key = await transcripts.save(clean_transcript)
+                checkpoint = {"stage": "cleaned", "transcriptHash": transcript_key}
+                await checkpoints.save(
+                    lecture_id, "cleaned", job_id, transcriptUrl=lecture["transcriptUrl"], transcriptHash=transcript_key
+                )
+            
+            if not reached(checkpoint, "generated"):
+                transcript_key = checkpoint.get("transcriptHash")
+                if clean_transcript is None:
+                    # Checkpoints written before transcripts were stored by hash carry the text inline
+                    clean_transcript = await transcripts.load(transcript_key) if transcript_key else checkpoint.get("transcript")
+                    if clean_transcript is None:
+                        raise RuntimeError(f"Cleaned transcript {transcript_key} is missing from the transcripts collection")
+                    transcript_key = transcript_key or await transcripts.save(clean_transcript)
+                
+                # The latest quiz version, if any, lets a revised transcript reuse its questions
+                previous = await Database.db.quiz.find_one(
+                    {"lectureId": ObjectId(lecture_id)},
+                    {"questions": 1, "transcriptHash": 1, "transcript": 1, "version": 1},
+                    sort=[("version", -1)]
+                )
+                previous_version = None
+                if previous and previous.get("questions"):
+                    # Versions saved before transcripts were stored by hash carry theirs inline
+                    previous_transcript = previous.get("transcript")
+                    if previous.get("transcriptHash"):
+                        previous_transcript = await transcripts.load(previous["transcriptHash"])
+                    if previous_transcript:
+                        previous_version = {"transcript": previous_transcript, "questions": previous["questions"]}
+                
+                # A first version may be assembled from the course question bank without LLM calls
+                bank = None
+                if QUESTION_BANK_ENABLED and previous_version is None:
+                    try:
+                        bank = await question_bank.candidates(lecture["courseCode"])
+                    except Exception as e:
+                        logger.warning(f"Failed to load question bank for {lecture['courseCode']}: {e}")
+                
+                # Run pipeline to generate quiz
+                logger.info(f"Running pipeline for lecture {lecture_id}")
+                quiz_id = ObjectId()
+                outcome = "cancelled"
+                usage, usage_token = start_usage()
+                try:
+                    os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
+                    os.environ["OPENAI_MODEL"] = os.getenv("OPENAI_MODEL", "gpt-4o")
+                    
+                    async def on_progress(progress):
+                        await LectureController.report_progress(lecture_id, progress)
+                    
+                    check_deadline("Quiz generation")
+                    # Lectures with an identical transcript (and no earlier version to revise) share one generation
+                    generation_key = (
+                        transcript_key,
+                        str(previous["_id"]) if previous_version else None,
+                        lecture["courseCode"] if bank is not None else None
+                    )
+                    result, shared = await generation_flights.do(
+                        generation_key,
+                        lambda: PipelineExecutor.run_async(
+                            agenerate_version, clean_transcript, previous_version, on_progress, bank,
+                            priority=priority
+                        )
+                    )
+                    if shared:
+                        pipeline_coalesced.inc(scope="transcript")
+                        logger.info(f"Lecture {lecture_id} reused the generation in progress for an identical transcript")
+                    quiz = Quiz.model_validate({"questions": result["questions"]})
+                    outcome = "generated"
+                    logger.info(f"Pipeline completed for lecture {lecture_id}")
+                except Exception as e:
+                    outcome = "failed"
+                    await LectureController.update_status(
+                        lecture_id, "failed", error=f"Pipeline failed: {str(e)}", usage=usage.to_document()
+                    )
+                    logger.error(f"Pipeline failed for lecture {lecture_id}: {e}")
+                    return
+                finally:
+                    end_usage(usage_token)
+                    # Every generation attempt is billed, including failed and cancelled ones
+                    await UsageController.record_run(
+                        lecture, usage, outcome, job_id, quiz_id if outcome == "generated" else None
+                    )
+                
+                # The quiz document is checkpointed whole, with its _id, so a resumed run inserts exactly this version
                 quiz_data = {
+                    "_id": quiz_id,
                     "lectureId": ObjectId(lecture_id),
-                    "fileUrl": json_file_url,
+                    "questions": quiz.model_dump()["questions"],
+                    "questionCount": len(quiz.questions),
                     "format": "json",
+                    "version": (previous.get("version") or 1) + 1 if previous else 1,
+                    "previousQuizId": previous["_id"] if previous else None,
+                    "transcriptHash": transcript_key,
+                    "revision": result["revision"],
+                    "source": "bank" if result["bankQuestionIds"] else "llm",
+                    "bankQuestionIds": result["bankQuestionIds"],
+                    "usage": usage.to_document(),
                     "createdAt": datetime.utcnow(),
                     "updatedAt": datetime.utcnow()
                 }
-                quiz_result = await quiz_collection.insert_one(quiz_data)
-                logger.info(f"Saved quiz to database with ID: {quiz_result.inserted_id}")
-            except Exception as e:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {"status": "failed", "updatedAt": datetime.utcnow(), "error": f"Database save failed: {str(e)}"}}
-                )
-                logger.error(f"Failed to save quiz to database: {e}")
-                return
+                checkpoint = {"stage": "generated", "quiz": quiz_data}
+                await checkpoints.save(lecture_id, "generated", job_id, transcriptUrl=lecture["transcriptUrl"], quiz=quiz_data)
+            
+            quiz_data = checkpoint["quiz"]
+            usage_doc = quiz_data["usage"]
+            if not reached(checkpoint, "persisted"):
+                # Save quiz to database
+                try:
+                    with pipeline_stage_duration.time(stage="db_write"):
+                        await Database.db.quiz.insert_one(quiz_data)
+                    logger.info(f"Saved quiz to database with ID: {quiz_data['_id']}")
+                except DuplicateKeyError as e:
+                    if not await Database.db.quiz.find_one({"_id": quiz_data["_id"]}, {"_id": 1}):
+                        await LectureController.update_status(lecture_id, "failed", error=f"Database save failed: {str(e)}")
+                        logger.error(f"Failed to save quiz to database: {e}")
+                        return
+                    logger.info(f"Quiz {quiz_data['_id']} was already saved before the run was interrupted")
+                except Exception as e:
+                    await LectureController.update_status(lecture_id, "failed", error=f"Database save failed: {str(e)}")
+                    logger.error(f"Failed to save quiz to database: {e}")
+                    return
+                await checkpoints.save(lecture_id, "persisted", job_id, quizId=quiz_data["_id"])
+            
+            # Grow the course question bank, or count the reuse of bank questions
+            if QUESTION_BANK_ENABLED:
+                try:
+                    if quiz_data["bankQuestionIds"]:
+                        await question_bank.record_usage(quiz_data["bankQuestionIds"], lecture_id)
+                    else:
+                        added = await question_bank.add_questions(
+                            lecture["courseCode"], lecture_id, quiz_data["questions"]
+                        )
+                        logger.info(f"Question bank for {lecture['courseCode']}: {added}")
+                except Exception as e:
+                    logger.warning(f"Failed to update question bank for lecture {lecture_id}: {e}")
             
             # Update lecture status to completed
             try:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {
-                        "status": "completed", 
-                        "updatedAt": datetime.utcnow(),
-                        "quizId": quiz_result.inserted_id
-                    }}
+                await LectureController.update_status(
+                    lecture_id, "completed", quizId=quiz_data["_id"], quizVersion=quiz_data["version"],
+                    usage=usage_doc, resumeCount=0
                 )
                 logger.info(f"Updated lecture {lecture_id} status to completed")
+                await checkpoints.clear(lecture_id)
             except Exception as e:
                 logger.error(f"Failed to update lecture status to completed: {e}")
                 # Don't return here as the quiz was successfully created
             
-            # Clean up temporary files
-            try:
-                if os.path.exists(transcript_path):
-                    os.remove(transcript_path)
-                    logger.info(f"Cleaned up transcript file: {transcript_path}")
-            except Exception as e:
-                logger.warning(f"Failed to clean up transcript file: {e}")
-            
-            try:
-                if os.path.exists(temp_output_json):
-                    os.remove(temp_output_json)
-                    logger.info(f"Cleaned up temp output file: {temp_output_json}")
-            except Exception as e:
-                logger.warning(f"Failed to clean up temp output file: {e}")
-            
             return {
                 "lectureId": str(lecture_id),
-                "quizId": str(quiz_result.inserted_id),
+                "quizId": str(quiz_data["_id"]),
+                "version": quiz_data["version"],
                 "status": "completed"
             }
         
@@ -239,10 +640,7 @@ class LectureController:
             logger.error(f"Error processing lecture: {e}")
             # Update lecture status to failed
             try:
-                await collection.update_one(
-                    {"_id": ObjectId(lecture_id)},
-                    {"$set": {"status": "failed", "updatedAt": datetime.utcnow(), "error": str(e)}}
-                )
+                await LectureController.update_status(lecture_id, "failed", error=str(e))
                 logger.info(f"Updated lecture {lecture_id} status to failed")
             except Exception as update_error:
                 logger.error(f"Failed to update lecture status: {update_error}")
@@ -250,23 +648,232 @@ class LectureController:
             # Don't raise HTTPException in background task
             logger.error(f"Background task failed for lecture {lecture_id}: {str(e)}")
 
+    @staticmethod
+    async def resume_stuck_lectures(stale_seconds: float):
+        """
+        Queue a resuming job for each lecture left "queued" or "processing" by a job that was lost, e.g. with its process
+        Lectures whose job is still queued or running are left alone. A lecture that got stuck
+        JOB_MAX_ATTEMPTS times is marked failed. Returns the number of lectures resumed.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        stuck = await Database.db.lectures.find(
+            {"status": {"$in": list(ACTIVE_STATUSES)}, "updatedAt": {"$lt": cutoff}}, {"_id": 1}
+        ).to_list(length=SWEEP_BATCH_SIZE)
+        if not stuck:
+            return 0
+        queue = get_job_queue()
+        active = await queue.active_lecture_ids([str(lecture["_id"]) for lecture in stuck])
+        resumed = 0
+        for lecture in stuck:
+            lecture_id = str(lecture["_id"])
+            if lecture_id in active:
+                continue
+            # Claim the lecture so concurrent sweepers on other workers skip it
+            job_id = str(ObjectId())
+            claimed = await Database.db.lectures.find_one_and_update(
+                {"_id": lecture["_id"], "status": {"$in": list(ACTIVE_STATUSES)}, "updatedAt": {"$lt": cutoff}},
+                {"$set": {"jobId": job_id, "updatedAt": datetime.utcnow()}, "$inc": {"resumeCount": 1}},
+                projection={"resumeCount": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if claimed is None:
+                continue
+            if claimed["resumeCount"] > JOB_MAX_ATTEMPTS:
+                await LectureController.update_status(lecture_id, "failed", error="Processing was interrupted too many times")
+                await checkpoints.clear(lecture_id)
+                continue
+            await queue.enqueue(lecture_id, "normal", resume=True, job_id=job_id)
+            logger.info(f"Queued lecture {lecture_id} to resume from its last checkpoint")
+            resumed += 1
+        return resumed
+
+LEGACY_QUIZ_DIR = os.path.join(os.path.dirname(__file__), '..', 'output', 'json')
+
 class QuizController:
     
     @staticmethod
-    async def get_quiz_by_lecture(lecture_id: str):
-        """Get quiz by lecture ID"""
+    async def get_quiz_by_lecture(lecture_id: str, include_questions: bool = False):
+        """
+        Get the latest quiz version for a lecture
+        Questions are excluded unless include_questions is set, so metadata reads stay cheap
+        """
         try:
             # Validate ObjectId format
             if not ObjectId.is_valid(lecture_id):
                 raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
             
+            cache_key = (lecture_id, include_questions)
+            quiz = quiz_cache.get(cache_key)
+            if quiz is not None:
+                return quiz
+            generation = quiz_cache.generation(cache_key)
+            
             collection = Database.db.quiz
-            quiz = await collection.find_one({"lectureId": ObjectId(lecture_id)})
+            projection = {"transcript": 0} if include_questions else {"questions": 0, "transcript": 0}
+            quiz = await collection.find_one(
+                {"lectureId": ObjectId(lecture_id)}, projection, sort=[("version", -1)]
+            )
             if not quiz:
                 raise HTTPException(status_code=404, detail=f"Quiz for lecture {lecture_id} not found")
+            quiz_cache.set(cache_key, quiz, generation)
             return quiz
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Error retrieving quiz by lecture: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to retrieve quiz: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve quiz: {str(e)}")
+
+    @staticmethod
+    async def get_quiz_content(lecture_id: str, version: int = None):
+        """
+        Get the generated questions for a lecture, from the latest quiz version unless one is given
+        Quizzes created before questions were stored in the database are read from their legacy JSON file
+        """
+        try:
+            if not ObjectId.is_valid(lecture_id):
+                raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
+            
+            collection = Database.db.quiz
+            query = {"lectureId": ObjectId(lecture_id)}
+            if version is not None:
+                query["version"] = version
+            quiz = await collection.find_one(query, {"questions": 1, "fileUrl": 1}, sort=[("version", -1)])
+            if not quiz:
+                raise HTTPException(status_code=404, detail=f"Quiz for lecture {lecture_id} not found")
+            if "questions" in quiz:
+                return {"questions": quiz["questions"]}
+            
+            legacy_path = os.path.join(LEGACY_QUIZ_DIR, os.path.basename(quiz.get("fileUrl") or ""))
+            if quiz.get("fileUrl") and os.path.isfile(legacy_path):
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            raise HTTPException(status_code=404, detail=f"Quiz content for lecture {lecture_id} not found")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving quiz content: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve quiz content: {str(e)}")
+
+    @staticmethod
+    async def get_quiz_versions(lecture_id: str):
+        """List the quiz versions of a lecture, newest first, without questions or transcripts"""
+        try:
+            if not ObjectId.is_valid(lecture_id):
+                raise HTTPException(status_code=400, detail=f"Invalid lecture ID format: {lecture_id}")
+            
+            cursor = Database.db.quiz.find(
+                {"lectureId": ObjectId(lecture_id)},
+                {"version": 1, "previousQuizId": 1, "revision": 1, "questionCount": 1, "usage.totalTokens": 1, "createdAt": 1}
+            ).sort("version", -1)
+            versions = await cursor.to_list(length=None)
+            if not versions:
+                raise HTTPException(status_code=404, detail=f"Quiz for lecture {lecture_id} not found")
+            return versions
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving quiz versions: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve quiz versions: {str(e)}")
+
+USAGE_GROUPS = {
+    "course": "$courseCode",
+    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$usage.recordedAt"}},
+    "model": "$usage.calls.model"
+}
+
+class UsageController:
+    
+    @staticmethod
+    async def record_run(lecture, usage, outcome: str, job_id=None, quiz_id=None):
+        """
+        Append the usage of one generation run to the `usage_records` collection
+        Lecture and quiz documents only keep the latest run, so this is what usage reports aggregate
+        """
+        try:
+            await Database.db.usage_records.insert_one({
+                "lectureId": lecture["_id"],
+                "courseCode": lecture["courseCode"],
+                "jobId": str(job_id) if job_id else None,
+                "quizId": quiz_id,
+                "outcome": outcome,
+                "usage": usage.to_document()
+            })
+        except Exception as e:
+            logger.warning(f"Failed to record usage for lecture {lecture['_id']}: {e}")
+    
+    @staticmethod
+    async def get_usage(group_by: str = "course", start: datetime = None, end: datetime = None):
+        """
+        Aggregate the usage of every recorded generation run, including failed and repeated ones
+        Grouped by course, day or model; model totals are summed per call
+        """
+        try:
+            if group_by not in USAGE_GROUPS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid groupBy: {group_by}. Expected one of {', '.join(USAGE_GROUPS)}"
+                )
+            
+            match = {}
+            if start or end:
+                match["usage.recordedAt"] = {}
+                if start:
+                    match["usage.recordedAt"]["$gte"] = start
+                if end:
+                    match["usage.recordedAt"]["$lt"] = end
+            
+            if group_by == "model":
+                source = "$usage.calls"
+                pipeline = [{"$match": match}, {"$unwind": "$usage.calls"}]
+                counts = {"calls": {"$sum": 1}}
+            else:
+                source = "$usage"
+                pipeline = [{"$match": match}]
+                counts = {"runs": {"$sum": 1}, "lectures": {"$addToSet": "$lectureId"}}
+            pipeline += [
+                {"$group": {
+                    "_id": USAGE_GROUPS[group_by],
+                    **counts,
+                    "promptTokens": {"$sum": f"{source}.promptTokens"},
+                    "cachedTokens": {"$sum": f"{source}.cachedTokens"},
+                    "completionTokens": {"$sum": f"{source}.completionTokens"},
+                    "cost": {"$sum": f"{source}.cost"},
+                    "latencyMs": {"$sum": f"{source}.latencyMs"},
+                    "retries": {"$sum": f"{source}.retries"}
+                }},
+                {"$sort": {"_id": 1}}
+            ]
+            
+            results = []
+            async for row in Database.db.usage_records.aggregate(pipeline):
+                row[group_by] = row.pop("_id")
+                if "lectures" in row:
+                    row["lectures"] = len(row["lectures"])
+                row["totalTokens"] = row["promptTokens"] + row["completionTokens"]
+                results.append(row)
+            return results
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error aggregating usage: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to aggregate usage: {str(e)}")
+
+class QuestionBankController:
+    
+    @staticmethod
+    async def get_question_bank(course_code: str, limit: int = 100, skip: int = 0):
+        """Get the bank questions of a course, newest first, with bank statistics"""
+        try:
+            if limit < 1 or limit > 500 or skip < 0:
+                raise HTTPException(status_code=400, detail="limit must be between 1 and 500 and skip non-negative")
+            
+            return {
+                "courseCode": course_code,
+                "stats": await question_bank.stats(course_code),
+                "questions": await question_bank.list_questions(course_code, limit, skip)
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving question bank: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve question bank: {str(e)}")
@@ -1,4 +1,7 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+import asyncio
+import time
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
@@ -8,6 +11,17 @@ from dotenv import load_dotenv
 
 from .routes.routes import router as quiz_router
 from .config.database import Database
+from .utils.executor import PipelineExecutor
+from .utils.init_db import ensure_indexes
+from .utils.quiz_utils import close_http_client
+from .utils.job_queue import get_job_queue
+from .utils.read_cache import cache_stats
+from .utils.events import event_bus, watch_lecture_changes
+from .worker import Worker
+from llm_cache import get_cache
+from pipeline import ConfigurationError, validate_config, awarm_up
+from rate_limiter import get_rate_limiter
+from metrics import registry, http_request_duration, pipeline_queue_depth, pipeline_in_flight, job_queue_jobs
 
 # Load environment variables
 load_dotenv()
@@ -32,27 +46,130 @@ app.add_middleware(
 # Include routers
 app.include_router(quiz_router)
 
+pipeline_queue_depth.set_function(lambda: PipelineExecutor.queued)
+pipeline_in_flight.set_function(lambda: PipelineExecutor.running)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency per route template"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        http_request_duration.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status
+        )
+
 @app.on_event("startup")
 async def startup_db_client():
-    """Connect to MongoDB when the app starts"""
+    """Connect to MongoDB when the app starts and create missing indexes, including the duplicate lecture key"""
     await Database.connect_to_mongodb()
+    try:
+        await ensure_indexes(Database.db)
+    except Exception as e:
+        logger.error(f"Failed to create database indexes, duplicate lectures will not be rejected: {e}")
+
+@app.on_event("startup")
+async def check_pipeline_config():
+    """Report missing LLM settings at startup; lectures fail with this error until they are set"""
+    try:
+        validate_config()
+    except ConfigurationError as e:
+        logger.error(f"Quiz pipeline is not configured: {e}")
+
+@app.on_event("startup")
+async def startup_warm_up():
+    """Import litellm and load the tokenizer in a thread, so the first request does not stall the event loop"""
+    app.state.warm_up_task = asyncio.create_task(awarm_up())
+
+@app.on_event("startup")
+async def startup_pipeline_executor():
+    """Set up admission of quiz pipeline runs"""
+    PipelineExecutor.start()
+
+@app.on_event("startup")
+async def startup_embedded_worker():
+    """Run a job worker inside the API process unless EMBEDDED_WORKER is disabled"""
+    app.state.worker = None
+    if os.getenv("EMBEDDED_WORKER", "true").lower() == "true":
+        app.state.worker = Worker()
+        app.state.worker_task = asyncio.create_task(app.state.worker.run())
+
+@app.on_event("startup")
+async def startup_change_stream():
+    """Republish lecture updates from other nodes when EVENTS_CHANGE_STREAM is enabled"""
+    app.state.change_stream_task = None
+    if os.getenv("EVENTS_CHANGE_STREAM", "false").lower() == "true":
+        app.state.change_stream_task = asyncio.create_task(watch_lecture_changes())
+
+@app.on_event("shutdown")
+async def shutdown_change_stream():
+    """Stop watching lecture changes"""
+    if app.state.change_stream_task:
+        app.state.change_stream_task.cancel()
+
+@app.on_event("shutdown")
+async def shutdown_embedded_worker():
+    """Stop the embedded worker, letting in-flight jobs finish"""
+    if app.state.worker:
+        await app.state.worker.stop()
+        app.state.worker_task.cancel()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close MongoDB connection when the app shuts down"""
     await Database.close_mongodb_connection()
 
+@app.on_event("shutdown")
+async def shutdown_pipeline_executor():
+    """Stop admitting quiz pipeline runs"""
+    PipelineExecutor.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Close the pooled HTTP client used for transcript downloads"""
+    await close_http_client()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     try:
         # Try to ping the database
         await Database.db.command("ping")
-        return {"status": "healthy", "database": "connected"}
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "pipeline": PipelineExecutor.stats(),
+            "jobs": await get_job_queue().stats(),
+            "readCache": cache_stats(),
+            "events": event_bus.stats(),
+            "llmCache": get_cache().stats(),
+            "rateLimiter": get_rate_limiter().stats()
+        }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail="Database not connected")
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint"""
+    # The job queue is the real backlog; it lives in the database, so it is read at scrape time
+    try:
+        stats = await get_job_queue().stats()
+        for priority, counts in stats["byPriority"].items():
+            for status, count in counts.items():
+                job_queue_jobs.set(count, status=status, priority=priority)
+    except Exception as e:
+        logger.warning(f"Failed to read job queue stats for metrics: {e}")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 
@@ -34,7 +34,7 @@ class LectureModel(BaseModel):
     transcriptUrl: str
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
-    status: str = "pending" # pending, processing, completed, failed
+    status: str = "pending" # not started, pending, queued, processing, completed, failed, cancelled
     
     model_config = {
         "validate_by_name": True,
@@ -45,8 +45,13 @@ class LectureModel(BaseModel):
 class QuizModel(BaseModel):
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     lectureId: PyObjectId
+    questions: Optional[List[Dict[str, Any]]] = None
+    questionCount: Optional[int] = None
     content: Optional[str] = None
     fileUrl: Optional[str] = None
+    version: int = 1
+    previousQuizId: Optional[PyObjectId] = None
+    revision: Optional[Dict[str, Any]] = None
     format: str = "json"
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
@@ -3,6 +3,9 @@ MongoDB schema validation for lectures and Quiz collections
 """
 import json
 
+# Fields that identify a lecture; enforced by a unique compound index on lectures
+LECTURE_DUPLICATE_KEY_FIELDS = ["courseCode", "year", "quarter", "videoId", "videoUrl", "transcriptUrl"]
+
 lectures_schema = {
     "bsonType": "object",
     "required": ["courseCode", "year", "quarter", "videoId", "videoUrl", "transcriptUrl", "status", "createdAt", "updatedAt"],
@@ -15,21 +18,40 @@ lectures_schema = {
         "transcriptUrl": {"bsonType": "string"},
         "status": {
             "bsonType": "string",
-            "enum": ["pending", "processing", "completed", "failed"]
+            "enum": ["not started", "pending", "queued", "processing", "completed", "failed", "cancelled"]
         },
         "createdAt": {"bsonType": "date"},
         "updatedAt": {"bsonType": "date"},
         "QuizId": {"bsonType": ["objectId", "null"]},
-        "error": {"bsonType": ["string", "null"]}
+        "error": {"bsonType": ["string", "null"]},
+        "progress": {"bsonType": ["object", "null"]},
+        "usage": {"bsonType": ["object", "null"]},
+        "quizVersion": {"bsonType": ["int", "null"]},
+        "jobId": {"bsonType": ["string", "null"]}
     }
 }
 
 quiz_schema = {
     "bsonType": "object",
-    "required": ["lectureId", "content", "format", "createdAt", "updatedAt"],
+    "required": ["lectureId", "format", "createdAt", "updatedAt"],
     "properties": {
         "lectureId": {"bsonType": "objectId"},
+        "questions": {
+            "bsonType": "array",
+            "items": {
+                "bsonType": "object",
+                "required": ["question", "options", "correct_option", "correct_option_index", "explanation", "bloom_level", "time_stamp"]
+            }
+        },
+        "questionCount": {"bsonType": "int"},
         "content": {"bsonType": "string"},
+        "fileUrl": {"bsonType": "string"},
+        "usage": {"bsonType": "object"},
+        "version": {"bsonType": "int"},
+        "previousQuizId": {"bsonType": ["objectId", "null"]},
+        "transcriptHash": {"bsonType": "string"},
+        "transcript": {"bsonType": "string"},
+        "revision": {"bsonType": ["object", "null"]},
         "format": {"bsonType": "string"},
         "createdAt": {"bsonType": "date"},
         "updatedAt": {"bsonType": "date"}
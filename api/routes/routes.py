@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from bson import ObjectId
 import json
+import asyncio
 from datetime import datetime
-from ..controllers.quiz_controller import LectureController, QuizController
+from ..controllers.quiz_controller import LectureController, QuizController, UsageController, QuestionBankController
 from ..models.models import LectureModel, QuizModel
-from typing import Dict, Any
+from ..utils.job_queue import JOB_PRIORITIES
+from ..utils.events import event_bus, TERMINAL_STATUSES
+from typing import Dict, Any, List, Optional
+import os
 
 router = APIRouter()
 
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+
 # Helper function to convert MongoDB objects to JSON
 def parse_json(data):
     # Convert ObjectId to string for JSON serialization
@@ -47,6 +54,50 @@ async def create_lecture(lecture: LectureRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class LectureBatchRequest(BaseModel):
+    lectures: List[LectureRequest]
+
+class ProcessBatchRequest(BaseModel):
+    lectureIds: List[str]
+    priority: str = "bulk"
+    timeoutSeconds: Optional[float] = None
+
+@router.post("/api/lectures/batch")
+async def create_lectures(batch: LectureBatchRequest):
+    """
+    Create many lectures in one call
+    Returns a per-item result with the created ID or the duplicate status
+    """
+    try:
+        if len(batch.lectures) > BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Batch exceeds maximum of {BATCH_MAX_ITEMS} lectures")
+        results = await LectureController.create_lectures([lecture.dict() for lecture in batch.lectures])
+        summary = {"created": sum(1 for result in results if result["status"] == "created"), "total": len(results)}
+        return JSONResponse(content={"results": results, "summary": summary})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/lectures/process-batch")
+async def process_lectures(batch: ProcessBatchRequest):
+    """
+    Queue processing for many lectures in one call
+    Returns a per-item result with the job ID or the reason it was skipped
+    """
+    try:
+        if len(batch.lectureIds) > BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Batch exceeds maximum of {BATCH_MAX_ITEMS} lectures")
+        if batch.priority not in JOB_PRIORITIES:
+            raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(JOB_PRIORITIES)}")
+        results = await LectureController.enqueue_lectures(batch.lectureIds, batch.priority, batch.timeoutSeconds)
+        summary = {"queued": sum(1 for result in results if result["status"] == "queued"), "total": len(results)}
+        return JSONResponse(content={"results": results, "summary": summary})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/api/lectures/{lecture_id}")
 async def get_lecture(lecture_id: str):
     """
@@ -61,23 +112,61 @@ async def get_lecture(lecture_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/api/lectures/{lecture_id}/process")
-async def process_lecture(lecture_id: str, background_tasks: BackgroundTasks):
+async def process_lecture(lecture_id: str, priority: str = "interactive", timeoutSeconds: Optional[float] = None):
     """
     Process a lecture to generate quiz
-    This runs in the background as it may take some time
+    This is queued as a job and picked up by a worker as it may take some time.
+    A lecture that is already queued or processing is not queued again; the response carries its current job.
     """
     try:
-        # Check if lecture is already completed
-        lecture = await LectureController.get_lecture(lecture_id)
-        if lecture.get("status") == "completed":
+        if priority not in JOB_PRIORITIES:
+            raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(JOB_PRIORITIES)}")
+
+        result = await LectureController.request_processing(lecture_id, priority, timeoutSeconds)
+        if result["status"] == "completed":
             return JSONResponse(
                 content={"message": f"Lecture {lecture_id} has already been processed and completed"},
                 status_code=200
             )
-        
-        # If not completed, start the processing
-        background_tasks.add_task(LectureController.process_lecture, lecture_id)
-        return JSONResponse(content={"message": f"Processing started for lecture {lecture_id}"})
+        if result["status"] == "coalesced":
+            return JSONResponse(content={
+                "message": f"Lecture {lecture_id} is already {result['lectureStatus']}",
+                "jobId": result["jobId"],
+                "coalesced": True
+            })
+        return JSONResponse(content={"message": f"Processing started for lecture {lecture_id}", "jobId": result["jobId"]})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/lectures/{lecture_id}/cancel")
+async def cancel_lecture(lecture_id: str):
+    """
+    Cancel the queued or running processing of a lecture
+    The lecture ends up `cancelled` once its running job, if any, has stopped
+    """
+    try:
+        counts = await LectureController.cancel_lecture(lecture_id)
+        message = f"Cancellation requested for lecture {lecture_id}" if counts["running"] else f"Lecture {lecture_id} cancelled"
+        return JSONResponse(content={"message": message, "jobs": counts})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class ReviseRequest(BaseModel):
+    transcriptUrl: Optional[str] = None
+
+@router.post("/api/lectures/{lecture_id}/revise")
+async def revise_lecture(lecture_id: str, revision: ReviseRequest):
+    """
+    Regenerate the quiz of a lecture from a revised transcript
+    Only questions in changed parts of the transcript are regenerated; the result is stored as a new quiz version
+    """
+    try:
+        job_id = await LectureController.revise_lecture(lecture_id, revision.transcriptUrl)
+        return JSONResponse(content={"message": f"Revision started for lecture {lecture_id}", "jobId": job_id})
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -89,13 +178,85 @@ async def get_lecture_status(lecture_id: str):
     Get the processing status of a lecture
     """
     try:
-        lecture = await LectureController.get_lecture(lecture_id)
-        return JSONResponse(content={"status": lecture["status"]})
+        status = await LectureController.get_lecture_status(lecture_id)
+        return JSONResponse(content={"status": status})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/lectures/{lecture_id}/events")
+async def stream_lecture_events(lecture_id: str, request: Request):
+    """
+    Stream status transitions and progress of a lecture as Server-Sent Events
+    The stream ends after the lecture completes, fails or is cancelled
+    """
+    try:
+        # Subscribe before reading the current status so no transition is missed
+        queue = event_bus.subscribe(lecture_id)
+        try:
+            status = await LectureController.get_lecture_status(lecture_id)
+        except Exception:
+            event_bus.unsubscribe(lecture_id, queue)
+            raise
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def event_stream():
+        try:
+            yield f"event: status\ndata: {json.dumps({'lectureId': lecture_id, 'type': 'status', 'status': status})}\n\n"
+            if status in TERMINAL_STATUSES:
+                return
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event["type"] == "status" and event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            event_bus.unsubscribe(lecture_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/api/lectures/{lecture_id}/ws")
+async def lecture_events_websocket(websocket: WebSocket, lecture_id: str):
+    """
+    WebSocket equivalent of the events stream
+    Sends the current status, then each event, and closes after the lecture completes, fails or is cancelled
+    """
+    queue = event_bus.subscribe(lecture_id)
+    try:
+        # Accept before any close, otherwise the handshake is rejected with HTTP 403 and the close code is lost
+        await websocket.accept()
+        try:
+            status = await LectureController.get_lecture_status(lecture_id)
+        except HTTPException as e:
+            await websocket.close(code=4404 if e.status_code == 404 else 4400, reason=str(e.detail))
+            return
+        await websocket.send_json({"lectureId": lecture_id, "type": "status", "status": status})
+        if status in TERMINAL_STATUSES:
+            await websocket.close()
+            return
+        while True:
+            event = await queue.get()
+            await websocket.send_json(event)
+            if event["type"] == "status" and event["status"] in TERMINAL_STATUSES:
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_bus.unsubscribe(lecture_id, queue)
+
 @router.get("/api/lectures/{lecture_id}/quiz")
 async def get_lecture_quiz(lecture_id: str):
     """
@@ -110,20 +271,78 @@ async def get_lecture_quiz(lecture_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/lectures/{lecture_id}/quiz/content")
+async def get_lecture_quiz_questions(lecture_id: str, version: Optional[int] = None):
+    """
+    Get the generated questions of the quiz associated with a lecture
+    The latest version is returned unless a version is given
+    """
+    try:
+        content = await QuizController.get_quiz_content(lecture_id, version)
+        return JSONResponse(content=content)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/lectures/{lecture_id}/quiz/versions")
+async def get_lecture_quiz_versions(lecture_id: str):
+    """
+    List the quiz versions of a lecture, newest first, with what each revision reused
+    """
+    try:
+        versions = await QuizController.get_quiz_versions(lecture_id)
+        return JSONResponse(content={"versions": [parse_json(version) for version in versions]})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/api/lectures/{lecture_id}/quiz/url")
 async def get_lecture_quiz_content(lecture_id: str):
     """
-    Get the raw quiz content associated with a lecture
-    For PDF format, this will return the file URL instead of content
+    Get the URL of the quiz content associated with a lecture
+    For markdown format, this will return the content directly
     """
     try:
         quiz = await QuizController.get_quiz_by_lecture(lecture_id)
         if quiz["format"] == "json":
-            return JSONResponse(content={"fileUrl": quiz["fileUrl"], "format": "json"})
+            return JSONResponse(content={"fileUrl": f"/api/lectures/{lecture_id}/quiz/content", "format": "json"})
         else:
             # Backward compatibility for markdown content
             return Response(content=quiz["content"], media_type="text/markdown")
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))     
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/courses/{course_code}/question-bank")
+async def get_question_bank(course_code: str, limit: int = 100, skip: int = 0):
+    """
+    Get the deduplicated question bank of a course
+    """
+    try:
+        bank = await QuestionBankController.get_question_bank(course_code, limit, skip)
+        return JSONResponse(content=parse_json(bank))
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/usage")
+async def get_usage(groupBy: str = "course", start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Get aggregated LLM token usage, latency, retries and estimated cost
+    Grouped by course, day or model, optionally limited to [start, end)
+    """
+    try:
+        results = await UsageController.get_usage(groupBy, start, end)
+        return JSONResponse(content={"groupBy": groupBy, "results": results})
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,58 @@
+"""
+Per-stage checkpoints of lecture processing, so a run that dies part way resumes instead of starting over
+"""
+import logging
+from datetime import datetime
+from bson import ObjectId
+from ..config.database import Database
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("downloaded", "cleaned", "generated", "persisted")
+
+def reached(checkpoint, stage: str):
+    """Whether a checkpoint has completed `stage`"""
+    return checkpoint is not None and STAGES.index(checkpoint["stage"]) >= STAGES.index(stage)
+
+class CheckpointStore:
+    """
+    The last completed stage of each lecture's current run, in the `checkpoints` collection
+    A checkpoint holds what later stages need: the downloaded path, the cleaned transcript,
+    then the complete quiz document (with its _id assigned up front, so persisting it twice is harmless)
+    """
+
+    @property
+    def collection(self):
+        return Database.db.checkpoints
+
+    async def load(self, lecture_id: str, transcript_url: str, job_id=None, resume: bool = False):
+        """
+        Return the checkpoint to resume from, or None to start over
+        A checkpoint is used by the job that wrote it (e.g. requeued after its worker died) or when
+        resuming explicitly; stale checkpoints and ones for another transcript URL are dropped
+        """
+        checkpoint = await self.collection.find_one({"lectureId": ObjectId(lecture_id)})
+        if checkpoint is None:
+            return None
+        same_job = job_id is not None and str(checkpoint.get("jobId")) == str(job_id)
+        if (resume or same_job) and checkpoint.get("transcriptUrl") == transcript_url:
+            return checkpoint
+        await self.clear(lecture_id)
+        return None
+
+    async def save(self, lecture_id: str, stage: str, job_id=None, **fields):
+        """Record that `stage` completed, with the results later stages need"""
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"lectureId": ObjectId(lecture_id)},
+            {
+                "$set": {"stage": stage, "jobId": str(job_id) if job_id else None, "updatedAt": now, **fields},
+                "$setOnInsert": {"createdAt": now}
+            },
+            upsert=True
+        )
+
+    async def clear(self, lecture_id: str):
+        await self.collection.delete_one({"lectureId": ObjectId(lecture_id)})
+
+checkpoints = CheckpointStore()
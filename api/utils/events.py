@@ -0,0 +1,90 @@
+"""
+In-process pub/sub for lecture status events, with an optional MongoDB change-stream source
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from collections import defaultdict
+from dotenv import load_dotenv
+from ..config.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+class EventBus:
+    """Fans out lecture events to every subscriber queue for that lecture"""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        # Disabled when a change stream republishes writes from every node
+        self.publish_local = True
+
+    def subscribe(self, lecture_id: str):
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.subscribers[str(lecture_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, lecture_id: str, queue):
+        queues = self.subscribers.get(str(lecture_id))
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[str(lecture_id)]
+
+    def publish(self, lecture_id: str, event: dict):
+        """Deliver an event to current subscribers, dropping the oldest event for slow consumers"""
+        event = {"lectureId": str(lecture_id), "timestamp": datetime.utcnow().isoformat(), **event}
+        for queue in list(self.subscribers.get(str(lecture_id), ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def stats(self):
+        return {
+            "lectures": len(self.subscribers),
+            "subscribers": sum(len(queues) for queues in self.subscribers.values())
+        }
+
+event_bus = EventBus()
+
+def publish_local(lecture_id: str, event: dict):
+    """Publish an event written by this process unless the change stream will deliver it"""
+    if event_bus.publish_local:
+        event_bus.publish(lecture_id, event)
+
+async def watch_lecture_changes():
+    """
+    Republish status and progress updates from every node via a MongoDB change stream
+    Requires a replica set; enabled with EVENTS_CHANGE_STREAM=true
+    """
+    pipeline = [{"$match": {"operationType": "update"}}]
+    while True:
+        try:
+            async with Database.db.lectures.watch(pipeline) as stream:
+                event_bus.publish_local = False
+                logger.info("Watching lecture changes for status events")
+                async for change in stream:
+                    fields = change["updateDescription"]["updatedFields"]
+                    lecture_id = change["documentKey"]["_id"]
+                    if "status" in fields:
+                        event = {"type": "status", "status": fields["status"]}
+                        if fields.get("error"):
+                            event["error"] = fields["error"]
+                        if fields.get("quizId"):
+                            event["quizId"] = str(fields["quizId"])
+                        event_bus.publish(lecture_id, event)
+                    elif "progress" in fields:
+                        event_bus.publish(lecture_id, {"type": "progress", **fields["progress"]})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            event_bus.publish_local = True
+            logger.error(f"Lecture change stream failed, retrying: {e}")
+            await asyncio.sleep(5)
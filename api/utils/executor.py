@@ -0,0 +1,121 @@
+"""
+Bounded admission of quiz pipeline runs
+"""
+import os
+import heapq
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+class PipelineExecutor:
+    """
+    Admits pipeline runs on the event loop, at most PIPELINE_MAX_CONCURRENCY at once.
+
+    The pipeline is async end to end (blocking steps such as transcript parsing run
+    in threads of their own), so this caps concurrent LLM work rather than owning a
+    pool; runs beyond the cap wait in the queue and are admitted by priority (lower
+    first), then in arrival order.
+    """
+    waiters = None
+    sequence = None
+    max_concurrency = 0
+    queued = 0
+    running = 0
+    admitted = 0
+    completed = 0
+    failed = 0
+
+    @classmethod
+    def start(cls):
+        """Set up the admission queue from environment settings"""
+        if cls.waiters is not None:
+            return
+
+        cls.max_concurrency = int(os.getenv("PIPELINE_MAX_CONCURRENCY", "8"))
+        cls.waiters = []
+        cls.sequence = itertools.count()
+        cls.admitted = 0
+        logger.info(f"Started pipeline executor (max concurrency {cls.max_concurrency})")
+
+    @classmethod
+    async def _acquire(cls, priority):
+        if cls.admitted < cls.max_concurrency and not cls.waiters:
+            cls.admitted += 1
+            return
+        admission = asyncio.get_running_loop().create_future()
+        heapq.heappush(cls.waiters, (priority, next(cls.sequence), admission))
+        try:
+            await admission
+        except asyncio.CancelledError:
+            # Pass on a slot that was handed over just as the wait was cancelled
+            if admission.done() and not admission.cancelled():
+                cls._release()
+            raise
+
+    @classmethod
+    def _release(cls):
+        """Hand the slot to the most urgent live waiter, or free it"""
+        while cls.waiters:
+            _, _, admission = heapq.heappop(cls.waiters)
+            if not admission.done():
+                admission.set_result(None)
+                return
+        cls.admitted -= 1
+
+    @classmethod
+    @asynccontextmanager
+    async def slot(cls, priority: int = 1):
+        """Wait for an admission slot and hold it for the duration of a run"""
+        if cls.waiters is None:
+            cls.start()
+
+        cls.queued += 1
+        try:
+            await cls._acquire(priority)
+        finally:
+            cls.queued -= 1
+
+        cls.running += 1
+        try:
+            yield
+            cls.completed += 1
+        except BaseException:
+            cls.failed += 1
+            raise
+        finally:
+            cls.running -= 1
+            cls._release()
+
+    @classmethod
+    async def run_async(cls, coro_func, *args, priority: int = 1):
+        """
+        Run a coroutine function on the event loop under the same admission limit
+        Returns the coroutine's result
+        """
+        async with cls.slot(priority):
+            return await coro_func(*args)
+
+    @classmethod
+    def stats(cls):
+        """Report the concurrency limit, queue depth and in-flight runs"""
+        return {
+            "maxConcurrency": cls.max_concurrency,
+            "queued": cls.queued,
+            "running": cls.running,
+            "completed": cls.completed,
+            "failed": cls.failed
+        }
+
+    @classmethod
+    def shutdown(cls):
+        """Drop the admission queue; in-flight runs belong to the jobs awaiting them"""
+        if cls.waiters is not None:
+            logger.info("Shutting down pipeline executor")
+            cls.waiters = None
@@ -1,38 +1,79 @@
 #!/usr/bin/env python3
 """
 Script to initialize MongoDB with required collections and indexes
+
+Run with: python -m api.utils.init_db
 """
 
 import asyncio
-import os
 import pymongo
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import logging
-from models.schemas import get_schema_validation_commands
+from ..config.database import Database
+from ..models.schemas import get_schema_validation_commands, LECTURE_DUPLICATE_KEY_FIELDS
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+LECTURE_DUPLICATE_KEY_INDEX = "lecture_duplicate_key"
+
+async def migrate_lecture_indexes(db):
+    """
+    Replace the legacy unique index on videoId with a unique compound index
+    matching the duplicate lecture check
+    """
+    indexes = await db.lectures.index_information()
+    legacy = indexes.get("videoId_1")
+    if legacy and legacy.get("unique"):
+        await db.lectures.drop_index("videoId_1")
+        logger.info("Dropped legacy unique index on lectures.videoId")
+    
+    await db.lectures.create_index(
+        [(field, 1) for field in LECTURE_DUPLICATE_KEY_FIELDS],
+        name=LECTURE_DUPLICATE_KEY_INDEX,
+        unique=True
+    )
+    logger.info(f"Created unique index {LECTURE_DUPLICATE_KEY_INDEX} on lectures")
+    
+    await db.lectures.create_index("videoId")
+    logger.info("Created index on lectures.videoId")
+
+async def ensure_indexes(db):
+    """
+    Create the indexes the API relies on; creating an existing index is a no-op, so this runs at every startup
+    """
+    await migrate_lecture_indexes(db)
+    
+    await db.lectures.create_index("status")
+    logger.info("Created index on lectures.status")
+    
+    await db.quiz.create_index("lectureId")
+    logger.info("Created index on quiz.lectureId")
+    
+    await db.quiz.create_index([("lectureId", 1), ("version", -1)])
+    logger.info("Created index on quiz.lectureId, quiz.version")
+    
+    await db.question_bank.create_index([("courseCode", 1), ("timesUsed", -1), ("createdAt", -1)])
+    logger.info("Created index on question_bank.courseCode, timesUsed, createdAt")
+    
+    await db.jobs.create_index([("status", 1), ("priority", 1), ("createdAt", 1)])
+    logger.info("Created index on jobs.status, jobs.priority, jobs.createdAt")
+    
+    await db.jobs.create_index("lectureId")
+    logger.info("Created index on jobs.lectureId")
+    
+    await db.checkpoints.create_index("lectureId", unique=True)
+    logger.info("Created unique index on checkpoints.lectureId")
+    
+    await db.usage_records.create_index("usage.recordedAt")
+    logger.info("Created index on usage_records.usage.recordedAt")
+
 async def init_db():
-    """Initialize MongoDB collections and indexes"""
-    client = None
+    """Initialize MongoDB collections, indexes and schema validation in the database named by MONGODB_URI"""
     try:
-        mongodb_uri = os.getenv("MONGODB_URI")
-        if not mongodb_uri:
-            logger.error("MONGODB_URI environment variable not set")
-            return
-        
-        logger.info(f"Connecting to MongoDB at {mongodb_uri}")
-        client = AsyncIOMotorClient(mongodb_uri)
-        
-        # Extract database name from URI
-        db_name = "mookitTesting"
-        db = client[db_name]
+        db = await Database.connect_to_mongodb()
         
         # Create collections if they don't exist
         if "lectures" not in await db.list_collection_names():
@@ -43,15 +84,7 @@ async def init_db():
             await db.create_collection("quiz")
             logger.info("Created quiz collection")
         
-        # Create indexes
-        await db.lectures.create_index("videoId", unique=True)
-        logger.info("Created index on lectures.videoId")
-        
-        await db.lectures.create_index("status")
-        logger.info("Created index on lectures.status")
-        
-        await db.quiz.create_index("lectureId")
-        logger.info("Created index on quiz.lectureId")
+        await ensure_indexes(db)
         
         # Apply schema validation
         schema_commands = get_schema_validation_commands()
@@ -66,8 +99,8 @@ async def init_db():
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
     finally:
-        if client:
-            client.close()
+        await Database.close_mongodb_connection()
 
 if __name__ == "__main__":
-    asyncio.run(init_db())
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    asyncio.run(init_db())
@@ -0,0 +1,335 @@
+"""
+Durable job queue for lecture processing
+"""
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from ..config.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Seconds a job may take from being queued before it is aborted; 0 means no deadline
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "0"))
+
+# Lower values are claimed first; bulk jobs are kept out of the slots workers reserve for the others
+JOB_PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+def job_fields(priority: str = "normal", timeout_seconds: float = None, now: datetime = None):
+    """Priority and deadline fields for a new job"""
+    if priority not in JOB_PRIORITIES:
+        raise ValueError(f"Unknown job priority: {priority}")
+    now = now or datetime.utcnow()
+    timeout_seconds = JOB_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+    return {
+        "priority": JOB_PRIORITIES[priority],
+        "priorityClass": priority,
+        "deadline": now + timedelta(seconds=timeout_seconds) if timeout_seconds else None
+    }
+
+def job_stats(rows):
+    """Fold (status, priority class, count) rows into totals and per-class counts of queued and running jobs"""
+    stats = {"queued": 0, "running": 0, "byPriority": {
+        priority: {"queued": 0, "running": 0} for priority in JOB_PRIORITIES
+    }}
+    for status, priority, count in rows:
+        stats[status] += count
+        # Jobs queued before priority classes existed run as normal
+        stats["byPriority"][priority or "normal"][status] += count
+    return stats
+
+# Jobs running in this process by job ID, so cancellation does not wait for a heartbeat
+local_jobs = {}
+
+def cancel_local_jobs(lecture_id: str):
+    """Cancel the tasks of this process's running jobs for a lecture, returns how many were cancelled"""
+    cancelled = 0
+    for job_lecture_id, task in list(local_jobs.values()):
+        if job_lecture_id == str(lecture_id) and not task.done():
+            task.cancel()
+            cancelled += 1
+    return cancelled
+
+class MongoJobQueue:
+    """Job queue stored in the `jobs` collection, shared by API nodes and workers"""
+
+    @property
+    def collection(self):
+        return Database.db.jobs
+
+    async def enqueue(self, lecture_id: str, priority: str = "normal", timeout_seconds: float = None,
+                      resume: bool = False, job_id: str = None):
+        """
+        Add a processing job for a lecture, returns the job ID; resume jobs continue from the lecture's checkpoint
+        job_id lets the caller record the ID on the lecture before the job can be claimed
+        """
+        now = datetime.utcnow()
+        result = await self.collection.insert_one({
+            "_id": ObjectId(job_id) if job_id else ObjectId(),
+            "lectureId": ObjectId(lecture_id),
+            "status": "queued",
+            "attempts": 0,
+            "resume": resume,
+            **job_fields(priority, timeout_seconds, now),
+            "createdAt": now,
+            "updatedAt": now
+        })
+        return str(result.inserted_id)
+
+    async def enqueue_many(self, lecture_ids, priority: str = "bulk", timeout_seconds: float = None, job_ids=None):
+        """Add processing jobs for several lectures in one write, returns the job IDs in order"""
+        if not lecture_ids:
+            return []
+        now = datetime.utcnow()
+        fields = job_fields(priority, timeout_seconds, now)
+        job_ids = job_ids or [None] * len(lecture_ids)
+        result = await self.collection.insert_many([
+            {
+                "_id": ObjectId(job_id) if job_id else ObjectId(),
+                "lectureId": ObjectId(lecture_id),
+                "status": "queued",
+                "attempts": 0,
+                **fields,
+                "createdAt": now,
+                "updatedAt": now
+            }
+            for lecture_id, job_id in zip(lecture_ids, job_ids)
+        ])
+        return [str(job_id) for job_id in result.inserted_ids]
+
+    async def claim(self, worker_id: str, max_priority: int = None):
+        """
+        Atomically claim the most urgent queued job, oldest first within a priority
+        max_priority limits the claim to jobs at least that urgent; returns None when none is queued
+        """
+        now = datetime.utcnow()
+        query = {"status": "queued"}
+        if max_priority is not None:
+            query["priority"] = {"$lte": max_priority}
+        return await self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {"status": "running", "claimedBy": worker_id, "heartbeatAt": now, "updatedAt": now},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", 1), ("createdAt", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def heartbeat(self, job_id, worker_id: str):
+        """Record that a job is still running, returns True if its cancellation was requested"""
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {"_id": ObjectId(job_id), "claimedBy": worker_id, "status": "running"},
+            {"$set": {"heartbeatAt": now, "updatedAt": now}},
+            projection={"cancelRequested": 1}
+        )
+        return bool(job and job.get("cancelRequested"))
+
+    async def cancel(self, lecture_id: str):
+        """
+        Cancel a lecture's queued jobs and flag its running ones for their worker to stop
+        Returns the number of queued and running jobs affected
+        """
+        now = datetime.utcnow()
+        queued = await self.collection.update_many(
+            {"lectureId": ObjectId(lecture_id), "status": "queued"},
+            {"$set": {"status": "cancelled", "updatedAt": now}}
+        )
+        running = await self.collection.update_many(
+            {"lectureId": ObjectId(lecture_id), "status": "running"},
+            {"$set": {"cancelRequested": True, "updatedAt": now}}
+        )
+        return {"queued": queued.modified_count, "running": running.modified_count}
+
+    async def finish_cancelled(self, job_id, worker_id: str, reason: str):
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id), "claimedBy": worker_id},
+            {"$set": {"status": "cancelled", "error": reason, "updatedAt": datetime.utcnow()}}
+        )
+
+    async def complete(self, job_id, worker_id: str):
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id), "claimedBy": worker_id},
+            {"$set": {"status": "completed", "updatedAt": datetime.utcnow()}}
+        )
+
+    async def fail(self, job_id, worker_id: str, error: str):
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id), "claimedBy": worker_id},
+            {"$set": {"status": "failed", "error": error, "updatedAt": datetime.utcnow()}}
+        )
+
+    async def requeue_stale(self, stale_seconds: float):
+        """
+        Requeue running jobs whose worker stopped heartbeating
+        Jobs that already used JOB_MAX_ATTEMPTS are marked failed, and jobs asked to cancel are marked cancelled
+        Returns the number of requeued jobs and the lecture IDs of the cancelled ones, whose lectures the caller marks cancelled
+        """
+        now = datetime.utcnow()
+        stale = {"status": "running", "heartbeatAt": {"$lt": now - timedelta(seconds=stale_seconds)}}
+        cancelled = await self.collection.find({**stale, "cancelRequested": True}, {"lectureId": 1}).to_list(length=None)
+        await self.collection.update_many(
+            {"_id": {"$in": [job["_id"] for job in cancelled]}, "status": "running"},
+            {"$set": {"status": "cancelled", "updatedAt": now}}
+        )
+        await self.collection.update_many(
+            {**stale, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+            {"$set": {"status": "failed", "error": "Worker stopped responding", "updatedAt": now}}
+        )
+        result = await self.collection.update_many(
+            stale,
+            {"$set": {"status": "queued", "claimedBy": None, "updatedAt": now}}
+        )
+        return result.modified_count, [str(job["lectureId"]) for job in cancelled]
+
+    async def active_lecture_ids(self, lecture_ids):
+        """The subset of lecture_ids with a queued or running job"""
+        cursor = self.collection.find(
+            {"lectureId": {"$in": [ObjectId(lecture_id) for lecture_id in lecture_ids]}, "status": {"$in": ["queued", "running"]}},
+            {"lectureId": 1}
+        )
+        return {str(job["lectureId"]) async for job in cursor}
+
+    async def stats(self):
+        """Queued and running jobs, in total and per priority class"""
+        rows = self.collection.aggregate([
+            {"$match": {"status": {"$in": ["queued", "running"]}}},
+            {"$group": {"_id": {"status": "$status", "priority": "$priorityClass"}, "count": {"$sum": 1}}}
+        ])
+        return job_stats([(row["_id"]["status"], row["_id"].get("priority"), row["count"]) async for row in rows])
+
+class InMemoryJobQueue:
+    """Process-local stand-in with the same interface, for tests and single-node development"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.lock = asyncio.Lock()
+
+    async def enqueue(self, lecture_id: str, priority: str = "normal", timeout_seconds: float = None,
+                      resume: bool = False, job_id: str = None):
+        now = datetime.utcnow()
+        job_id = job_id or uuid.uuid4().hex
+        async with self.lock:
+            self.jobs[job_id] = {
+                "_id": job_id,
+                "lectureId": lecture_id,
+                "status": "queued",
+                "attempts": 0,
+                "resume": resume,
+                **job_fields(priority, timeout_seconds, now),
+                "createdAt": now,
+                "updatedAt": now
+            }
+        return job_id
+
+    async def enqueue_many(self, lecture_ids, priority: str = "bulk", timeout_seconds: float = None, job_ids=None):
+        job_ids = job_ids or [None] * len(lecture_ids)
+        return [
+            await self.enqueue(lecture_id, priority, timeout_seconds, job_id=job_id)
+            for lecture_id, job_id in zip(lecture_ids, job_ids)
+        ]
+
+    async def claim(self, worker_id: str, max_priority: int = None):
+        async with self.lock:
+            queued = [
+                job for job in self.jobs.values()
+                if job["status"] == "queued" and (max_priority is None or job["priority"] <= max_priority)
+            ]
+            if not queued:
+                return None
+            job = min(queued, key=lambda job: (job["priority"], job["createdAt"]))
+            now = datetime.utcnow()
+            job.update(status="running", claimedBy=worker_id, heartbeatAt=now, updatedAt=now)
+            job["attempts"] += 1
+            return dict(job)
+
+    async def _update(self, job_id, worker_id, **fields):
+        async with self.lock:
+            job = self.jobs.get(job_id)
+            if job and job.get("claimedBy") == worker_id:
+                job.update(updatedAt=datetime.utcnow(), **fields)
+
+    async def heartbeat(self, job_id, worker_id: str):
+        await self._update(job_id, worker_id, heartbeatAt=datetime.utcnow())
+        return bool(self.jobs.get(job_id, {}).get("cancelRequested"))
+
+    async def cancel(self, lecture_id: str):
+        counts = {"queued": 0, "running": 0}
+        async with self.lock:
+            for job in self.jobs.values():
+                if str(job["lectureId"]) != str(lecture_id):
+                    continue
+                if job["status"] == "queued":
+                    job.update(status="cancelled", updatedAt=datetime.utcnow())
+                    counts["queued"] += 1
+                elif job["status"] == "running":
+                    job.update(cancelRequested=True, updatedAt=datetime.utcnow())
+                    counts["running"] += 1
+        return counts
+
+    async def finish_cancelled(self, job_id, worker_id: str, reason: str):
+        await self._update(job_id, worker_id, status="cancelled", error=reason)
+
+    async def complete(self, job_id, worker_id: str):
+        await self._update(job_id, worker_id, status="completed")
+
+    async def fail(self, job_id, worker_id: str, error: str):
+        await self._update(job_id, worker_id, status="failed", error=error)
+
+    async def requeue_stale(self, stale_seconds: float):
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        requeued = 0
+        cancelled = []
+        async with self.lock:
+            for job in self.jobs.values():
+                if job["status"] != "running" or job["heartbeatAt"] >= cutoff:
+                    continue
+                if job.get("cancelRequested"):
+                    job.update(status="cancelled")
+                    cancelled.append(str(job["lectureId"]))
+                elif job["attempts"] >= JOB_MAX_ATTEMPTS:
+                    job.update(status="failed", error="Worker stopped responding")
+                else:
+                    job.update(status="queued", claimedBy=None)
+                    requeued += 1
+        return requeued, cancelled
+
+    async def active_lecture_ids(self, lecture_ids):
+        wanted = {str(lecture_id) for lecture_id in lecture_ids}
+        return {
+            str(job["lectureId"]) for job in self.jobs.values()
+            if job["status"] in ("queued", "running") and str(job["lectureId"]) in wanted
+        }
+
+    async def stats(self):
+        return job_stats(
+            (job["status"], job.get("priorityClass"), 1) for job in self.jobs.values()
+            if job["status"] in ("queued", "running")
+        )
+
+_job_queue = None
+
+def get_job_queue():
+    """
+    Return the configured job queue
+    JOB_QUEUE_BACKEND is "mongo" (default) or "memory"
+    """
+    global _job_queue
+    if _job_queue is None:
+        backend = os.getenv("JOB_QUEUE_BACKEND", "mongo").lower()
+        if backend == "mongo":
+            _job_queue = MongoJobQueue()
+        elif backend == "memory":
+            _job_queue = InMemoryJobQueue()
+        else:
+            raise ValueError(f"Unsupported JOB_QUEUE_BACKEND: {backend}")
+    return _job_queue
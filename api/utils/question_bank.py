@@ -0,0 +1,115 @@
+"""
+Per-course question bank with near-duplicate detection at insert time
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from bson import ObjectId
+from dotenv import load_dotenv
+from ..config.database import Database
+from similarity import get_hasher, question_text
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "false").lower() == "true"
+QUESTION_BANK_DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_BANK_DUPLICATE_THRESHOLD", "0.7"))
+QUESTION_BANK_MAX_CANDIDATES = int(os.getenv("QUESTION_BANK_MAX_CANDIDATES", "2000"))
+
+class QuestionBank:
+    """
+    Questions generated for a course, stored once in the `question_bank` collection
+    Each entry keeps a MinHash signature of its stem and answer; a new question whose estimated
+    similarity to an entry reaches QUESTION_BANK_DUPLICATE_THRESHOLD is recorded against that entry instead
+    """
+
+    @property
+    def collection(self):
+        return Database.db.question_bank
+
+    async def candidates(self, course_code: str, limit: int = QUESTION_BANK_MAX_CANDIDATES):
+        """Most used, then newest, bank questions of a course for quiz assembly"""
+        cursor = self.collection.find(
+            {"courseCode": course_code}, {"question": 1}
+        ).sort([("timesUsed", -1), ("createdAt", -1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def add_questions(self, course_code: str, lecture_id: str, questions):
+        """Add a lecture's questions to its course bank, merging near-duplicates into existing entries"""
+        existing = await self.collection.find(
+            {"courseCode": course_code}, {"signature": 1}
+        ).to_list(length=None)
+        ids = [entry["_id"] for entry in existing]
+
+        hasher = get_hasher()
+
+        def match_questions():
+            # Builds the bank matrix once; every comparison runs here rather than on the event loop
+            signatures = hasher.matrix([hasher.signature(question_text(question)) for question in questions])
+            bank = hasher.matrix([entry["signature"] for entry in existing])
+            return signatures, hasher.deduplicate(signatures, bank, QUESTION_BANK_DUPLICATE_THRESHOLD)
+
+        signatures, matches = await asyncio.to_thread(match_questions)
+
+        now = datetime.utcnow()
+        duplicate_ids = []
+        inserts = {}
+        for index, (question, signature, match) in enumerate(zip(questions, signatures, matches)):
+            if match is None:
+                inserts[index] = {
+                    "courseCode": course_code,
+                    "question": question,
+                    "signature": [int(value) for value in signature],
+                    "lectureIds": [ObjectId(lecture_id)],
+                    "sourceLectureId": ObjectId(lecture_id),
+                    "duplicateCount": 0,
+                    "timesUsed": 0,
+                    "createdAt": now
+                }
+            elif match[0] == "bank":
+                duplicate_ids.append(ids[match[1]])
+            else:
+                # A near-duplicate within this lecture is merged into the question inserted for it
+                inserts[match[1]]["duplicateCount"] += 1
+
+        inserts = list(inserts.values())
+        if inserts:
+            await self.collection.insert_many(inserts)
+        for duplicate_id in duplicate_ids:
+            await self.collection.update_one(
+                {"_id": duplicate_id},
+                {"$addToSet": {"lectureIds": ObjectId(lecture_id)}, "$inc": {"duplicateCount": 1}}
+            )
+        return {"added": len(inserts), "duplicates": len(questions) - len(inserts)}
+
+    async def record_usage(self, bank_ids, lecture_id: str):
+        """Mark bank questions as used in a lecture's quiz"""
+        await self.collection.update_many(
+            {"_id": {"$in": list(bank_ids)}},
+            {"$addToSet": {"lectureIds": ObjectId(lecture_id)}, "$inc": {"timesUsed": 1}}
+        )
+
+    async def list_questions(self, course_code: str, limit: int = 100, skip: int = 0):
+        cursor = self.collection.find(
+            {"courseCode": course_code}, {"signature": 0}
+        ).sort("createdAt", -1).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def stats(self, course_code: str):
+        results = await self.collection.aggregate([
+            {"$match": {"courseCode": course_code}},
+            {"$group": {
+                "_id": None,
+                "questions": {"$sum": 1},
+                "duplicatesMerged": {"$sum": "$duplicateCount"},
+                "timesUsed": {"$sum": "$timesUsed"}
+            }}
+        ]).to_list(length=1)
+        stats = results[0] if results else {"questions": 0, "duplicatesMerged": 0, "timesUsed": 0}
+        stats.pop("_id", None)
+        return stats
+
+question_bank = QuestionBank()
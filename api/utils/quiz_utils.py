@@ -2,32 +2,139 @@
 Utility functions for the lecture notes API
 """
 import os
+import json
+import hashlib
 import logging
 import tempfile
-import requests
+import httpx
 from fastapi import HTTPException
+from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
+# Load environment variables
+load_dotenv()
+
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv("DOWNLOAD_CONNECT_TIMEOUT", "5"))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("DOWNLOAD_READ_TIMEOUT", "30"))
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+DOWNLOAD_MAX_CONNECTIONS = int(os.getenv("DOWNLOAD_MAX_CONNECTIONS", "20"))
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "quiz_transcripts"))
+TRANSCRIPT_CACHE_MAX_FILES = int(os.getenv("TRANSCRIPT_CACHE_MAX_FILES", "500"))
+
+_http_client = None
+
+def get_http_client():
+    """Return the shared, connection-pooled HTTP client"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(DOWNLOAD_READ_TIMEOUT, connect=DOWNLOAD_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=DOWNLOAD_MAX_CONNECTIONS,
+                max_keepalive_connections=DOWNLOAD_MAX_CONNECTIONS
+            ),
+            follow_redirects=True
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def _cache_paths(url, suffix):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    path = os.path.join(TRANSCRIPT_CACHE_DIR, f"{key}{suffix}")
+    return path, f"{path}.meta.json"
+
+def _load_validators(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _prune_cache():
+    """Remove the oldest cached downloads beyond TRANSCRIPT_CACHE_MAX_FILES"""
+    try:
+        entries = [
+            os.path.join(TRANSCRIPT_CACHE_DIR, name)
+            for name in os.listdir(TRANSCRIPT_CACHE_DIR)
+            if not name.endswith((".meta.json", ".part"))
+        ]
+        excess = len(entries) - TRANSCRIPT_CACHE_MAX_FILES
+        if excess <= 0:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:excess]:
+            for stale in (path, f"{path}.meta.json"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+    except OSError as e:
+        logger.warning(f"Failed to prune transcript cache: {e}")
+
 async def download_file(url, suffix):
     """
-    Download a file from a URL and save it to a temporary file
-    Returns the path to the temporary file
+    Download a file from a URL into the local transcript cache
+    Unchanged files (ETag/Last-Modified) are served from the cache without re-fetching
+    Returns the path to the cached file
     """
+    os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+    cache_path, meta_path = _cache_paths(url, suffix)
+    headers = {}
+    if os.path.exists(cache_path):
+        validators = _load_validators(meta_path)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("lastModified"):
+            headers["If-Modified-Since"] = validators["lastModified"]
+
     try:
         logger.info(f"Downloading file from {url}")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            for chunk in response.iter_content(chunk_size=8192):
-                temp_file.write(chunk)
-            temp_path = temp_file.name
-            logger.info(f"File saved at: {temp_path}")
-            return temp_path
-    except requests.RequestException as e:
+        async with get_http_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                logger.info(f"File not modified, using cached copy: {cache_path}")
+                os.utime(cache_path)
+                return cache_path
+            response.raise_for_status()
+
+            content_length = response.headers.get("Content-Length")
+            if content_length and int(content_length) > DOWNLOAD_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"File exceeds maximum size of {DOWNLOAD_MAX_BYTES} bytes")
+
+            received = 0
+            with tempfile.NamedTemporaryFile(delete=False, dir=TRANSCRIPT_CACHE_DIR, suffix=".part") as temp_file:
+                temp_path = temp_file.name
+                try:
+                    async for chunk in response.aiter_bytes(chunk_size=65536):
+                        received += len(chunk)
+                        if received > DOWNLOAD_MAX_BYTES:
+                            raise HTTPException(status_code=413, detail=f"File exceeds maximum size of {DOWNLOAD_MAX_BYTES} bytes")
+                        temp_file.write(chunk)
+                except BaseException:
+                    temp_file.close()
+                    os.remove(temp_path)
+                    raise
+
+            os.replace(temp_path, cache_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "lastModified": response.headers.get("Last-Modified")
+                }, f)
+            logger.info(f"File saved at: {cache_path}")
+
+        _prune_cache()
+        return cache_path
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
         logger.error(f"Error downloading file: {e}")
         raise HTTPException(status_code=400, detail=f"Failed to download file: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error downloading file: {e}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
@@ -0,0 +1,95 @@
+"""
+In-process TTL/LRU cache for hot lecture and quiz reads
+"""
+import os
+import copy
+import time
+import itertools
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "30"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000"))
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after `ttl` seconds
+    Values are copied on the way in and out so callers can mutate what they get back.
+    Each key has a generation that invalidate() bumps; a read takes it before querying and passes it
+    to set(), which drops the value if the key was invalidated while the read was in flight.
+    """
+
+    def __init__(self, maxsize: int = READ_CACHE_MAX_ENTRIES, ttl: float = READ_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generations = OrderedDict()
+        # Generation of keys not in `generations`; raised past every forgotten generation, never lowered
+        self.floor = 0
+        self.counter = itertools.count(1)
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, key):
+        """Token a read takes before querying the database, to pass to set()"""
+        return self.generations.get(key, self.floor)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key, value, generation=None):
+        if self.ttl <= 0:
+            return
+        if generation is not None and generation != self.generation(key):
+            # Invalidated after the read started, so the value may predate the write
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+        self.generations[key] = next(self.counter)
+        self.generations.move_to_end(key)
+        while len(self.generations) > self.maxsize:
+            _, forgotten = self.generations.popitem(last=False)
+            self.floor = max(self.floor, forgotten)
+
+    def clear(self):
+        self.entries.clear()
+        self.generations.clear()
+        self.floor = next(self.counter)
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+lecture_cache = TTLCache()
+status_cache = TTLCache()
+quiz_cache = TTLCache()
+
+def invalidate_lecture(lecture_id: str):
+    """Drop every cached read for a lecture after it changes"""
+    lecture_id = str(lecture_id)
+    lecture_cache.invalidate(lecture_id)
+    status_cache.invalidate(lecture_id)
+    quiz_cache.invalidate((lecture_id, False))
+    quiz_cache.invalidate((lecture_id, True))
+
+def cache_stats():
+    return {
+        "lectures": lecture_cache.stats(),
+        "status": status_cache.stats(),
+        "quiz": quiz_cache.stats()
+    }
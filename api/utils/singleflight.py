@@ -0,0 +1,43 @@
+"""
+In-process single-flight, so concurrent callers asking for the same work share one run of it
+"""
+import asyncio
+
+class Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+
+class SingleFlight:
+    """
+    Runs at most one task per key at a time; callers arriving while it runs await its result
+    A caller that is cancelled only stops waiting, the task is cancelled once nobody waits for it
+    """
+
+    def __init__(self):
+        self.flights = {}
+
+    def __contains__(self, key):
+        return key in self.flights
+
+    async def do(self, key, factory):
+        """Await factory() for `key`, or the task already running for it; returns (result, shared)"""
+        flight = self.flights.get(key)
+        shared = flight is not None and not flight.abandoned
+        if not shared:
+            flight = Flight(asyncio.create_task(factory()))
+            self.flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.abandoned = True
+                flight.task.cancel()
+
+    def _forget(self, key, flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
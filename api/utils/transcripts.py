@@ -0,0 +1,46 @@
+"""
+Cleaned transcripts stored once by content hash, referenced from quiz versions and checkpoints
+"""
+import hashlib
+import logging
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from ..config.database import Database
+
+logger = logging.getLogger(__name__)
+
+def transcript_hash(text: str):
+    """SHA-256 of a cleaned transcript, its key in the `transcripts` collection"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class TranscriptStore:
+    """
+    Cleaned transcripts in the `transcripts` collection, keyed by their SHA-256
+    Quiz versions and checkpoints keep only the hash, so revising a lecture does not copy its
+    transcript again and a version document stays small however long the lecture is
+    """
+
+    @property
+    def collection(self):
+        return Database.db.transcripts
+
+    async def save(self, text: str):
+        """Store a cleaned transcript unless an identical one is stored already, returns its hash"""
+        key = transcript_hash(text)
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$setOnInsert": {"text": text, "length": len(text), "createdAt": datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # A concurrent upsert stored the same transcript first
+            pass
+        return key
+
+    async def load(self, key: str):
+        """Return the transcript stored under a hash, None if there is none"""
+        document = await self.collection.find_one({"_id": key}, {"text": 1})
+        return document["text"] if document else None
+
+transcripts = TranscriptStore()
@@ -0,0 +1,178 @@
+"""
+Standalone worker that claims lecture processing jobs from the job queue
+
+Run with: python -m api.worker
+"""
+import os
+import socket
+import asyncio
+import logging
+from datetime import datetime
+from dotenv import load_dotenv
+
+from .config.database import Database
+from .controllers.quiz_controller import LectureController
+from .utils.executor import PipelineExecutor
+from .utils.init_db import ensure_indexes
+from .utils.job_queue import get_job_queue, local_jobs, JOB_PRIORITIES
+from .utils.quiz_utils import close_http_client
+from pipeline import awarm_up
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+# Slots bulk jobs may not take, so interactive work is picked up while a backfill saturates the worker
+WORKER_RESERVED_SLOTS = int(os.getenv("WORKER_RESERVED_SLOTS", "1"))
+
+class Worker:
+    """
+    Claims jobs, runs process_lecture for each one, heartbeats, requeues stale jobs and
+    resumes lectures whose run died from their last checkpoint
+    Jobs are claimed by priority; bulk jobs never take the last WORKER_RESERVED_SLOTS slots.
+    Running jobs are cancelled on request (seen on heartbeat) and stopped at their deadline.
+    """
+
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY, reserved_slots: int = WORKER_RESERVED_SLOTS):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.queue = get_job_queue()
+        self.slots = asyncio.Semaphore(concurrency)
+        self.bulk_limit = max(1, concurrency - reserved_slots)
+        self.bulk_running = 0
+        self.tasks = set()
+        self.stopping = False
+
+    async def _heartbeat(self, job_id, work):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                if await self.queue.heartbeat(job_id, self.worker_id):
+                    logger.info(f"Cancelling job {job_id} on request")
+                    work.cancel()
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job {job_id}: {e}")
+
+    async def _run_job(self, job):
+        job_id = job["_id"]
+        lecture_id = str(job["lectureId"])
+        priority = job.get("priority", JOB_PRIORITIES["normal"])
+        bulk = priority >= JOB_PRIORITIES["bulk"]
+        timeout = None
+        if job.get("deadline"):
+            timeout = (job["deadline"] - datetime.utcnow()).total_seconds()
+        work = asyncio.create_task(LectureController.process_lecture(
+            lecture_id, priority=priority, timeout=timeout, job_id=job_id, resume=job.get("resume", False)
+        ))
+        local_jobs[job_id] = (lecture_id, work)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, work))
+        try:
+            logger.info(f"Worker {self.worker_id} processing job {job_id} for lecture {lecture_id}")
+            # The pipeline stops itself at the deadline; the grace period only catches work that does not check it
+            result = await asyncio.wait_for(work, None if timeout is None else max(timeout, 0) + JOB_HEARTBEAT_INTERVAL)
+            if result:
+                await self.queue.complete(job_id, self.worker_id)
+            else:
+                await self.queue.fail(job_id, self.worker_id, "Lecture processing failed")
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # The worker itself is being torn down; leave the job for requeue_stale
+                raise
+            logger.info(f"Job {job_id} for lecture {lecture_id} cancelled")
+            await LectureController.update_status(lecture_id, "cancelled", error="Cancelled on request")
+            await self.queue.finish_cancelled(job_id, self.worker_id, "Cancelled on request")
+        except asyncio.TimeoutError:
+            logger.error(f"Job {job_id} passed its deadline")
+            await LectureController.update_status(lecture_id, "failed", error="Job deadline exceeded")
+            await self.queue.fail(job_id, self.worker_id, "Job deadline exceeded")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self.queue.fail(job_id, self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
+            local_jobs.pop(job_id, None)
+            if bulk:
+                self.bulk_running -= 1
+            self.slots.release()
+
+    async def _requeue_loop(self):
+        while not self.stopping:
+            try:
+                requeued, cancelled = await self.queue.requeue_stale(JOB_STALE_SECONDS)
+                if requeued:
+                    logger.info(f"Requeued {requeued} stale jobs")
+                # Nobody is left to finish these cancellations, and a lecture left active would be resumed by the sweeper
+                for lecture_id in cancelled:
+                    await LectureController.update_status(lecture_id, "cancelled", error="Cancelled on request")
+            except Exception as e:
+                logger.warning(f"Failed to requeue stale jobs: {e}")
+            try:
+                resumed = await LectureController.resume_stuck_lectures(JOB_STALE_SECONDS)
+                if resumed:
+                    logger.info(f"Resuming {resumed} interrupted lectures")
+            except Exception as e:
+                logger.warning(f"Failed to resume interrupted lectures: {e}")
+            await asyncio.sleep(JOB_STALE_SECONDS / 2)
+
+    async def run(self):
+        """Claim and run jobs until stop() is called"""
+        logger.info(f"Worker {self.worker_id} started")
+        requeue = asyncio.create_task(self._requeue_loop())
+        try:
+            while not self.stopping:
+                await self.slots.acquire()
+                if self.stopping:
+                    # stop() was called while waiting for a slot
+                    self.slots.release()
+                    break
+                # With the bulk share in use, only more urgent jobs may take the reserved slots
+                max_priority = JOB_PRIORITIES["bulk"] - 1 if self.bulk_running >= self.bulk_limit else None
+                try:
+                    job = await self.queue.claim(self.worker_id, max_priority)
+                except Exception as e:
+                    logger.error(f"Failed to claim job: {e}")
+                    job = None
+                if job is None:
+                    self.slots.release()
+                    await asyncio.sleep(WORKER_POLL_INTERVAL)
+                    continue
+                if job.get("priority", JOB_PRIORITIES["normal"]) >= JOB_PRIORITIES["bulk"]:
+                    self.bulk_running += 1
+                task = asyncio.create_task(self._run_job(job))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        finally:
+            requeue.cancel()
+
+    async def stop(self):
+        """Stop claiming jobs and wait for in-flight jobs to finish"""
+        self.stopping = True
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        logger.info(f"Worker {self.worker_id} stopped")
+
+async def main():
+    await Database.connect_to_mongodb()
+    await ensure_indexes(Database.db)
+    await awarm_up()
+    PipelineExecutor.start()
+    worker = Worker()
+    try:
+        await worker.run()
+    finally:
+        await worker.stop()
+        PipelineExecutor.shutdown()
+        await close_http_client()
+        await Database.close_mongodb_connection()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    logging.getLogger("litellm").disabled = True
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
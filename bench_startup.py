@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the API
+Imports a module in fresh interpreters and reports the median wall time, the slowest
+imports and any heavy modules that were pulled in eagerly.
+
+    python bench_startup.py                       # time `import api.main`
+    python bench_startup.py --max-seconds 1.5     # fail when the median regresses past a budget
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ("litellm", "tiktoken", "numpy")
+
+
+def time_import(module, env):
+    """Wall time of a fresh interpreter importing `module`"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], env=env, check=True)
+    return time.perf_counter() - started
+
+
+def import_profile(module, env):
+    """Cumulative import time per module (seconds) from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, check=True, capture_output=True, text=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            profile[match.group(3)] = int(match.group(1)) / 1_000_000
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import (cold start) time")
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("--max-seconds", type=float, help="Exit non-zero if the median exceeds this")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("MONGODB_URI", "mongodb://localhost:27017/quiz_generator")
+    env.setdefault("OPENAI_MODEL", "gpt-4o-mini")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(cwd)
+
+    # First run warms the bytecode cache and is not counted
+    time_import(args.module, env)
+    timings = [time_import(args.module, env) for _ in range(args.runs)]
+    profile = import_profile(args.module, env)
+
+    median = statistics.median(timings)
+    print(f"import {args.module}: median {median * 1000:.0f} ms, min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms over {args.runs} runs")
+    print(f"\nSlowest imports (cumulative):")
+    for name, seconds in sorted(profile.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {seconds * 1000:>8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in profile]
+    failed = False
+    if eager:
+        print(f"\n❌ Heavy modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"\n❌ Median startup {median:.2f}s exceeds budget of {args.max_seconds:.2f}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Token-based transcript chunking and merging of per-chunk quiz candidates
+"""
+import re
+
+_encoders = {}
+
+
+class ApproximateEncoder:
+    """Roughly four characters per token; used when tiktoken cannot load its vocabulary (e.g. offline)"""
+
+    def encode(self, text, disallowed_special=()):
+        return range((len(text) + 3) // 4)
+
+
+def get_encoder(model_name=None):
+    """Return a cached tiktoken encoder for the model, falling back to cl100k_base"""
+    key = model_name or ""
+    if key not in _encoders:
+        import tiktoken
+        try:
+            _encoders[key] = tiktoken.encoding_for_model(model_name)
+        except Exception:
+            try:
+                _encoders[key] = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"Could not load a tiktoken encoding, approximating token counts: {e}")
+                _encoders[key] = ApproximateEncoder()
+    return _encoders[key]
+
+
+def count_tokens(text, model_name=None):
+    return len(get_encoder(model_name).encode(text, disallowed_special=()))
+
+
+def split_transcript(transcript, max_tokens, model_name=None):
+    """
+    Split a cleaned transcript into chunks of at most max_tokens tokens.
+    Chunks only break between lines, so each caption cue (and its timestamp)
+    stays in one chunk. transcript is the cleaned text or an iterable of its lines,
+    such as a stream of rendered cues, which is consumed without joining it first.
+    """
+    encoder = get_encoder(model_name)
+    chunks = []
+    current = []
+    current_tokens = 0
+    lines = transcript.split("\n") if isinstance(transcript, str) else transcript
+    for line in lines:
+        line_tokens = len(encoder.encode(line, disallowed_special=())) + 1
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _normalize(text):
+    return set(re.sub(r"[^a-z0-9 ]", " ", text.lower()).split())
+
+
+def _is_duplicate(words, seen, threshold):
+    for other in seen:
+        union = words | other
+        if union and len(words & other) / len(union) >= threshold:
+            return True
+    return False
+
+
+def merge_questions(candidate_lists, total, threshold=0.8, keep=()):
+    """
+    Merge per-chunk question lists into a single list of `total` questions.
+    Near-duplicate questions (word-set Jaccard >= threshold) are dropped, and
+    questions are taken round-robin across chunks so the quiz covers the whole lecture.
+    Questions in `keep` are always selected first; candidates are deduplicated against them.
+    """
+    selected = list(keep)
+    seen = [_normalize(question.get("question", "")) for question in selected]
+    queues = [list(questions) for questions in candidate_lists]
+    while len(selected) < total and any(queues):
+        for queue in queues:
+            if not queue or len(selected) >= total:
+                continue
+            question = queue.pop(0)
+            words = _normalize(question.get("question", ""))
+            if _is_duplicate(words, seen, threshold):
+                continue
+            seen.append(words)
+            selected.append(question)
+    selected.sort(key=lambda question: question.get("time_stamp") or "")
+    return selected
+
+
+def merge_by_level(level_lists, quotas, threshold=0.8):
+    """
+    Merge per-level question lists into one quiz with at most quotas[level] questions per level.
+    Near-duplicates are dropped across levels; quota left over by a failed or short level is
+    filled round-robin from the other levels' surplus, so the quiz still has sum(quotas) questions.
+    """
+    selected = []
+    seen = []
+    surplus = []
+    for level, quota in quotas.items():
+        taken = 0
+        leftovers = []
+        for question in level_lists.get(level, []):
+            words = _normalize(question.get("question", ""))
+            if _is_duplicate(words, seen, threshold):
+                continue
+            if taken < quota:
+                seen.append(words)
+                selected.append(question)
+                taken += 1
+            else:
+                leftovers.append(question)
+        surplus.append(leftovers)
+    return merge_questions(surplus, sum(quotas.values()), threshold, keep=selected)
@@ -0,0 +1,35 @@
+"""
+Per-job deadlines visible to everything a pipeline run calls, so LLM retries stop once a job is out of time
+"""
+import time
+import contextvars
+
+_current_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def start_deadline(seconds):
+    """Give the current run `seconds` to finish (None for no deadline); returns a token for end_deadline"""
+    return _current_deadline.set(time.monotonic() + seconds if seconds is not None else None)
+
+
+def end_deadline(token):
+    _current_deadline.reset(token)
+
+
+def time_remaining():
+    """Seconds left before the current run's deadline, None without one"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(step_name="Pipeline"):
+    """Raise DeadlineExceeded if the current run's deadline has passed"""
+    remaining = time_remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"{step_name}: job deadline exceeded")
@@ -0,0 +1,206 @@
+"""
+Content-addressed cache for LLM quiz generations
+"""
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SQLiteCacheBackend:
+    """Local on-disk cache backend"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self.conn.commit()
+
+    def get(self, key, ttl):
+        with self.lock:
+            row = self.conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            now = time.time()
+            if ttl and now - created_at > ttl:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return json.loads(value)
+
+    def set(self, key, value, ttl, max_entries):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            if max_entries:
+                # Evict the least recently used entries beyond the size limit
+                self.conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,)
+                )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_cache")
+            self.conn.commit()
+
+    def size(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class MongoCacheBackend:
+    """Cache backend stored in a MongoDB collection, shared across API nodes"""
+
+    def __init__(self, mongodb_uri, collection_name="llm_cache"):
+        import pymongo
+        from urllib.parse import urlparse
+
+        self.client = pymongo.MongoClient(mongodb_uri)
+        db_name = urlparse(mongodb_uri).path.strip('/') or "quiz_generator"
+        self.collection = self.client[db_name][collection_name]
+        # Expired entries are removed by MongoDB's TTL monitor
+        self.collection.create_index("expiresAt", expireAfterSeconds=0)
+        self.collection.create_index("accessedAt")
+
+    def get(self, key, ttl):
+        now = time.time()
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$set": {"accessedAt": now}},
+            projection={"value": 1, "createdAt": 1}
+        )
+        if doc is None:
+            return None
+        if ttl and now - doc["createdAt"] > ttl:
+            return None
+        return doc["value"]
+
+    def set(self, key, value, ttl, max_entries):
+        now = time.time()
+        update = {"value": value, "createdAt": now, "accessedAt": now}
+        if ttl:
+            update["expiresAt"] = datetime.utcnow() + timedelta(seconds=ttl)
+        self.collection.update_one({"_id": key}, {"$set": update}, upsert=True)
+        if max_entries:
+            excess = self.collection.estimated_document_count() - max_entries
+            if excess > 0:
+                stale = self.collection.find({}, {"_id": 1}).sort("accessedAt", 1).limit(excess)
+                self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+    def clear(self):
+        self.collection.delete_many({})
+
+    def size(self):
+        return self.collection.estimated_document_count()
+
+
+class LLMCache:
+    """
+    Caches parsed generations keyed on a hash of the transcript, prompt, model and temperature.
+    Hit/miss counters are kept per process.
+    """
+
+    def __init__(self, backend, ttl=None, max_entries=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(transcript, prompt, model, temperature):
+        digest = hashlib.sha256()
+        for part in (transcript, prompt, model or "", repr(temperature)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key, self.ttl)
+        except Exception as e:
+            print(f"Error reading LLM cache: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value, self.ttl, self.max_entries)
+        except Exception as e:
+            print(f"Error writing LLM cache: {e}")
+
+    async def aget(self, key):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key, value):
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Build the process-wide cache from the environment
+    LLM_CACHE_BACKEND is "sqlite" (default), "mongo" or "none"
+    """
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            kind = os.getenv("LLM_CACHE_BACKEND", "sqlite").lower()
+            ttl = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))) or None
+            max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")) or None
+            if kind == "sqlite":
+                backend = SQLiteCacheBackend(os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3"))
+            elif kind == "mongo":
+                backend = MongoCacheBackend(os.getenv("MONGODB_URI"))
+            elif kind == "none":
+                backend = None
+            else:
+                raise ValueError(f"Unsupported LLM_CACHE_BACKEND: {kind}")
+            _cache = LLMCache(backend, ttl=ttl, max_entries=max_entries)
+    return _cache
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the Quiz Generator API
+Drives N lectures concurrently through create -> process -> status -> quiz
+and reports throughput and p50/p95/p99 latencies per step.
+
+Run the API with LLM_BACKEND=mock (and LLM_CACHE_BACKEND=none, QUESTION_BANK_ENABLED=false)
+to benchmark without an OpenAI key, e.g.:
+    LLM_BACKEND=mock LLM_CACHE_BACKEND=none QUESTION_BANK_ENABLED=false uvicorn api.main:app --port 3000
+    python load_test.py --lectures 200 --concurrency 50 --serve
+"""
+
+import os
+import sys
+import math
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from functools import partial
+from collections import defaultdict
+from http.server import ThreadingHTTPServer
+import httpx
+from serve_test_file import MyHTTPRequestHandler, PORT
+
+BASE_URL = "http://localhost:3000"
+TRANSCRIPT_URL = f"http://localhost:{PORT}/test_transcript.txt"
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_transcript_server(port=PORT):
+    """Serve the repository directory (and test_transcript.txt) from a background thread"""
+    handler = partial(MyHTTPRequestHandler, directory=os.path.dirname(os.path.abspath(__file__)))
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f" Serving test transcript at http://localhost:{port}/test_transcript.txt")
+    return server
+
+
+class LoadTester:
+    def __init__(self, base_url, transcript_url, poll_interval=0.5, timeout=600):
+        self.api_base = f"{base_url}/api"
+        self.transcript_url = transcript_url
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.timings = defaultdict(list)
+        self.outcomes = defaultdict(int)
+
+    async def timed(self, step, request):
+        started = time.perf_counter()
+        response = await request
+        self.timings[step].append(time.perf_counter() - started)
+        response.raise_for_status()
+        return response.json()
+
+    async def run_lecture(self, client, index):
+        """Push one lecture through the whole flow and record its outcome"""
+        started = time.perf_counter()
+        # A unique URL and course per lecture keep the download cache, duplicate check and question bank out of the way
+        lecture = {
+            "courseCode": f"LOAD_{self.run_id}_{index}",
+            "year": 2027,
+            "quarter": "Load",
+            "videoId": f"load_{self.run_id}_{index}",
+            "videoUrl": f"https://example.com/load_{self.run_id}_{index}.mp4",
+            "transcriptUrl": f"{self.transcript_url}?run={self.run_id}&lecture={index}"
+        }
+        try:
+            created = await self.timed("create", client.post(f"{self.api_base}/lectures", json=lecture))
+            lecture_id = created["id"]
+            await self.timed("process", client.post(f"{self.api_base}/lectures/{lecture_id}/process"))
+
+            status = None
+            while status not in TERMINAL_STATUSES:
+                if time.perf_counter() - started > self.timeout:
+                    self.outcomes["timeout"] += 1
+                    return
+                await asyncio.sleep(self.poll_interval)
+                result = await self.timed("status", client.get(f"{self.api_base}/lectures/{lecture_id}/status"))
+                status = result["status"]
+            if status != "completed":
+                self.outcomes[status] += 1
+                return
+
+            await self.timed("quiz", client.get(f"{self.api_base}/lectures/{lecture_id}/quiz"))
+            self.timings["end_to_end"].append(time.perf_counter() - started)
+            self.outcomes["completed"] += 1
+        except Exception as e:
+            self.outcomes["error"] += 1
+            print(f"❌ Lecture {index} failed: {e}")
+
+    async def run(self, lectures, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+
+        async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+            async def bounded(index):
+                async with semaphore:
+                    await self.run_lecture(client, index)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(bounded(index) for index in range(lectures)))
+            return time.perf_counter() - started
+
+    def print_report(self, lectures, concurrency, elapsed):
+        print(f"\n{'='*60}")
+        print(f"📊 LOAD TEST: {lectures} lectures, concurrency {concurrency}")
+        print(f"{'='*60}")
+        print(f"Wall time: {elapsed:.2f}s")
+        print(f"Throughput: {self.outcomes['completed'] / elapsed:.2f} lectures/s")
+        print("Outcomes: " + ", ".join(f"{name}={count}" for name, count in sorted(self.outcomes.items())))
+        print(f"\n{'step':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for step in ("create", "process", "status", "quiz", "end_to_end"):
+            values = self.timings.get(step, [])
+            if not values:
+                continue
+            print(
+                f"{step:<12}{len(values):>8}"
+                f"{percentile(values, 0.50) * 1000:>10.1f}"
+                f"{percentile(values, 0.95) * 1000:>10.1f}"
+                f"{percentile(values, 0.99) * 1000:>10.1f}"
+                f"{max(values) * 1000:>10.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test for the Quiz Generator API")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--transcript-url", default=TRANSCRIPT_URL)
+    parser.add_argument("--lectures", type=int, default=50, help="Number of lectures to push through")
+    parser.add_argument("--concurrency", type=int, default=10, help="Lectures in flight at once")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between status polls")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-lecture timeout in seconds")
+    parser.add_argument("--serve", action="store_true", help="Serve test_transcript.txt from this process")
+    args = parser.parse_args()
+
+    try:
+        httpx.get(f"{args.base_url}/health", timeout=5).raise_for_status()
+    except Exception:
+        print(f"❌ API server is not responding at {args.base_url}")
+        print("Start it with: LLM_BACKEND=mock uvicorn api.main:app --port 3000 --host 0.0.0.0")
+        sys.exit(1)
+
+    server = start_transcript_server() if args.serve else None
+    tester = LoadTester(args.base_url, args.transcript_url, args.poll_interval, args.timeout)
+    try:
+        elapsed = asyncio.run(tester.run(args.lectures, args.concurrency))
+    finally:
+        if server is not None:
+            server.shutdown()
+    tester.print_report(args.lectures, args.concurrency, elapsed)
+    sys.exit(0 if tester.outcomes["completed"] == args.lectures else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Lightweight Prometheus-style instrumentation: counters, gauges and histograms
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, description, labels=()):
+        super().__init__(name, description, labels)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def collect(self):
+        with self.lock:
+            values = dict(self.values)
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, description, labels=()):
+        super().__init__(name, description, labels)
+        self.values = {}
+        self.function = None
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from a callable at scrape time"""
+        self.function = function
+
+    def collect(self):
+        if self.function is not None:
+            self.set(self.function())
+        with self.lock:
+            values = dict(self.values)
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self):
+        with self.lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self.series.items()}
+        lines = self.header()
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+))
+pipeline_stage_duration = registry.register(Histogram(
+    "pipeline_stage_duration_seconds", "Duration of quiz pipeline stages", ("stage",)
+))
+llm_requests = registry.register(Counter(
+    "llm_requests_total", "LLM completion attempts by outcome", ("outcome",)
+))
+llm_retries = registry.register(Counter(
+    "llm_retries_total", "LLM calls retried after a rate limit"
+))
+llm_rate_limited = registry.register(Counter(
+    "llm_rate_limited_total", "LLM calls rejected with a rate limit (429)"
+))
+llm_rate_limiter_wait = registry.register(Histogram(
+    "llm_rate_limiter_wait_seconds", "Time LLM calls were held back by the client-side rate limiter"
+))
+llm_prompt_tokens = registry.register(Counter(
+    "llm_prompt_tokens_total", "LLM prompt tokens by provider prompt cache outcome (hit, miss)", ("cache",)
+))
+quiz_responses = registry.register(Counter(
+    "quiz_responses_total", "Quiz LLM responses by parse outcome (valid, salvaged, failed)", ("outcome",)
+))
+pipeline_resumed = registry.register(Counter(
+    "pipeline_resumed_total", "Lecture runs resumed from a checkpoint, by last completed stage", ("stage",)
+))
+pipeline_coalesced = registry.register(Counter(
+    "pipeline_coalesced_total", "Requests that joined work already in flight instead of starting it, by scope", ("scope",)
+))
+job_queue_jobs = registry.register(Gauge(
+    "job_queue_jobs", "Lecture processing jobs queued or running across all workers, by priority class",
+    ("status", "priority")
+))
+pipeline_queue_depth = registry.register(Gauge(
+    "pipeline_queue_depth", "Pipeline runs in this process waiting for an executor slot"
+))
+pipeline_in_flight = registry.register(Gauge(
+    "pipeline_in_flight", "Pipeline runs currently executing"
+))
@@ -0,0 +1,199 @@
+"""
+Offline stand-in for litellm completions, used for benchmarks and load tests
+Enabled with LLM_BACKEND=mock; returns schema-valid Quiz JSON after a configurable delay
+"""
+import os
+import re
+import time
+import random
+import hashlib
+import asyncio
+import threading
+from dotenv import load_dotenv
+from models import Quiz
+from chunking import count_tokens
+
+load_dotenv()
+
+BLOOM_LEVELS = ("Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create")
+
+
+class MockRateLimitError(Exception):
+    pass
+
+
+class MockLLMError(Exception):
+    pass
+
+
+class MockMessage(dict):
+    """Message that supports both message["content"] and message.content, like litellm's"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class MockChoice:
+    def __init__(self, content):
+        self.index = 0
+        self.finish_reason = "stop"
+        self.message = MockMessage(role="assistant", content=content)
+
+
+class MockPromptTokensDetails:
+    def __init__(self, cached_tokens):
+        self.cached_tokens = cached_tokens
+
+
+class MockUsage:
+    def __init__(self, prompt_tokens, completion_tokens, cached_tokens=0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = prompt_tokens + completion_tokens
+        self.prompt_tokens_details = MockPromptTokensDetails(cached_tokens)
+
+
+class MockResponse:
+    def __init__(self, model, content, prompt_tokens, completion_tokens, cached_tokens=0):
+        self.model = model
+        self.choices = [MockChoice(content)]
+        self.usage = MockUsage(prompt_tokens, completion_tokens, cached_tokens)
+
+
+class MockLLM:
+    """
+    Implements completion/acompletion with litellm's call signature.
+    Prompt caching is simulated like OpenAI's: a prefix of whole messages seen before is reported as
+    cached when it is at least 1024 tokens, rounded down to a multiple of 128.
+    Latency is `latency` seconds +/- `jitter` (a fraction); each call fails with a
+    429 with probability `rate_limit_rate` and with a server error with probability `error_rate`.
+    With probability `truncate_rate` the content is cut off mid-way, as when a model hits max_tokens.
+    """
+
+    def __init__(self, latency=1.0, jitter=0.2, error_rate=0.0, rate_limit_rate=0.0, retry_after=1, seed=None,
+                 truncate_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.truncate_rate = truncate_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.prefixes = set()
+
+    def _draw(self):
+        """Pick the delay and outcome of one call"""
+        with self.lock:
+            self.calls += 1
+            delay = max(0.0, self.latency * (1 + self.jitter * (2 * self.random.random() - 1)))
+            roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return delay, MockRateLimitError(
+                f"429 Too Many Requests (mock): rate limit reached, retry-after: {self.retry_after}"
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, MockLLMError("500 Internal Server Error (mock)")
+        return delay, None
+
+    def _cached_tokens(self, model, messages):
+        """Tokens in the longest message prefix an earlier call already sent"""
+        cached = 0
+        tokens = 0
+        digest = hashlib.sha256()
+        with self.lock:
+            for message in messages:
+                tokens += count_tokens(message["content"], model)
+                digest.update(f"{message['role']}\0{message['content']}\0".encode("utf-8"))
+                prefix = digest.copy().hexdigest()
+                if prefix in self.prefixes:
+                    cached = tokens
+                else:
+                    self.prefixes.add(prefix)
+        return cached // 128 * 128 if cached >= 1024 else 0
+
+    def _respond(self, model, messages):
+        prompt = "\n".join(message["content"] for message in messages)
+        match = re.search(r"list of (\d+) questions", prompt)
+        num_questions = int(match.group(1)) if match else 10
+        match = re.search(r'target the "(\w+)" level', prompt)
+        level = match.group(1) if match else None
+        # The transcript is the longest user message; it is followed by the short task message
+        transcript = max((message["content"] for message in messages if message["role"] == "user"), key=len)
+        lines = [line for line in transcript.split("\n") if line.strip()] or [""]
+        # Single-level requests start at different lines so fanned-out levels quote different parts
+        offset = BLOOM_LEVELS.index(level) * len(lines) // (len(BLOOM_LEVELS) * num_questions) if level in BLOOM_LEVELS else 0
+
+        questions = []
+        for index in range(num_questions):
+            line = lines[(index * len(lines) // num_questions + offset) % len(lines)]
+            match = re.match(r"\[(\d{2}:\d{2}:\d{2})\]\s*(.*)", line)
+            time_stamp, text = match.groups() if match else ("00:00:00", line)
+            topic = " ".join(text.split()[:8])
+            questions.append({
+                "question": f"What does the lecture say at {time_stamp} about \"{topic}\"?",
+                "options": [f"Option {letter}" for letter in "ABCD"],
+                "correct_option": ["Option A"],
+                "correct_option_index": [0],
+                "explanation": "Generated by the mock LLM backend.",
+                "bloom_level": level or BLOOM_LEVELS[index % len(BLOOM_LEVELS)],
+                "time_stamp": time_stamp
+            })
+        content = Quiz.model_validate({"questions": questions}).model_dump_json()
+        with self.lock:
+            truncate = self.random.random() < self.truncate_rate
+        if truncate:
+            content = content[:len(content) * 2 // 3]
+        return MockResponse(
+            model, content, count_tokens(prompt, model), count_tokens(content, model), self._cached_tokens(model, messages)
+        )
+
+    def completion(self, model, messages, **kwargs):
+        delay, error = self._draw()
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return self._respond(model, messages)
+
+    async def acompletion(self, model, messages, **kwargs):
+        delay, error = self._draw()
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return self._respond(model, messages)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "latency": self.latency,
+            "errorRate": self.error_rate,
+            "rateLimitRate": self.rate_limit_rate,
+            "truncateRate": self.truncate_rate
+        }
+
+
+_mock = None
+_mock_lock = threading.Lock()
+
+
+def get_mock_llm():
+    """Return the process-wide mock configured by the MOCK_LLM_* environment variables"""
+    global _mock
+    if _mock is None:
+        with _mock_lock:
+            if _mock is None:
+                seed = os.getenv("MOCK_LLM_SEED")
+                _mock = MockLLM(
+                    latency=float(os.getenv("MOCK_LLM_LATENCY", "1.0")),
+                    jitter=float(os.getenv("MOCK_LLM_LATENCY_JITTER", "0.2")),
+                    error_rate=float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+                    rate_limit_rate=float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0")),
+                    retry_after=int(os.getenv("MOCK_LLM_RETRY_AFTER", "1")),
+                    seed=int(seed) if seed else None,
+                    truncate_rate=float(os.getenv("MOCK_LLM_TRUNCATE_RATE", "0"))
+                )
+    return _mock
@@ -0,0 +1,153 @@
+"""
+Quiz generation pipeline
+Importing the package is cheap: litellm is loaded on the first LLM call and nothing exits on missing settings
+"""
+from .config import (
+    LLM_BACKEND,
+    MODEL_NAME,
+    TEMPERATURE,
+    QUIZ_SIZE,
+    TRANSCRIPT_TIMESTAMPS,
+    TRANSCRIPT_CUE_WINDOW,
+    CHUNK_MAX_TOKENS,
+    CHUNK_MAX_CONCURRENCY,
+    LLM_EXPECTED_OUTPUT_TOKENS,
+    PROMPT_VERSIONS,
+    QUIZ_MAX_FOLLOWUPS,
+    QUIZ_FANOUT,
+    QUIZ_FANOUT_LEVELS,
+    QUIZ_FANOUT_MODELS,
+    QUIZ_FANOUT_OVERSAMPLE,
+    REVISION_CONTEXT_LINES,
+    REVISION_MAX_CHANGED_RATIO,
+    QUESTION_BANK_MATCH_THRESHOLD,
+    ConfigurationError,
+    validate_config
+)
+from .llm import (
+    cached_prompt_tokens,
+    log_token_usage,
+    get_llm_backend,
+    warm_up,
+    awarm_up,
+    is_rate_limit_error,
+    parse_retry_after,
+    retry_after_from_headers,
+    error_retry_after,
+    get_retry_delay,
+    estimate_request_tokens,
+    call_llm_with_retry,
+    acall_llm_with_retry
+)
+from .prompts import (
+    PromptTemplate,
+    PromptRegistry,
+    prompt_registry,
+    QUIZ_PROMPT,
+    BLOOM_LEVELS,
+    build_task,
+    build_prompt,
+    build_messages,
+    build_followup_messages
+)
+from .parsing import QuizParseError, salvage_questions, parse_quiz_text, parse_quiz_response
+from .generation import (
+    timestamp_to_seconds,
+    complete_questions,
+    acomplete_questions,
+    generate_questions,
+    agenerate_questions,
+    agenerate_questions_chunked,
+    level_quotas,
+    agenerate_questions_fanout,
+    agenerate_chunks,
+    agenerate_quiz,
+    agenerate_quiz_from_chunks
+)
+from .revision import diff_transcripts, arevise_questions
+from .bank import assemble_from_bank
+from .runner import (
+    save_to_json,
+    iter_transcript_lines,
+    load_and_clean_transcript,
+    print_token_usage_summary,
+    arun_pipeline,
+    aclean_transcript,
+    achunk_transcript,
+    agenerate_version,
+    arun_versioned_pipeline,
+    run_pipeline
+)
+
+__all__ = [
+    "LLM_BACKEND",
+    "MODEL_NAME",
+    "TEMPERATURE",
+    "QUIZ_SIZE",
+    "TRANSCRIPT_TIMESTAMPS",
+    "TRANSCRIPT_CUE_WINDOW",
+    "CHUNK_MAX_TOKENS",
+    "CHUNK_MAX_CONCURRENCY",
+    "LLM_EXPECTED_OUTPUT_TOKENS",
+    "PROMPT_VERSIONS",
+    "QUIZ_MAX_FOLLOWUPS",
+    "QUIZ_FANOUT",
+    "QUIZ_FANOUT_LEVELS",
+    "QUIZ_FANOUT_MODELS",
+    "QUIZ_FANOUT_OVERSAMPLE",
+    "REVISION_CONTEXT_LINES",
+    "REVISION_MAX_CHANGED_RATIO",
+    "QUESTION_BANK_MATCH_THRESHOLD",
+    "ConfigurationError",
+    "validate_config",
+    "cached_prompt_tokens",
+    "log_token_usage",
+    "get_llm_backend",
+    "warm_up",
+    "awarm_up",
+    "is_rate_limit_error",
+    "parse_retry_after",
+    "retry_after_from_headers",
+    "error_retry_after",
+    "get_retry_delay",
+    "estimate_request_tokens",
+    "call_llm_with_retry",
+    "acall_llm_with_retry",
+    "PromptTemplate",
+    "PromptRegistry",
+    "prompt_registry",
+    "QUIZ_PROMPT",
+    "BLOOM_LEVELS",
+    "build_task",
+    "build_prompt",
+    "build_messages",
+    "build_followup_messages",
+    "QuizParseError",
+    "salvage_questions",
+    "parse_quiz_text",
+    "parse_quiz_response",
+    "timestamp_to_seconds",
+    "complete_questions",
+    "acomplete_questions",
+    "generate_questions",
+    "agenerate_questions",
+    "agenerate_questions_chunked",
+    "level_quotas",
+    "agenerate_questions_fanout",
+    "agenerate_chunks",
+    "agenerate_quiz",
+    "agenerate_quiz_from_chunks",
+    "diff_transcripts",
+    "arevise_questions",
+    "assemble_from_bank",
+    "save_to_json",
+    "iter_transcript_lines",
+    "load_and_clean_transcript",
+    "print_token_usage_summary",
+    "arun_pipeline",
+    "aclean_transcript",
+    "achunk_transcript",
+    "agenerate_version",
+    "arun_versioned_pipeline",
+    "run_pipeline"
+]
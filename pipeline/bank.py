@@ -0,0 +1,50 @@
+"""
+Quiz assembly from a course question bank, without LLM calls
+A bank question covers a transcript when most of the keywords of its stem and answer
+appear around one time-stamped transcript line; that line also gives the question its new time stamp.
+"""
+from similarity import LineMatcher, question_text
+from .config import QUIZ_SIZE, QUESTION_BANK_MATCH_THRESHOLD
+from .revision import LINE_TIMESTAMP
+
+
+def assemble_from_bank(clean_transcript, candidates, threshold=QUESTION_BANK_MATCH_THRESHOLD):
+    """
+    Pick QUIZ_SIZE bank questions answered at distinct lines of the transcript.
+    candidates are bank documents ({"_id", "question"}); returns (questions, bank IDs),
+    or None when the bank does not cover enough of the transcript.
+    """
+    lines = [line for line in clean_transcript.split("\n") if line]
+    if not candidates or not lines:
+        return None
+
+    matcher = LineMatcher(lines)
+    matches = []
+    for candidate in candidates:
+        question = candidate["question"]
+        index, score = matcher.best_line(question_text(question))
+        if index is None or score < threshold:
+            continue
+        # The bank copy's time stamp belongs to another lecture, so only a line with its own can re-anchor it
+        timestamp = LINE_TIMESTAMP.match(lines[index])
+        if timestamp:
+            matches.append((score, index, timestamp.group(1), candidate))
+    if len(matches) < QUIZ_SIZE:
+        return None
+
+    selected = []
+    used_lines = set()
+    for score, index, timestamp, candidate in sorted(matches, key=lambda match: match[0], reverse=True):
+        if index in used_lines:
+            continue
+        used_lines.add(index)
+        question = dict(candidate["question"], time_stamp=timestamp)
+        selected.append((question, candidate["_id"]))
+        if len(selected) == QUIZ_SIZE:
+            break
+    if len(selected) < QUIZ_SIZE:
+        return None
+
+    selected.sort(key=lambda item: item[0]["time_stamp"])
+    print(f"Assembled quiz from the question bank ({len(matches)} of {len(candidates)} bank questions match)")
+    return [question for question, _ in selected], [bank_id for _, bank_id in selected]
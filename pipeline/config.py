@@ -0,0 +1,56 @@
+"""
+Pipeline settings read from the environment
+Importing this module has no side effects beyond loading .env; validate_config() reports missing settings
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def parse_mapping(value, cast=str):
+    """Parse "key:value,key:value" settings into a dict"""
+    mapping = {}
+    for item in (value or "").split(","):
+        if ":" in item:
+            key, item_value = item.split(":", 1)
+            mapping[key.strip()] = cast(item_value.strip())
+    return mapping
+
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "litellm").lower()
+MODEL_NAME = os.getenv("OPENAI_MODEL") or ("mock" if LLM_BACKEND == "mock" else None)
+TEMPERATURE = 0.1
+QUIZ_SIZE = 10
+TRANSCRIPT_TIMESTAMPS = os.getenv("TRANSCRIPT_TIMESTAMPS", "true").lower() == "true"
+TRANSCRIPT_CUE_WINDOW = float(os.getenv("TRANSCRIPT_CUE_WINDOW", "15"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "6000"))
+CHUNK_MAX_CONCURRENCY = int(os.getenv("CHUNK_MAX_CONCURRENCY", "8"))
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "2000"))
+# Pin prompt template versions, e.g. "quiz-instructions:1"; the latest registered version is used otherwise
+PROMPT_VERSIONS = parse_mapping(os.getenv("PROMPT_VERSIONS", ""), int)
+QUIZ_MAX_FOLLOWUPS = int(os.getenv("QUIZ_MAX_FOLLOWUPS", "1"))
+QUIZ_FANOUT = os.getenv("QUIZ_FANOUT", "false").lower() == "true"
+# Relative share of the quiz per Bloom level; levels left out are not generated
+QUIZ_FANOUT_LEVELS = parse_mapping(
+    os.getenv("QUIZ_FANOUT_LEVELS", "Remember:2,Understand:2,Apply:2,Analyze:2,Evaluate:1,Create:1"), float
+)
+QUIZ_FANOUT_MODELS = parse_mapping(os.getenv("QUIZ_FANOUT_MODELS", ""))
+QUIZ_FANOUT_OVERSAMPLE = int(os.getenv("QUIZ_FANOUT_OVERSAMPLE", "1"))
+REVISION_CONTEXT_LINES = int(os.getenv("REVISION_CONTEXT_LINES", "1"))
+REVISION_MAX_CHANGED_RATIO = float(os.getenv("REVISION_MAX_CHANGED_RATIO", "0.5"))
+QUESTION_BANK_MATCH_THRESHOLD = float(os.getenv("QUESTION_BANK_MATCH_THRESHOLD", "0.5"))
+
+
+class ConfigurationError(Exception):
+    pass
+
+
+def validate_config():
+    """Raise ConfigurationError if the selected LLM backend is missing required settings"""
+    if QUIZ_FANOUT and sum(QUIZ_FANOUT_LEVELS.values()) <= 0:
+        raise ConfigurationError("QUIZ_FANOUT_LEVELS must give at least one Bloom level a positive share.")
+    if LLM_BACKEND == "mock":
+        return
+    if not os.getenv("OPENAI_API_KEY") or not MODEL_NAME:
+        raise ConfigurationError("Missing OPENAI_API_KEY or OPENAI_MODEL in environment.")
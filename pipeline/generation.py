@@ -0,0 +1,231 @@
+"""
+Quiz generation from cleaned transcripts, with response caching, chunked map-reduce for long transcripts
+and optional per-Bloom-level fan-out
+"""
+import math
+import asyncio
+from llm_cache import get_cache
+from usage import current_usage
+from chunking import count_tokens, split_transcript, merge_questions, merge_by_level
+from .config import (
+    MODEL_NAME, TEMPERATURE, QUIZ_SIZE, CHUNK_MAX_TOKENS, CHUNK_MAX_CONCURRENCY, QUIZ_MAX_FOLLOWUPS,
+    QUIZ_FANOUT, QUIZ_FANOUT_LEVELS, QUIZ_FANOUT_MODELS, QUIZ_FANOUT_OVERSAMPLE
+)
+from .prompts import build_prompt, build_messages, build_followup_messages
+from .parsing import QuizParseError, parse_quiz_response
+from .llm import call_llm_with_retry, acall_llm_with_retry
+
+
+def timestamp_to_seconds(timestamp):
+    h, m, s = map(int, timestamp.split(":"))
+    return h * 3600 + m * 60 + s
+
+
+def complete_questions(transcript, outline, num_questions=QUIZ_SIZE, step_name="Quiz Generation"):
+    """Top up a partial quiz (e.g. salvaged from truncated output) with follow-up calls for only the missing questions"""
+    questions = outline["questions"]
+    for _ in range(QUIZ_MAX_FOLLOWUPS):
+        missing = num_questions - len(questions)
+        if missing <= 0:
+            break
+        print(f"Requesting {missing} missing questions")
+        messages = build_followup_messages(transcript, missing, questions)
+        response = call_llm_with_retry(messages, step_name=f"{step_name} (follow-up)")
+        try:
+            extra = parse_quiz_response(response)["questions"]
+        except QuizParseError as e:
+            print(f"Follow-up response unusable: {e}")
+            continue
+        questions = merge_questions([extra[:missing]], num_questions, keep=questions)
+    return {"questions": questions}
+
+
+async def acomplete_questions(transcript, outline, num_questions=QUIZ_SIZE, step_name="Quiz Generation", level=None,
+                              model=None):
+    """Async variant of complete_questions"""
+    questions = outline["questions"]
+    for _ in range(QUIZ_MAX_FOLLOWUPS):
+        missing = num_questions - len(questions)
+        if missing <= 0:
+            break
+        print(f"Requesting {missing} missing questions")
+        messages = build_followup_messages(transcript, missing, questions, level)
+        response = await acall_llm_with_retry(messages, step_name=f"{step_name} (follow-up)", model=model)
+        try:
+            extra = parse_quiz_response(response)["questions"]
+        except QuizParseError as e:
+            print(f"Follow-up response unusable: {e}")
+            continue
+        questions = merge_questions([extra[:missing]], num_questions, keep=questions)
+    return {"questions": questions}
+
+
+def generate_questions(transcript):
+    print("Generating questions from transcript")
+    try:
+        cache = get_cache()
+        cache_key = cache.make_key(transcript, build_prompt(), MODEL_NAME, TEMPERATURE)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print("Using cached quiz generation")
+            if current_usage() is not None:
+                current_usage().record_cache_hit()
+            return cached
+
+        messages = build_messages(transcript)
+        response = call_llm_with_retry(messages)
+        outline = complete_questions(transcript, parse_quiz_response(response))
+        # A quiz that is still short is not cached, so the next run gets a fresh attempt
+        if len(outline["questions"]) >= QUIZ_SIZE:
+            cache.set(cache_key, outline)
+        return outline
+    except Exception as e:
+        print(f"Error generating outline: {e}")
+        raise
+
+
+async def agenerate_questions(transcript, num_questions=QUIZ_SIZE, step_name="Quiz Generation", level=None, model=None):
+    """Generate num_questions questions in one call, restricted to one Bloom `level` and run on `model` if given"""
+    print(f"Generating questions from transcript ({step_name})")
+    try:
+        cache = get_cache()
+        cache_key = cache.make_key(transcript, build_prompt(num_questions, level), model or MODEL_NAME, TEMPERATURE)
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            print("Using cached quiz generation")
+            if current_usage() is not None:
+                current_usage().record_cache_hit()
+            return cached
+
+        messages = build_messages(transcript, num_questions, level)
+        response = await acall_llm_with_retry(messages, step_name=step_name, model=model)
+        outline = await acomplete_questions(
+            transcript, parse_quiz_response(response), num_questions, step_name, level, model
+        )
+        # A quiz that is still short is not cached, so the next run gets a fresh attempt
+        if len(outline["questions"]) >= num_questions:
+            await cache.aset(cache_key, outline)
+        return outline
+    except Exception as e:
+        print(f"Error generating outline: {e}")
+        raise
+
+
+async def agenerate_questions_chunked(transcript, chunk_tokens=CHUNK_MAX_TOKENS, on_progress=None):
+    """
+    Map-reduce generation for long transcripts: generate candidates for each
+    token-bounded chunk concurrently, then merge, deduplicate and keep QUIZ_SIZE questions.
+    on_progress, if given, is awaited with chunk counts as chunks finish.
+    """
+    return await agenerate_chunks(split_transcript(transcript, chunk_tokens, MODEL_NAME), on_progress)
+
+
+async def agenerate_chunks(chunks, on_progress=None):
+    """Map-reduce generation over already split chunks; a single chunk is one ordinary generation"""
+    if len(chunks) == 1:
+        return await agenerate_questions(chunks[0])
+
+    per_chunk = max(3, math.ceil(QUIZ_SIZE * 1.5 / len(chunks)))
+    print(f"Transcript split into {len(chunks)} chunks, requesting {per_chunk} candidates each")
+    semaphore = asyncio.Semaphore(CHUNK_MAX_CONCURRENCY)
+    completed = 0
+
+    async def generate_chunk(index, chunk):
+        nonlocal completed
+        async with semaphore:
+            try:
+                return await agenerate_questions(
+                    chunk, per_chunk, step_name=f"Quiz Generation (chunk {index + 1}/{len(chunks)})"
+                )
+            finally:
+                completed += 1
+                if on_progress:
+                    await on_progress({"stage": "generating", "chunksCompleted": completed, "chunksTotal": len(chunks)})
+
+    results = await asyncio.gather(
+        *(generate_chunk(index, chunk) for index, chunk in enumerate(chunks)),
+        return_exceptions=True
+    )
+    candidate_lists = []
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"Chunk {index + 1} failed: {result}")
+            continue
+        candidate_lists.append(result.get("questions", []))
+    if not candidate_lists:
+        raise results[0]
+
+    return {"questions": merge_questions(candidate_lists, QUIZ_SIZE)}
+
+
+def level_quotas(total=QUIZ_SIZE, shares=None):
+    """Split `total` questions across Bloom levels in proportion to their shares (largest remainder)"""
+    shares = {level: share for level, share in (shares or QUIZ_FANOUT_LEVELS).items() if share > 0}
+    weight = sum(shares.values())
+    exact = {level: total * share / weight for level, share in shares.items()}
+    quotas = {level: int(value) for level, value in exact.items()}
+    by_remainder = sorted(shares, key=lambda level: exact[level] - quotas[level], reverse=True)
+    for level in by_remainder[:total - sum(quotas.values())]:
+        quotas[level] += 1
+    return {level: quota for level, quota in quotas.items() if quota > 0}
+
+
+async def agenerate_questions_fanout(transcript, on_progress=None):
+    """
+    Generate each Bloom level's share of the quiz with its own smaller call, all concurrently,
+    then merge them under per-level quotas. Levels listed in QUIZ_FANOUT_MODELS run on that model.
+    """
+    quotas = level_quotas(QUIZ_SIZE)
+    print(f"Fanning out quiz generation over {len(quotas)} Bloom levels: {quotas}")
+    completed = 0
+
+    async def generate_level(level, quota):
+        nonlocal completed
+        try:
+            outline = await agenerate_questions(
+                transcript, quota + QUIZ_FANOUT_OVERSAMPLE, step_name=f"Quiz Generation ({level})",
+                level=level, model=QUIZ_FANOUT_MODELS.get(level)
+            )
+            return [dict(question, bloom_level=level) for question in outline.get("questions", [])]
+        finally:
+            completed += 1
+            if on_progress:
+                await on_progress({"stage": "generating", "levelsCompleted": completed, "levelsTotal": len(quotas)})
+
+    results = await asyncio.gather(
+        *(generate_level(level, quota) for level, quota in quotas.items()),
+        return_exceptions=True
+    )
+    level_lists = {}
+    for level, result in zip(quotas, results):
+        if isinstance(result, Exception):
+            print(f"{level} questions failed: {result}")
+            continue
+        level_lists[level] = result
+    if not level_lists:
+        raise results[0]
+
+    return {"questions": merge_by_level(level_lists, quotas)}
+
+
+async def agenerate_quiz(clean_transcript, on_progress=None):
+    """
+    Generate a full quiz, map-reducing over chunks when the transcript exceeds CHUNK_MAX_TOKENS
+    and fanning out per Bloom level when QUIZ_FANOUT is enabled
+    """
+    if count_tokens(clean_transcript, MODEL_NAME) > CHUNK_MAX_TOKENS:
+        return await agenerate_questions_chunked(clean_transcript, on_progress=on_progress)
+    return await agenerate_quiz_from_chunks([clean_transcript], on_progress)
+
+
+async def agenerate_quiz_from_chunks(chunks, on_progress=None):
+    """
+    Generate a full quiz from a transcript already split into CHUNK_MAX_TOKENS chunks (see
+    achunk_transcript), so the cleaned text never has to be held as one string
+    """
+    if len(chunks) > 1:
+        return await agenerate_chunks(chunks, on_progress)
+    transcript = chunks[0] if chunks else ""
+    if QUIZ_FANOUT:
+        return await agenerate_questions_fanout(transcript, on_progress)
+    return await agenerate_questions(transcript)
@@ -0,0 +1,285 @@
+"""
+LLM calls with proactive rate limiting, retries and usage accounting
+litellm and the tokenizer are only loaded on first use, in a thread when called from async code
+"""
+import os
+import re
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from models import Quiz
+from usage import current_usage, load_pricing
+from metrics import (
+    pipeline_stage_duration, llm_requests, llm_retries, llm_rate_limited, llm_rate_limiter_wait, llm_prompt_tokens
+)
+from rate_limiter import get_rate_limiter
+from chunking import count_tokens, get_encoder
+from deadlines import DeadlineExceeded, check_deadline, time_remaining
+from .config import LLM_BACKEND, MODEL_NAME, TEMPERATURE, LLM_EXPECTED_OUTPUT_TOKENS
+
+
+def cached_prompt_tokens(usage):
+    """Prompt tokens served from the provider's prompt cache, 0 if the usage object does not report them"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    else:
+        cached = getattr(details, "cached_tokens", None)
+    # Anthropic-style usage reports cache reads separately
+    return cached or getattr(usage, "cache_read_input_tokens", None) or 0
+
+
+def log_token_usage(step_name, input_tokens, output_tokens, latency=0.0, retries=0, model=None, cached_tokens=0):
+    """Record a call in the current run's usage context"""
+    usage = current_usage()
+    if usage is not None:
+        usage.record(step_name, model or MODEL_NAME, input_tokens, output_tokens, latency, retries, cached_tokens)
+    llm_prompt_tokens.inc(cached_tokens, cache="hit")
+    llm_prompt_tokens.inc(input_tokens - cached_tokens, cache="miss")
+    print(f"Token usage for {step_name}: {input_tokens} in ({cached_tokens} cached), {output_tokens} out")
+
+
+_litellm = None
+
+
+def _load_litellm():
+    """Import and configure litellm on first use; importing it takes seconds"""
+    global _litellm
+    if _litellm is None:
+        import litellm
+        litellm.enable_json_schema_validation = False
+        litellm.api_key = os.getenv("OPENAI_API_KEY")
+        _litellm = litellm
+    return _litellm
+
+
+def get_llm_backend():
+    """Return the object whose completion/acompletion serve LLM calls: litellm, or the offline mock"""
+    if LLM_BACKEND == "mock":
+        from mock_llm import get_mock_llm
+        return get_mock_llm()
+    return _load_litellm()
+
+
+_warm = False
+
+
+def warm_up():
+    """Import litellm (also used for pricing) and load the tokenizer, which take seconds the first time"""
+    global _warm
+    get_llm_backend()
+    load_pricing()
+    get_encoder(MODEL_NAME)
+    _warm = True
+
+
+async def awarm_up():
+    """Run warm_up in a thread so the first call does not stall the event loop; a no-op once warm"""
+    if not _warm:
+        await asyncio.to_thread(warm_up)
+
+
+def is_rate_limit_error(error_str):
+    """Check if an LLM error message describes a rate limit (429)"""
+    return "429" in error_str or "Too Many Requests" in error_str or "rate limit" in error_str.lower()
+
+
+RETRY_AFTER_TEXT = re.compile(r"retry-after['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)", re.IGNORECASE)
+TRY_AGAIN_TEXT = re.compile(r"try again in\s+((?:\d+(?:\.\d+)?(?:ms|h|m|s))+)", re.IGNORECASE)
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(text):
+    """Seconds in an OpenAI-style duration such as "7s", "1.5s", "20ms" or "6m0s", None if it is not one"""
+    text = text.strip()
+    parts = DURATION_PART.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def parse_retry_after(error_str):
+    """Extract the retry-after seconds from an LLM error message ("retry-after: 7", "Please try again in 7s"), None if absent"""
+    match = RETRY_AFTER_TEXT.search(error_str)
+    if match:
+        return float(match.group(1))
+    match = TRY_AGAIN_TEXT.search(error_str)
+    if match:
+        return parse_duration(match.group(1))
+    return None
+
+
+def retry_after_from_headers(headers):
+    """
+    Seconds to wait according to 429 response headers, None if they carry no hint
+    retry-after-ms and retry-after (seconds or an HTTP date) win over the longest x-ratelimit-reset-* duration
+    """
+    if not headers:
+        return None
+    # litellm prefixes provider headers it passes through
+    headers = {str(name).lower().removeprefix("llm_provider-"): str(value) for name, value in dict(headers).items()}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    resets = [parse_duration(value) for name, value in headers.items() if name.startswith("x-ratelimit-reset")]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def error_retry_after(error):
+    """Retry-after seconds for an LLM error: from its response headers, else from the message text"""
+    for headers in (getattr(error, "litellm_response_headers", None),
+                    getattr(getattr(error, "response", None), "headers", None)):
+        retry_after = retry_after_from_headers(headers)
+        if retry_after is not None:
+            return retry_after
+    return parse_retry_after(str(error))
+
+
+def get_retry_delay(error_str, attempt, base_delay=1, max_delay=60, retry_after=None):
+    """
+    Exponential backoff with 10% jitter that respects a retry-after hint
+    retry_after is parsed from the error message when not given
+    """
+    if retry_after is None:
+        retry_after = parse_retry_after(error_str)
+    retry_after = retry_after or 1
+
+    # Use exponential backoff with jitter, but respect retry-after
+    delay = min(max(base_delay * (2 ** attempt), retry_after), max_delay)
+    jitter = delay * 0.1 * random.random()  # Add 10% jitter
+    return delay + jitter
+
+
+def deadline_timeout():
+    """Request timeout keyword for an LLM call, so a single call cannot outlive the job deadline"""
+    remaining = time_remaining()
+    return {} if remaining is None else {"timeout": max(remaining, 1.0)}
+
+
+def estimate_request_tokens(messages):
+    """Tokens a call will count against the TPM limit: the prompt plus the expected completion"""
+    prompt_tokens = sum(count_tokens(message["content"], MODEL_NAME) for message in messages)
+    return prompt_tokens + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+class LLMCall:
+    """
+    State and bookkeeping shared by the sync and async retry loops: rate limiting, deadlines,
+    usage accounting and the decision whether (and how long) to wait before the next attempt
+    """
+
+    def __init__(self, messages, step_name, model):
+        self.messages = messages
+        self.step_name = step_name
+        self.model = model
+        self.limiter = get_rate_limiter()
+        self.estimated_tokens = estimate_request_tokens(messages) if self.limiter.enabled else 0
+        self.started = time.monotonic()
+
+    def start_attempt(self, waited):
+        """Record the rate limiter wait and stop if the job deadline has passed"""
+        if waited:
+            llm_rate_limiter_wait.observe(waited)
+        check_deadline(self.step_name)
+
+    def request(self):
+        """Keyword arguments of completion/acompletion for one attempt"""
+        return dict(
+            model=self.model,
+            messages=self.messages,
+            temperature=TEMPERATURE,
+            response_format=Quiz,
+            **deadline_timeout()
+        )
+
+    def succeeded(self, response, attempt):
+        """Account for a successful response and return it"""
+        llm_requests.inc(outcome="success")
+        usage = response.usage
+        self.limiter.on_success()
+        self.limiter.adjust(self.estimated_tokens, usage.prompt_tokens + usage.completion_tokens)
+        log_token_usage(
+            self.step_name, usage.prompt_tokens, usage.completion_tokens, time.monotonic() - self.started, attempt,
+            self.model, cached_prompt_tokens(usage)
+        )
+        return response
+
+    def retry_delay(self, error, attempt, max_retries, base_delay, max_delay):
+        """
+        Seconds to wait before retrying after `error`; re-raises errors that are not rate limits,
+        the last rate limit, and raises DeadlineExceeded when the wait would pass the job deadline
+        """
+        error_str = str(error)
+        if getattr(error, "status_code", None) != 429 and not is_rate_limit_error(error_str):
+            # For non-rate-limit errors, raise immediately
+            llm_requests.inc(outcome="error")
+            print(f"LLM API error: {error_str}")
+            raise error
+
+        llm_requests.inc(outcome="rate_limited")
+        llm_rate_limited.inc()
+        retry_after = error_retry_after(error)
+        self.limiter.on_rate_limited(retry_after)
+        if attempt >= max_retries - 1:
+            print(f"Rate limit exceeded after {max_retries} attempts")
+            raise error
+
+        llm_retries.inc()
+        total_delay = get_retry_delay(error_str, attempt, base_delay, max_delay, retry_after)
+        remaining = time_remaining()
+        if remaining is not None and total_delay >= remaining:
+            raise DeadlineExceeded(
+                f"{self.step_name}: retrying in {total_delay:.2f}s would pass the job deadline"
+            ) from error
+        print(f"Rate limit hit (attempt {attempt + 1}/{max_retries}). Retrying in {total_delay:.2f} seconds...")
+        return total_delay
+
+
+def call_llm_with_retry(messages, max_retries=5, base_delay=1, max_delay=60, step_name="Quiz Generation", model=None):
+    """
+    Call LiteLLM with exponential backoff retry mechanism for rate limits; model defaults to MODEL_NAME
+    Raises DeadlineExceeded instead of retrying when the current job's deadline (see deadlines.py) would pass
+    """
+    call = LLMCall(messages, step_name, model or MODEL_NAME)
+    for attempt in range(max_retries):
+        try:
+            call.start_attempt(call.limiter.acquire(call.estimated_tokens))
+            with pipeline_stage_duration.time(stage="llm_call"):
+                response = get_llm_backend().completion(**call.request())
+            return call.succeeded(response, attempt)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            time.sleep(call.retry_delay(e, attempt, max_retries, base_delay, max_delay))
+
+    raise Exception(f"Failed to complete request after {max_retries} retries")
+
+
+async def acall_llm_with_retry(messages, max_retries=5, base_delay=1, max_delay=60, step_name="Quiz Generation", model=None):
+    """Async variant of call_llm_with_retry built on litellm.acompletion and asyncio.sleep"""
+    await awarm_up()
+    call = LLMCall(messages, step_name, model or MODEL_NAME)
+    for attempt in range(max_retries):
+        try:
+            call.start_attempt(await call.limiter.aacquire(call.estimated_tokens))
+            with pipeline_stage_duration.time(stage="llm_call"):
+                response = await get_llm_backend().acompletion(**call.request())
+            return call.succeeded(response, attempt)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            await asyncio.sleep(call.retry_delay(e, attempt, max_retries, base_delay, max_delay))
+
+    raise Exception(f"Failed to complete request after {max_retries} retries")
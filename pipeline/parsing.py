@@ -0,0 +1,79 @@
+"""
+Quiz response parsing: validate straight into models.Quiz, salvaging valid questions
+from truncated or partly malformed output
+"""
+import re
+import json
+from pydantic import ValidationError
+from pydantic_core import from_json
+from models import Quiz, Question
+from metrics import pipeline_stage_duration, quiz_responses
+
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+class QuizParseError(Exception):
+    pass
+
+
+def _valid_questions(items):
+    questions = []
+    for item in items:
+        try:
+            questions.append(Question.model_validate(item).model_dump())
+        except ValidationError:
+            continue
+    return questions
+
+
+def _scan_objects(text):
+    """Decode every JSON object that can be read from some '{' in the text, outermost first"""
+    decoder = json.JSONDecoder()
+    index = text.find("{")
+    while index != -1:
+        try:
+            value, end = decoder.raw_decode(text, index)
+            yield value
+            index = text.find("{", end)
+        except ValueError:
+            index = text.find("{", index + 1)
+
+
+def salvage_questions(text):
+    """
+    Recover the valid questions from output that does not validate as a whole
+    Truncated JSON is completed by pydantic-core's partial parser; syntax errors mid-way are skipped
+    by decoding the question objects that are still well formed.
+    """
+    text = CODE_FENCE.sub("", text)
+    try:
+        data = from_json(text, allow_partial=True)
+        items = data.get("questions", []) if isinstance(data, dict) else data
+        if isinstance(items, list):
+            questions = _valid_questions(items)
+            if questions:
+                return questions
+    except ValueError:
+        pass
+    return _valid_questions(value for value in _scan_objects(text) if isinstance(value, dict) and "question" in value)
+
+
+def parse_quiz_text(text):
+    """Return {"questions": [...]} with every valid question in the text; raises QuizParseError if there are none"""
+    with pipeline_stage_duration.time(stage="json_parse"):
+        try:
+            quiz = Quiz.model_validate_json(text)
+            quiz_responses.inc(outcome="valid")
+            return quiz.model_dump()
+        except ValidationError:
+            questions = salvage_questions(text or "")
+    if not questions:
+        quiz_responses.inc(outcome="failed")
+        raise QuizParseError(f"No valid questions in LLM response: {(text or '')[:200]!r}")
+    quiz_responses.inc(outcome="salvaged")
+    print(f"Salvaged {len(questions)} valid questions from a malformed response")
+    return {"questions": questions}
+
+
+def parse_quiz_response(response):
+    return parse_quiz_text(response.choices[0].message["content"])
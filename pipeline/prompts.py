@@ -0,0 +1,156 @@
+"""
+Quiz generation prompts, kept in a registry of versioned templates compiled once at import
+Messages are laid out for provider-side prompt caching: the static instructions come first and are
+byte-identical for every call, then the transcript, then the short per-call task (question count,
+Bloom level, questions to avoid). Calls on the same transcript therefore share the transcript prefix too.
+"""
+from string import Template
+from functools import lru_cache
+from .config import QUIZ_SIZE, PROMPT_VERSIONS
+
+
+class PromptTemplate:
+    """A named, versioned prompt; templates without placeholders are rendered once, up front"""
+
+    def __init__(self, name, version, text):
+        self.name = name
+        self.version = version
+        self.template = Template(text)
+        self.static = not self.template.get_identifiers()
+        self.text = text if self.static else None
+
+    @property
+    def key(self):
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **values):
+        if self.static:
+            return self.text
+        return self.template.substitute(values)
+
+
+class PromptRegistry:
+    """Prompt templates by name and version; the latest version is used unless one is pinned"""
+
+    def __init__(self, pinned=None):
+        self.templates = {}
+        self.pinned = dict(pinned or {})
+
+    def register(self, name, version, text):
+        template = PromptTemplate(name, version, text)
+        self.templates.setdefault(name, {})[version] = template
+        return template
+
+    def get(self, name, version=None):
+        versions = self.templates[name]
+        version = version or self.pinned.get(name) or max(versions)
+        if version not in versions:
+            raise KeyError(f"Prompt {name} has no version {version}")
+        return versions[version]
+
+    def render(self, name, **values):
+        return self.get(name).render(**values)
+
+    def active_versions(self):
+        return {name: self.get(name).key for name in self.templates}
+
+
+prompt_registry = PromptRegistry(PROMPT_VERSIONS)
+
+QUIZ_PROMPT = """
+        Using the provided transcript, generate a deep understanding based structured quiz that evaluates comprehension across different Bloom's Taxonomy Levels. Focus on identifying key learning objectives, factual knowledge,solving based questions and conceptual understanding.
+        The quiz should be structured as a list of questions, each with 4 options, a correct option, an explanation, and a time stamp.
+        Example:
+                {
+        "questions": [
+            {
+            "question": "...",
+            "options": ["...", "...", "...", "..."],
+            "correct_option": "...",
+            "correct_option_index": [0],
+            "explanation": "...",
+            "time_stamp": "00:12:34"
+            },
+            ...
+        ]
+        }
+
+    While creating questions, frame questions that test understanding of:
+        DO NOT INCLUDE ANY QUESTIONS THAT ARE NOT MENTIONED IN THE TRANSCRIPT.
+        1. Accurate, subject-centered scientific questions
+        1. Definitions, processes, formulas, and steps
+        2. Cause-effect relationships
+        3. Interpretation of visual aids if referenced
+        4. Problem-solving or reasoning based on the transcript
+        5. No references to "professor", "assignments", or "recorded sessions"
+        
+        Provide realistic options, including common misconceptions.
+
+        Ensure explanations clarify the logic behind the correct answer.
+
+        Add the time stamp in the format HH:MM:SS from the transcript where the answer is mentioned or implied.
+
+        """
+
+
+
+QUIZ_TASK_PROMPT = """
+        Generate the quiz for the transcript above as a list of $num_questions questions.
+        """
+
+BLOOM_LEVELS = {
+    "Remember": "recall of facts, terms and definitions",
+    "Understand": "explaining ideas and cause-effect relationships in one's own terms",
+    "Apply": "using a method or formula from the lecture on a new case",
+    "Analyze": "breaking a concept into parts and relating them to each other",
+    "Evaluate": "judging claims or choosing between approaches with justification",
+    "Create": "combining ideas from the lecture into a new solution or design"
+}
+
+LEVEL_PROMPT = """
+        Every question must target the "$level" level of Bloom's Taxonomy ($description) and set "bloom_level" to "$level".
+        """
+
+FOLLOWUP_PROMPT = """
+        The quiz already contains the questions below. Generate only $num_questions NEW questions on other points of the transcript and do not repeat any of these:
+$existing
+        """
+
+prompt_registry.register("quiz-instructions", 1, QUIZ_PROMPT)
+prompt_registry.register("quiz-task", 1, QUIZ_TASK_PROMPT)
+prompt_registry.register("quiz-level", 1, LEVEL_PROMPT)
+prompt_registry.register("quiz-followup", 1, FOLLOWUP_PROMPT)
+
+
+@lru_cache(maxsize=256)
+def build_task(num_questions=QUIZ_SIZE, level=None):
+    """The per-call instructions that follow the transcript"""
+    task = prompt_registry.render("quiz-task", num_questions=num_questions)
+    if level is not None:
+        task += prompt_registry.render("quiz-level", level=level, description=BLOOM_LEVELS.get(level, level))
+    return task
+
+
+def build_prompt(num_questions=QUIZ_SIZE, level=None):
+    """All prompt text apart from the transcript; identifies the request in response cache keys"""
+    return prompt_registry.render("quiz-instructions") + build_task(num_questions, level)
+
+
+def build_messages(transcript, num_questions=QUIZ_SIZE, level=None):
+    return [
+        {"role": "system", "content": prompt_registry.render("quiz-instructions")},
+        {"role": "user", "content": transcript},
+        {"role": "user", "content": build_task(num_questions, level)}
+    ]
+
+
+def build_followup_messages(transcript, num_questions, existing_questions, level=None):
+    """Messages asking only for the questions missing from a partial quiz"""
+    existing = "\n".join(f"        - {question['question']}" for question in existing_questions)
+    return [
+        {"role": "system", "content": prompt_registry.render("quiz-instructions")},
+        {"role": "user", "content": transcript},
+        {"role": "user", "content": build_task(num_questions, level) + prompt_registry.render(
+            "quiz-followup", num_questions=num_questions, existing=existing
+        )}
+    ]
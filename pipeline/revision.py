@@ -0,0 +1,98 @@
+"""
+Incremental quiz regeneration for revised transcripts
+The cleaned transcripts are diffed line by line (one line per coalesced cue record); questions whose
+time stamps fall outside the changed segments are kept and only the missing ones are regenerated.
+"""
+import re
+import difflib
+from chunking import count_tokens, merge_questions
+from .config import MODEL_NAME, QUIZ_SIZE, CHUNK_MAX_TOKENS, REVISION_CONTEXT_LINES, REVISION_MAX_CHANGED_RATIO
+from .generation import timestamp_to_seconds, agenerate_questions, agenerate_quiz
+
+LINE_TIMESTAMP = re.compile(r"^\[(\d{2}:\d{2}:\d{2})\]")
+
+
+def line_start(line):
+    """Start time in seconds of a rendered transcript line, None if it has no [HH:MM:SS] prefix"""
+    match = LINE_TIMESTAMP.match(line)
+    return timestamp_to_seconds(match.group(1)) if match else None
+
+
+def question_time(question):
+    try:
+        return timestamp_to_seconds(question.get("time_stamp") or "")
+    except ValueError:
+        return None
+
+
+def diff_transcripts(old_lines, new_lines):
+    """Return the changed segments as (old_start, old_end, new_start, new_end) line ranges"""
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [(i1, i2, j1, j2) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def touched_ranges(old_lines, segments):
+    """Time ranges [start, end) of the old transcript that were edited or deleted"""
+    ranges = []
+    for i1, i2, _, _ in segments:
+        if i1 == i2:
+            continue
+        start = line_start(old_lines[i1])
+        end = line_start(old_lines[i2]) if i2 < len(old_lines) else float("inf")
+        ranges.append((start, end))
+    return ranges
+
+
+def changed_excerpt(new_lines, segments, context=REVISION_CONTEXT_LINES):
+    """The new transcript lines in changed segments plus `context` lines around each"""
+    keep = set()
+    for _, _, j1, j2 in segments:
+        keep.update(range(max(0, j1 - context), min(len(new_lines), j2 + context)))
+    return "\n".join(new_lines[index] for index in sorted(keep))
+
+
+async def arevise_questions(old_transcript, old_questions, new_transcript, on_progress=None):
+    """
+    Produce the quiz for a revised transcript, reusing old questions where possible.
+    Returns the questions and a summary of what was reused; falls back to full
+    generation when the transcript is untimed or mostly rewritten.
+    """
+    old_lines = [line for line in old_transcript.split("\n") if line]
+    new_lines = [line for line in new_transcript.split("\n") if line]
+    segments = diff_transcripts(old_lines, new_lines)
+    changed_lines = sum(max(i2 - i1, j2 - j1) for i1, i2, j1, j2 in segments)
+    revision = {"changedLines": changed_lines, "totalLines": len(new_lines)}
+
+    if not segments:
+        return {"questions": old_questions}, {**revision, "mode": "unchanged", "keptQuestions": len(old_questions), "regeneratedQuestions": 0}
+
+    def full(reason):
+        print(f"Regenerating the full quiz: {reason}")
+        return {**revision, "mode": "full", "reason": reason, "keptQuestions": 0, "regeneratedQuestions": QUIZ_SIZE}
+
+    if any(line_start(line) is None for line in old_lines):
+        return await agenerate_quiz(new_transcript, on_progress), full("transcript has no timestamps")
+    if changed_lines > REVISION_MAX_CHANGED_RATIO * len(new_lines):
+        return await agenerate_quiz(new_transcript, on_progress), full("too much of the transcript changed")
+
+    ranges = touched_ranges(old_lines, segments)
+    kept = []
+    for question in old_questions:
+        seconds = question_time(question)
+        if seconds is not None and not any(start <= seconds < end for start, end in ranges):
+            kept.append(question)
+    missing = QUIZ_SIZE - len(kept)
+    print(f"Transcript revision changed {changed_lines}/{len(new_lines)} lines; keeping {len(kept)} questions, regenerating {missing}")
+    if missing <= 0:
+        return {"questions": kept}, {**revision, "mode": "incremental", "keptQuestions": len(kept), "regeneratedQuestions": 0}
+
+    # Pure deletions leave no new text to ask about, so draw replacements from the whole transcript
+    excerpt = changed_excerpt(new_lines, segments) or new_transcript
+    if count_tokens(excerpt, MODEL_NAME) > CHUNK_MAX_TOKENS:
+        return await agenerate_quiz(new_transcript, on_progress), full("changed segments exceed CHUNK_MAX_TOKENS")
+
+    generated = await agenerate_questions(excerpt, missing, step_name="Quiz Revision")
+    questions = merge_questions([generated.get("questions", [])], QUIZ_SIZE, keep=kept)
+    return {"questions": questions}, {
+        **revision, "mode": "incremental", "keptQuestions": len(kept), "regeneratedQuestions": len(questions) - len(kept)
+    }
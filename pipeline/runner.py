@@ -0,0 +1,159 @@
+"""
+End-to-end pipeline: load and clean a transcript, generate its quiz, optionally save it
+"""
+import json
+import asyncio
+from usage import start_usage, end_usage, current_usage
+from metrics import pipeline_stage_duration
+from chunking import split_transcript
+from transcript_parser import iter_cues, coalesce_cues, render_cues
+from .config import MODEL_NAME, CHUNK_MAX_TOKENS, TRANSCRIPT_TIMESTAMPS, TRANSCRIPT_CUE_WINDOW, validate_config
+from .llm import awarm_up
+from .generation import agenerate_quiz, agenerate_quiz_from_chunks
+from .revision import arevise_questions
+from .bank import assemble_from_bank
+
+
+def save_to_json(data, output_path):
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        print(f"Data successfully saved to {output_path}")
+    except Exception as e:
+        print(f"Error saving JSON: {e}")
+
+
+def iter_transcript_lines(file_path, with_timestamps=TRANSCRIPT_TIMESTAMPS):
+    """
+    Stream the prompt lines of an SRT/VTT/plain-text transcript.
+    Timed cues are merged into TRANSCRIPT_CUE_WINDOW-second records and,
+    when with_timestamps is set, prefixed with [HH:MM:SS].
+    """
+    return render_cues(coalesce_cues(iter_cues(file_path), TRANSCRIPT_CUE_WINDOW), with_timestamps)
+
+
+def load_and_clean_transcript(file_path, with_timestamps=TRANSCRIPT_TIMESTAMPS):
+    """Stream a transcript into prompt text, for callers that store or diff the whole cleaned transcript"""
+    print(f"Loading and cleaning transcript from {file_path}")
+    try:
+        result = "\n".join(iter_transcript_lines(file_path, with_timestamps))
+        print(f"Transcript cleaned successfully. Length: {len(result)} characters")
+        return result
+    except Exception as e:
+        print(f"Error while cleaning transcript: {e}")
+        raise
+
+
+def print_token_usage_summary(usage):
+    totals = usage.totals()
+    print("\n=== Token Usage Summary ===")
+    print(f"Total Input Tokens: {totals['promptTokens']} ({totals['cachedTokens']} from the provider prompt cache)")
+    print(f"Total Output Tokens: {totals['completionTokens']}")
+    print(f"Estimated Cost: ${totals['cost']:.4f} ({totals['llmCalls']} calls, {totals['retries']} retries, {totals['cacheHits']} cache hits)")
+    
+    # Print step-by-step breakdown of token usage
+    for call in usage.calls:
+        print(f"  {call['step']}: {call['promptTokens']} in ({call['cachedTokens']} cached), {call['completionTokens']} out, {call['latencyMs']:.0f} ms")
+
+
+async def arun_pipeline(transcript_path, output_path=None, on_progress=None):
+    """
+    Clean a transcript and generate its quiz.
+    Token usage is recorded in the caller's usage context, or in a new one for this run.
+    Raises ConfigurationError if the LLM backend is not configured.
+    """
+    validate_config()
+    await awarm_up()
+    print(f"Running pipeline for transcript: {transcript_path}")
+    usage = current_usage()
+    token = None
+    if usage is None:
+        usage, token = start_usage()
+    try:
+        chunks = await achunk_transcript(transcript_path)
+        questions = await agenerate_quiz_from_chunks(chunks, on_progress)
+        if output_path:
+            save_to_json(questions, output_path)
+
+        print_token_usage_summary(usage)
+        return questions
+    except Exception as e:
+        print(f"Error in pipeline execution: {e}")
+        raise
+    finally:
+        if token is not None:
+            end_usage(token)
+
+
+async def aclean_transcript(transcript_path):
+    """Load and clean a transcript off the event loop"""
+    with pipeline_stage_duration.time(stage="clean"):
+        return await asyncio.to_thread(load_and_clean_transcript, transcript_path)
+
+
+async def achunk_transcript(transcript_path, chunk_tokens=CHUNK_MAX_TOKENS):
+    """
+    Stream a transcript straight into token-bounded chunks off the event loop
+    Cues flow from the parser into the chunker, so the cleaned text is never joined into one string
+    """
+    with pipeline_stage_duration.time(stage="clean"):
+        return await asyncio.to_thread(
+            lambda: split_transcript(iter_transcript_lines(transcript_path), chunk_tokens, MODEL_NAME)
+        )
+
+
+async def agenerate_version(clean_transcript, previous=None, on_progress=None, bank=None):
+    """
+    Generate the next version of a quiz from an already cleaned transcript.
+    previous, the prior version's {"transcript", "questions"}, enables incremental regeneration.
+    bank, the course's question bank entries, lets a first version be assembled without LLM calls.
+    Returns the questions, the cleaned transcript to store with the version, a revision summary
+    and the IDs of any bank questions used.
+    """
+    validate_config()
+    await awarm_up()
+    usage = current_usage()
+    token = None
+    if usage is None:
+        usage, token = start_usage()
+    try:
+        assembled = None
+        if previous and previous.get("transcript"):
+            outline, revision = await arevise_questions(
+                previous["transcript"], previous["questions"], clean_transcript, on_progress
+            )
+        else:
+            revision = None
+            if bank:
+                assembled = await asyncio.to_thread(assemble_from_bank, clean_transcript, bank)
+            if assembled:
+                outline = {"questions": assembled[0]}
+            else:
+                outline = await agenerate_quiz(clean_transcript, on_progress)
+
+        print_token_usage_summary(usage)
+        return {
+            "questions": outline["questions"],
+            "transcript": clean_transcript,
+            "revision": revision,
+            "bankQuestionIds": assembled[1] if assembled else None
+        }
+    except Exception as e:
+        print(f"Error in pipeline execution: {e}")
+        raise
+    finally:
+        if token is not None:
+            end_usage(token)
+
+
+async def arun_versioned_pipeline(transcript_path, previous=None, on_progress=None, bank=None):
+    """Clean a transcript and generate the next version of its quiz; see agenerate_version"""
+    validate_config()
+    print(f"Running versioned pipeline for transcript: {transcript_path}")
+    clean_transcript = await aclean_transcript(transcript_path)
+    return await agenerate_version(clean_transcript, previous, on_progress, bank)
+
+
+def run_pipeline(transcript_path, output_path=None):
+    """Synchronous entry point that drives arun_pipeline on a fresh event loop"""
+    return asyncio.run(arun_pipeline(transcript_path, output_path))
@@ -0,0 +1,128 @@
+"""
+Proactive client-side rate limiting for LLM calls
+"""
+import os
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously at `limit` units per minute.
+    Reservations may drive the level negative; later callers then wait for the debt
+    to be repaid, which admits callers in the order they reserved.
+    """
+
+    def __init__(self, limit_per_minute):
+        self.limit = float(limit_per_minute)
+        self.level = self.limit
+        self.updated = time.monotonic()
+
+    def refill(self, now, factor):
+        capacity = self.limit * factor
+        self.level = min(capacity, self.level + (now - self.updated) * capacity / 60.0)
+        self.updated = now
+
+    def reserve(self, amount, factor):
+        """Take `amount` units and return how long the caller must wait for them"""
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level / (self.limit * factor / 60.0)
+
+
+class LLMRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter shared by every LLM call in the process.
+    The admitted rate backs off multiplicatively on 429s (pausing for any retry-after)
+    and recovers additively on successful calls.
+    """
+
+    def __init__(self, rpm=0, tpm=0, min_factor=0.1, decrease=0.7, increase=0.02):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.factor = 1.0
+        self.min_factor = min_factor
+        self.decrease = decrease
+        self.increase = increase
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.requests is not None or self.tokens is not None
+
+    def reserve(self, tokens):
+        """Reserve one request and `tokens` tokens; returns the seconds to wait before calling"""
+        if not self.enabled:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.paused_until - now)
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now, self.factor)
+                    wait = max(wait, bucket.reserve(amount, self.factor))
+            return wait
+
+    def acquire(self, tokens):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def adjust(self, estimated_tokens, actual_tokens):
+        """Return over-reserved tokens (or take the shortfall) once the real usage is known"""
+        if self.tokens is None:
+            return
+        with self.lock:
+            self.tokens.level = min(self.tokens.limit * self.factor, self.tokens.level + estimated_tokens - actual_tokens)
+
+    def on_success(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.factor = min(1.0, self.factor + self.increase)
+
+    def on_rate_limited(self, retry_after=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.factor = max(self.min_factor, self.factor * self.decrease)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "factor": round(self.factor, 3),
+            "requestsAvailable": round(self.requests.level, 1) if self.requests else None,
+            "tokensAvailable": round(self.tokens.level, 1) if self.tokens else None
+        }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter configured by LLM_RPM_LIMIT and LLM_TPM_LIMIT (0 disables)"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = LLMRateLimiter(
+                    rpm=int(os.getenv("LLM_RPM_LIMIT", "0")),
+                    tpm=int(os.getenv("LLM_TPM_LIMIT", "0"))
+                )
+    return _limiter
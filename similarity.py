@@ -0,0 +1,135 @@
+"""
+Local, CPU-only text similarity for quiz questions: MinHash signatures for near-duplicate
+detection and keyword containment for matching questions to transcript lines
+"""
+import re
+import hashlib
+from collections import Counter, defaultdict
+
+NUM_PERM = 64
+MERSENNE_PRIME = (1 << 31) - 1
+STOPWORDS = frozenset(
+    "the a an and or of to in on for is are was were be been by with as at from that this these those "
+    "it its which what who whom how why when where does do did can could would should will not no "
+    "into than then there their they them such about between following true false".split()
+    # Quiz boilerplate that rarely appears in the transcript itself
+    + "lecture transcript according option options correct statement best describes describe say says".split()
+)
+
+
+def normalize_words(text):
+    return re.sub(r"[^a-z0-9 ]", " ", text.lower()).split()
+
+
+def question_text(question):
+    """The text that identifies a question: its stem and correct answers"""
+    correct = question.get("correct_option") or []
+    if isinstance(correct, str):
+        correct = [correct]
+    return " ".join([question.get("question", ""), *correct])
+
+
+def keywords(text):
+    return {word for word in normalize_words(text) if len(word) > 2 and word not in STOPWORDS}
+
+
+def shingles(text, size=2):
+    words = normalize_words(text)
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[index:index + size]) for index in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash over word shingles; the fraction of equal signature slots estimates Jaccard similarity"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        import numpy as np
+        self.np = np
+        generator = np.random.default_rng(seed)
+        self.a = generator.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        np = self.np
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+             for shingle in shingles(text)],
+            dtype=np.uint64
+        )
+        # (a * h + b) mod p for every permutation and shingle, then the minimum per permutation
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def similarity(self, signature, signatures):
+        """Estimated Jaccard similarity of one signature against each row of a signature matrix"""
+        if len(signatures) == 0:
+            return self.np.zeros(0)
+        return (self.np.asarray(signatures, dtype=self.np.uint64) == signature).mean(axis=1)
+
+    def matrix(self, signatures):
+        """Stack signatures into one matrix, a row per signature, so comparisons need no conversion"""
+        return self.np.asarray(signatures, dtype=self.np.uint64).reshape(len(signatures), len(self.a))
+
+    def deduplicate(self, signatures, bank, threshold):
+        """
+        Find the near-duplicate of each row of `signatures`: the most similar row of the `bank` matrix,
+        else the most similar earlier row of `signatures` that is not a duplicate itself
+        Returns ("bank", row), ("batch", row) or None (a new question) per row
+        """
+        matches = []
+        kept = []
+        for index, signature in enumerate(signatures):
+            match = None
+            for source, rows, candidates in (("bank", None, bank), ("batch", kept, signatures[kept])):
+                if len(candidates) == 0:
+                    continue
+                similarities = (candidates == signature).mean(axis=1)
+                best = int(similarities.argmax())
+                if similarities[best] >= threshold:
+                    match = (source, best if rows is None else rows[best])
+                    break
+            if match is None:
+                kept.append(index)
+            matches.append(match)
+        return matches
+
+
+_hasher = None
+
+
+def get_hasher():
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher()
+    return _hasher
+
+
+class LineMatcher:
+    """Inverted index from keywords to transcript lines, for finding where a question is answered"""
+
+    def __init__(self, lines, window=1):
+        self.lines = lines
+        self.window = window
+        self.postings = defaultdict(set)
+        for index, line in enumerate(lines):
+            for word in keywords(line):
+                self.postings[word].add(index)
+
+    def best_line(self, text):
+        """
+        Return the line sharing the most keywords with the text and the fraction of the text's
+        keywords found within `window` lines of it (answers may span records), or (None, 0.0)
+        """
+        words = keywords(text)
+        if not words:
+            return None, 0.0
+        counts = Counter()
+        for word in words:
+            counts.update(self.postings.get(word, ()))
+        if not counts:
+            return None, 0.0
+        index = counts.most_common(1)[0][0]
+        nearby = range(index - self.window, index + self.window + 1)
+        found = sum(1 for word in words if any(line in self.postings.get(word, ()) for line in nearby))
+        return index, found / len(words)
@@ -184,7 +184,7 @@ class APITester:
             self.print_success(f"Quiz retrieved successfully")
             self.print_info(f"Quiz ID: {self.quiz_id}")
             self.print_info(f"Format: {result.get('format')}")
-            self.print_info(f"File URL: {result.get('fileUrl')}")
+            self.print_info(f"Question count: {result.get('questionCount')}")
             return True
         else:
             self.print_error("Failed to retrieve quiz")
@@ -207,6 +207,23 @@ class APITester:
             self.print_error("Failed to retrieve quiz URL")
             return False
     
+    def test_get_quiz_content(self) -> bool:
+        """Test getting quiz questions"""
+        if not self.lecture_id:
+            self.print_error("No lecture ID available for testing")
+            return False
+            
+        self.print_test_header("Get Quiz Content")
+        
+        result = self.make_request("GET", f"/lectures/{self.lecture_id}/quiz/content")
+        
+        if result and result.get("questions"):
+            self.print_success(f"Quiz content retrieved: {len(result['questions'])} questions")
+            return True
+        else:
+            self.print_error("Failed to retrieve quiz content")
+            return False
+    
     def test_error_handling(self) -> bool:
         """Test error handling with invalid data"""
         self.print_test_header("Error Handling Tests")
@@ -292,6 +309,7 @@ class APITester:
         if results["wait_for_processing"]:
             results["get_quiz"] = self.test_get_quiz()
             results["get_quiz_url"] = self.test_get_quiz_url()
+            results["get_quiz_content"] = self.test_get_quiz_content()
         
         # Test 8: Error Handling
         results["error_handling"] = self.test_error_handling()
@@ -0,0 +1,69 @@
+"""
+Unit tests for per-stage lecture processing checkpoints
+"""
+import asyncio
+import pytest
+from bson import ObjectId
+from api.utils.checkpoints import CheckpointStore, STAGES, reached
+
+LECTURE_ID = str(ObjectId())
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_reached_covers_the_stage_and_every_earlier_one(stage):
+    checkpoint = {"stage": stage}
+    done = STAGES.index(stage)
+    assert [reached(checkpoint, other) for other in STAGES] == [index <= done for index in range(len(STAGES))]
+
+
+def test_nothing_is_reached_without_a_checkpoint():
+    assert not any(reached(None, stage) for stage in STAGES)
+
+
+class FakeCollection:
+    """The one-document-per-lecture subset of a Motor collection that CheckpointStore uses"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def find_one(self, query):
+        return self.documents.get(query["lectureId"])
+
+    async def update_one(self, query, update, upsert=False):
+        document = self.documents.setdefault(query["lectureId"], {"lectureId": query["lectureId"]})
+        document.update(update["$set"])
+
+    async def delete_one(self, query):
+        self.documents.pop(query["lectureId"], None)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(CheckpointStore, "collection", property(lambda self: collection))
+    return CheckpointStore()
+
+
+def test_checkpoint_is_resumed_by_its_job_or_an_explicit_resume(store):
+    async def scenario():
+        await store.save(LECTURE_ID, "cleaned", "job-1", transcriptUrl="t", transcriptHash="abc")
+        same_job = await store.load(LECTURE_ID, "t", "job-1")
+        resumed = await store.load(LECTURE_ID, "t", "job-2", resume=True)
+        return same_job, resumed
+
+    same_job, resumed = asyncio.run(scenario())
+    assert same_job["stage"] == "cleaned" and same_job["transcriptHash"] == "abc"
+    assert resumed["stage"] == "cleaned"
+
+
+@pytest.mark.parametrize("job_id, transcript_url, resume", [
+    ("job-2", "t", False),
+    ("job-1", "revised", False),
+    ("job-1", "revised", True)
+])
+def test_checkpoint_of_another_job_or_transcript_is_dropped(store, job_id, transcript_url, resume):
+    async def scenario():
+        await store.save(LECTURE_ID, "generated", "job-1", transcriptUrl="t")
+        return await store.load(LECTURE_ID, transcript_url, job_id, resume), await store.load(LECTURE_ID, "t", "job-1")
+
+    assert asyncio.run(scenario()) == (None, None)
@@ -0,0 +1,83 @@
+"""
+Unit tests for priority admission of pipeline runs
+"""
+import asyncio
+import pytest
+from api.utils.executor import PipelineExecutor
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setenv("PIPELINE_MAX_CONCURRENCY", "1")
+    PipelineExecutor.shutdown()
+    PipelineExecutor.start()
+    yield PipelineExecutor
+    PipelineExecutor.shutdown()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def admission_order(executor, priorities, cancel=()):
+    """Hold the only slot, queue one run per priority, release and return the order the runs were admitted in"""
+    admitted = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run(name):
+            admitted.append(name)
+            if name == "holder":
+                await release.wait()
+
+        holder = asyncio.create_task(executor.run_async(run, "holder"))
+        await settle()
+        waiters = {}
+        for name, priority in priorities:
+            waiters[name] = asyncio.create_task(executor.run_async(run, name, priority=priority))
+            await settle()
+        assert executor.stats()["queued"] == len(priorities)
+        for name in cancel:
+            waiters[name].cancel()
+        await settle()
+        release.set()
+        await asyncio.gather(holder, *waiters.values(), return_exceptions=True)
+
+    asyncio.run(scenario())
+    return admitted[1:]
+
+
+def test_more_urgent_runs_are_admitted_first(executor):
+    order = admission_order(executor, [("bulk", 2), ("normal", 1), ("interactive", 0)])
+    assert order == ["interactive", "normal", "bulk"]
+
+
+def test_runs_of_one_priority_are_admitted_in_arrival_order(executor):
+    order = admission_order(executor, [("first", 1), ("second", 1), ("third", 1)])
+    assert order == ["first", "second", "third"]
+
+
+def test_cancelled_waiter_does_not_keep_its_turn(executor):
+    order = admission_order(executor, [("bulk", 2), ("interactive", 0)], cancel=["interactive"])
+    assert order == ["bulk"]
+    assert executor.stats()["running"] == 0
+
+
+def test_slot_is_released_when_a_run_fails(executor):
+    async def fail():
+        raise ValueError("boom")
+
+    async def succeed():
+        return "done"
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await executor.run_async(fail)
+        return await executor.run_async(succeed)
+
+    failed = executor.failed
+    assert asyncio.run(scenario()) == "done"
+    assert executor.failed == failed + 1
+    assert executor.admitted == 0
@@ -0,0 +1,210 @@
+"""
+Unit tests for the in-memory job queue and the worker's stale job sweep
+"""
+import asyncio
+from datetime import datetime, timedelta
+from api import worker as worker_module
+from api.utils.job_queue import InMemoryJobQueue, JOB_PRIORITIES
+
+
+def age_heartbeats(queue, seconds):
+    for job in queue.jobs.values():
+        if job["status"] == "running":
+            job["heartbeatAt"] = datetime.utcnow() - timedelta(seconds=seconds)
+
+
+def test_cancelled_job_on_a_dead_worker_cancels_its_lecture(monkeypatch):
+    queue = InMemoryJobQueue()
+    statuses = []
+    resumed = []
+
+    async def update_status(lecture_id, status, **fields):
+        statuses.append((lecture_id, status))
+
+    async def resume_stuck_lectures(stale_seconds):
+        # The sweep runs after the requeue, so by now the lecture must not look interrupted
+        resumed.append(await queue.active_lecture_ids(["lecture-1"]))
+        return 0
+
+    monkeypatch.setattr(worker_module, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(worker_module.LectureController, "update_status", update_status)
+    monkeypatch.setattr(worker_module.LectureController, "resume_stuck_lectures", resume_stuck_lectures)
+
+    async def scenario():
+        await queue.enqueue("lecture-1")
+        await queue.claim("dead-worker")
+        # The worker is gone, so cancel_lecture only flags the running job
+        assert await queue.cancel("lecture-1") == {"queued": 0, "running": 1}
+        age_heartbeats(queue, 3600)
+
+        worker = worker_module.Worker(concurrency=1)
+        sweep = asyncio.create_task(worker._requeue_loop())
+        while not resumed:
+            await asyncio.sleep(0)
+        worker.stopping = True
+        sweep.cancel()
+
+    asyncio.run(scenario())
+    assert statuses == [("lecture-1", "cancelled")]
+    assert resumed == [set()]
+    assert [job["status"] for job in queue.jobs.values()] == ["cancelled"]
+
+
+def test_requeue_stale_reports_cancelled_lectures_and_requeues_the_rest():
+    queue = InMemoryJobQueue()
+
+    async def scenario():
+        await queue.enqueue("cancelled-lecture")
+        await queue.enqueue("lost-lecture")
+        await queue.claim("dead-worker")
+        await queue.claim("dead-worker")
+        await queue.cancel("cancelled-lecture")
+        age_heartbeats(queue, 3600)
+        return await queue.requeue_stale(60)
+
+    assert asyncio.run(scenario()) == (1, ["cancelled-lecture"])
+    statuses = {job["lectureId"]: job["status"] for job in queue.jobs.values()}
+    assert statuses == {"cancelled-lecture": "cancelled", "lost-lecture": "queued"}
+
+
+def test_worker_stopped_while_waiting_for_a_slot_claims_nothing(monkeypatch):
+    queue = InMemoryJobQueue()
+    release = asyncio.Event()
+    started = []
+
+    async def process_lecture(lecture_id, **kwargs):
+        started.append(lecture_id)
+        await release.wait()
+        return True
+
+    monkeypatch.setattr(worker_module, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(worker_module.LectureController, "process_lecture", process_lecture)
+
+    async def scenario():
+        await queue.enqueue("first")
+        await queue.enqueue("second")
+        worker = worker_module.Worker(concurrency=1)
+        # Keep the requeue sweep out of the way; it is tested separately
+        monkeypatch.setattr(worker, "_requeue_loop", lambda: asyncio.sleep(0))
+        run = asyncio.create_task(worker.run())
+        while not started:
+            await asyncio.sleep(0)
+        # run() is now blocked waiting for the only slot
+        stop = asyncio.create_task(worker.stop())
+        await asyncio.sleep(0)
+        release.set()
+        await stop
+        await asyncio.wait_for(run, 1)
+
+    asyncio.run(scenario())
+    assert started == ["first"]
+    assert {job["lectureId"]: job["status"] for job in queue.jobs.values()} == {"first": "completed", "second": "queued"}
+
+
+def test_claim_takes_the_most_urgent_job_then_the_oldest():
+    queue = InMemoryJobQueue()
+
+    async def scenario():
+        await queue.enqueue("bulk", "bulk")
+        await queue.enqueue("normal-1")
+        await queue.enqueue("interactive", "interactive")
+        await queue.enqueue("normal-2")
+        claimed = []
+        while (job := await queue.claim("worker")) is not None:
+            claimed.append(job["lectureId"])
+        return claimed
+
+    assert asyncio.run(scenario()) == ["interactive", "normal-1", "normal-2", "bulk"]
+
+
+def test_claim_with_max_priority_leaves_bulk_jobs_queued():
+    queue = InMemoryJobQueue()
+
+    async def scenario():
+        await queue.enqueue("bulk", "bulk")
+        return await queue.claim("worker", max_priority=JOB_PRIORITIES["normal"])
+
+    assert asyncio.run(scenario()) is None
+    assert [job["status"] for job in queue.jobs.values()] == ["queued"]
+
+
+def test_bulk_jobs_never_take_the_reserved_slots(monkeypatch):
+    queue = InMemoryJobQueue()
+    release = asyncio.Event()
+    started = []
+
+    async def process_lecture(lecture_id, **kwargs):
+        started.append(lecture_id)
+        await release.wait()
+        return True
+
+    monkeypatch.setattr(worker_module, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(worker_module, "WORKER_POLL_INTERVAL", 0.001)
+    monkeypatch.setattr(worker_module.LectureController, "process_lecture", process_lecture)
+
+    async def scenario():
+        await queue.enqueue_many(["bulk-1", "bulk-2", "bulk-3"])
+        worker = worker_module.Worker(concurrency=3, reserved_slots=1)
+        monkeypatch.setattr(worker, "_requeue_loop", lambda: asyncio.sleep(0))
+        run = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+        # Two slots go to the backfill; the third stays free for more urgent work
+        assert started == ["bulk-1", "bulk-2"]
+        await queue.enqueue("interactive", "interactive")
+        await asyncio.sleep(0.05)
+        assert started == ["bulk-1", "bulk-2", "interactive"]
+        stop = asyncio.create_task(worker.stop())
+        release.set()
+        await stop
+        await asyncio.wait_for(run, 1)
+
+    asyncio.run(scenario())
+    assert {job["lectureId"]: job["status"] for job in queue.jobs.values()}["bulk-3"] == "queued"
+
+
+def test_stale_jobs_are_requeued_until_they_run_out_of_attempts(monkeypatch):
+    from api.utils import job_queue
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 2)
+    queue = InMemoryJobQueue()
+
+    async def scenario():
+        await queue.enqueue("lecture-1")
+        outcomes = []
+        for _ in range(2):
+            job = await queue.claim("dead-worker")
+            age_heartbeats(queue, 3600)
+            outcomes.append((job["attempts"], await queue.requeue_stale(60)))
+        return outcomes
+
+    assert asyncio.run(scenario()) == [(1, (1, [])), (2, (0, []))]
+    job = next(iter(queue.jobs.values()))
+    assert (job["status"], job["error"]) == ("failed", "Worker stopped responding")
+
+
+def test_jobs_with_a_recent_heartbeat_are_left_running():
+    queue = InMemoryJobQueue()
+
+    async def scenario():
+        job_id = await queue.enqueue("lecture-1")
+        await queue.claim("worker")
+        await queue.heartbeat(job_id, "worker")
+        return await queue.requeue_stale(60), await queue.active_lecture_ids(["lecture-1", "lecture-2"])
+
+    assert asyncio.run(scenario()) == ((0, []), {"lecture-1"})
+
+
+def test_requeued_job_ignores_updates_from_its_previous_worker():
+    queue = InMemoryJobQueue()
+
+    async def scenario():
+        job_id = await queue.enqueue("lecture-1")
+        await queue.claim("dead-worker")
+        age_heartbeats(queue, 3600)
+        await queue.requeue_stale(60)
+        await queue.claim("new-worker")
+        # The old worker comes back and reports a result for a job it no longer owns
+        await queue.fail(job_id, "dead-worker", "late failure")
+        return queue.jobs[job_id]
+
+    job = asyncio.run(scenario())
+    assert (job["status"], job["claimedBy"], job["attempts"]) == ("running", "new-worker", 2)
@@ -0,0 +1,51 @@
+"""
+Unit tests for quiz response parsing and salvage of malformed output
+"""
+import json
+import pytest
+from pipeline.parsing import QuizParseError, parse_quiz_text, salvage_questions
+
+
+def question(number):
+    return {
+        "question": f"Question {number}?",
+        "options": ["A", "B", "C", "D"],
+        "correct_option": ["A"],
+        "correct_option_index": [0],
+        "explanation": "Because.",
+        "bloom_level": "Remember",
+        "time_stamp": f"00:00:{number:02d}"
+    }
+
+
+def test_valid_response():
+    text = json.dumps({"questions": [question(1), question(2)]})
+    assert parse_quiz_text(text)["questions"] == [question(1), question(2)]
+
+
+def test_truncated_response_keeps_complete_questions():
+    text = json.dumps({"questions": [question(1), question(2), question(3)]})
+    truncated = text[:text.index('"Question 3?"') + 20]
+    assert [q["question"] for q in parse_quiz_text(truncated)["questions"]] == ["Question 1?", "Question 2?"]
+
+
+def test_syntax_error_mid_response_keeps_well_formed_questions():
+    text = '{"questions": [' + json.dumps(question(1)) + ', {"question": "Broken", "options": [}, ' + json.dumps(question(2)) + "]}"
+    assert [q["question"] for q in salvage_questions(text)] == ["Question 1?", "Question 2?"]
+
+
+def test_invalid_questions_are_dropped():
+    incomplete = {key: value for key, value in question(2).items() if key != "options"}
+    text = json.dumps({"questions": [question(1), incomplete]})
+    assert [q["question"] for q in parse_quiz_text(text)["questions"]] == ["Question 1?"]
+
+
+def test_code_fence_is_stripped():
+    text = "```json\n" + json.dumps({"questions": [question(1)]})[:-2] + "\n```"
+    assert [q["question"] for q in salvage_questions(text)] == ["Question 1?"]
+
+
+@pytest.mark.parametrize("text", ["", "not json at all", '{"questions": [{"question": "no options"}]}'])
+def test_no_valid_questions_raises(text):
+    with pytest.raises(QuizParseError):
+        parse_quiz_text(text)
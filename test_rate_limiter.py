@@ -0,0 +1,96 @@
+"""
+Unit tests for the client-side LLM rate limiter
+"""
+import pytest
+from rate_limiter import TokenBucket, LLMRateLimiter
+
+
+def test_bucket_admits_up_to_its_limit_then_waits_for_the_debt():
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60, 1.0) == 0.0
+    # One unit per second at 60/minute
+    assert bucket.reserve(1, 1.0) == pytest.approx(1.0)
+    assert bucket.reserve(1, 1.0) == pytest.approx(2.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity():
+    bucket = TokenBucket(60)
+    bucket.reserve(60, 1.0)
+    bucket.refill(bucket.updated + 30, 1.0)
+    assert bucket.level == pytest.approx(30)
+    bucket.refill(bucket.updated + 600, 1.0)
+    assert bucket.level == pytest.approx(60)
+
+
+def test_disabled_limiter_never_waits():
+    limiter = LLMRateLimiter()
+    assert not limiter.enabled
+    assert limiter.reserve(10 ** 9) == 0.0
+
+
+def test_token_limit_makes_callers_wait():
+    limiter = LLMRateLimiter(tpm=600)
+    assert limiter.reserve(600) == 0.0
+    assert limiter.reserve(100) == pytest.approx(10.0, rel=0.01)
+
+
+def test_adjust_returns_over_reserved_tokens():
+    limiter = LLMRateLimiter(tpm=1000)
+    limiter.reserve(1000)
+    limiter.adjust(estimated_tokens=1000, actual_tokens=400)
+    assert limiter.tokens.level == pytest.approx(600, abs=1)
+
+
+def test_rate_limits_back_off_and_successes_recover():
+    limiter = LLMRateLimiter(rpm=60, min_factor=0.5, decrease=0.5, increase=0.1)
+    limiter.on_rate_limited()
+    assert limiter.factor == 0.5
+    limiter.on_rate_limited()
+    assert limiter.factor == 0.5
+    limiter.on_success()
+    assert limiter.factor == pytest.approx(0.6)
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = LLMRateLimiter(rpm=1000)
+    limiter.on_rate_limited(retry_after=5)
+    assert limiter.reserve(0) == pytest.approx(5, abs=0.1)
+
+
+def rate_limit_error(message, headers):
+    litellm = pytest.importorskip("litellm")
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return litellm.RateLimitError(message=message, llm_provider="openai", model="gpt-4o-mini", response=response)
+
+
+def test_retry_after_is_read_from_the_response_headers_of_a_litellm_error(monkeypatch):
+    from pipeline import llm
+    error = rate_limit_error("Rate limit reached for gpt-4o-mini", {"retry-after": "7"})
+    assert llm.parse_retry_after(str(error)) is None
+    assert llm.error_retry_after(error) == 7
+
+    limiter = LLMRateLimiter(rpm=1000)
+    monkeypatch.setattr(llm, "get_rate_limiter", lambda: limiter)
+    call = llm.LLMCall([{"role": "user", "content": "hi"}], "test", "gpt-4o-mini")
+    assert call.retry_delay(error, attempt=0, max_retries=5, base_delay=1, max_delay=60) >= 7
+    assert limiter.reserve(0) == pytest.approx(7, abs=0.1)
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after-ms": "1500", "retry-after": "7"}, 1.5),
+    ({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0s"}, 360),
+    ({"x-ratelimit-reset-tokens": "20ms"}, 0.02)
+])
+def test_retry_after_headers(headers, expected):
+    from pipeline.llm import error_retry_after
+    assert error_retry_after(rate_limit_error("Rate limit reached", headers)) == pytest.approx(expected)
+
+
+def test_retry_after_falls_back_to_the_message_text():
+    from pipeline.llm import error_retry_after, parse_retry_after
+    assert error_retry_after(rate_limit_error("Rate limit reached. Please try again in 7s.", {})) == 7
+    assert parse_retry_after("Please try again in 1.5s") == 1.5
+    assert parse_retry_after("429 Too Many Requests (mock): rate limit reached, retry-after: 3") == 3
+    assert parse_retry_after("Internal server error") is None
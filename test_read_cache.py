@@ -0,0 +1,90 @@
+"""
+Unit tests for the in-process read cache and its invalidation of in-flight reads
+"""
+from api.utils import read_cache
+from api.utils.read_cache import TTLCache
+
+
+def test_values_are_copied_in_and_out():
+    cache = TTLCache(ttl=30)
+    value = {"status": "queued"}
+    cache.set("lecture", value)
+    value["status"] = "processing"
+    cached = cache.get("lecture")
+    cached["status"] = "failed"
+    assert cache.get("lecture") == {"status": "queued"}
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(read_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl=30)
+    cache.set("lecture", "queued")
+    now[0] += 29
+    assert cache.get("lecture") == "queued"
+    now[0] += 2
+    assert cache.get("lecture") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_read_in_flight_during_an_invalidation_is_not_cached():
+    cache = TTLCache(ttl=30)
+    generation = cache.generation("lecture")
+    # A write lands and invalidates while the read is still waiting for the database
+    cache.invalidate("lecture")
+    cache.set("lecture", "queued", generation)
+    assert cache.get("lecture") is None
+
+    # A read that started after the invalidation saw the write and is cached
+    cache.set("lecture", "processing", cache.generation("lecture"))
+    assert cache.get("lecture") == "processing"
+
+
+def test_invalidating_other_keys_does_not_drop_a_read():
+    cache = TTLCache(ttl=30)
+    cache.invalidate("lecture")
+    generation = cache.generation("lecture")
+    cache.invalidate("other")
+    cache.set("lecture", "queued", generation)
+    assert cache.get("lecture") == "queued"
+
+
+def test_stale_read_is_dropped_after_its_generation_was_forgotten():
+    cache = TTLCache(maxsize=2, ttl=30)
+    generation = cache.generation("lecture")
+    cache.invalidate("lecture")
+    # Push "lecture" out of the bounded generation map
+    cache.invalidate("b")
+    cache.invalidate("c")
+    assert "lecture" not in cache.generations
+    cache.set("lecture", "queued", generation)
+    assert cache.get("lecture") is None
+
+
+def test_clear_drops_reads_in_flight():
+    cache = TTLCache(ttl=30)
+    generation = cache.generation("lecture")
+    cache.clear()
+    cache.set("lecture", "queued", generation)
+    assert cache.get("lecture") is None
+
+
+def test_invalidate_lecture_covers_every_read_of_it():
+    read_cache.lecture_cache.set("id", {"status": "queued"})
+    read_cache.status_cache.set("id", "queued")
+    read_cache.quiz_cache.set(("id", False), {"version": 1})
+    read_cache.quiz_cache.set(("id", True), {"version": 1, "questions": []})
+    read_cache.invalidate_lecture("id")
+    assert read_cache.lecture_cache.get("id") is None
+    assert read_cache.status_cache.get("id") is None
+    assert read_cache.quiz_cache.get(("id", False)) is None
+    assert read_cache.quiz_cache.get(("id", True)) is None
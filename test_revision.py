@@ -0,0 +1,45 @@
+"""
+Unit tests for transcript revision diffing
+"""
+import asyncio
+from pipeline.config import QUIZ_SIZE
+from pipeline.revision import diff_transcripts, touched_ranges, changed_excerpt, arevise_questions
+
+OLD = ["[00:00:00] intro", "[00:00:10] arrays", "[00:00:20] lists", "[00:00:30] trees", "[00:00:40] graphs"]
+
+
+def test_unchanged_transcript_has_no_segments():
+    assert diff_transcripts(OLD, list(OLD)) == []
+
+
+def test_edit_touches_the_time_range_of_the_old_line():
+    new = OLD[:2] + ["[00:00:20] linked lists"] + OLD[3:]
+    segments = diff_transcripts(OLD, new)
+    assert segments == [(2, 3, 2, 3)]
+    assert touched_ranges(OLD, segments) == [(20, 30)]
+
+
+def test_deleting_the_tail_touches_everything_after_it():
+    segments = diff_transcripts(OLD, OLD[:3])
+    assert touched_ranges(OLD, segments) == [(30, float("inf"))]
+
+
+def test_insertion_touches_no_old_range():
+    new = OLD[:1] + ["[00:00:05] agenda"] + OLD[1:]
+    segments = diff_transcripts(OLD, new)
+    assert touched_ranges(OLD, segments) == []
+    assert changed_excerpt(new, segments, context=1) == "\n".join(new[0:3])
+
+
+def test_changed_excerpt_without_context():
+    new = OLD[:3] + ["[00:00:30] binary trees"] + OLD[4:]
+    assert changed_excerpt(new, diff_transcripts(OLD, new), context=0) == "[00:00:30] binary trees"
+
+
+def test_unchanged_revision_keeps_every_question():
+    questions = [{"question": f"Q{index}", "time_stamp": "00:00:10"} for index in range(QUIZ_SIZE)]
+    transcript = "\n".join(OLD)
+    quiz, revision = asyncio.run(arevise_questions(transcript, questions, transcript))
+    assert quiz["questions"] == questions
+    assert revision["mode"] == "unchanged"
+    assert revision["regeneratedQuestions"] == 0
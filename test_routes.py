@@ -0,0 +1,40 @@
+"""
+Unit tests for the lecture events WebSocket
+"""
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from api.routes import routes
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("status_code, close_code", [(404, 4404), (400, 4400)])
+def test_websocket_reports_lookup_errors_with_close_codes(client, monkeypatch, status_code, close_code):
+    async def get_lecture_status(lecture_id):
+        raise HTTPException(status_code=status_code, detail=f"Lecture {lecture_id} not found")
+
+    monkeypatch.setattr(routes.LectureController, "get_lecture_status", get_lecture_status)
+    with client.websocket_connect("/api/lectures/missing/ws") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == close_code
+    assert closed.value.reason == "Lecture missing not found"
+
+
+def test_websocket_closes_after_a_terminal_status(client, monkeypatch):
+    async def get_lecture_status(lecture_id):
+        return "completed"
+
+    monkeypatch.setattr(routes.LectureController, "get_lecture_status", get_lecture_status)
+    with client.websocket_connect("/api/lectures/done/ws") as websocket:
+        assert websocket.receive_json() == {"lectureId": "done", "type": "status", "status": "completed"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1000
@@ -0,0 +1,67 @@
+"""
+Unit tests for MinHash near-duplicate detection and question-to-line matching
+"""
+import pytest
+from similarity import MinHasher, LineMatcher, question_text, keywords
+
+pytest.importorskip("numpy")
+
+
+def test_identical_text_has_similarity_one():
+    hasher = MinHasher()
+    signature = hasher.signature("What is the time complexity of binary search on a sorted array")
+    assert hasher.similarity(signature, [signature])[0] == 1.0
+
+
+def test_near_duplicates_score_above_unrelated_questions():
+    hasher = MinHasher()
+    original = hasher.signature("What is the time complexity of binary search on a sorted array")
+    reworded = hasher.signature("What is the time complexity of binary search on a sorted list")
+    unrelated = hasher.signature("Which organelle produces most of the energy in a eukaryotic cell")
+    near, far = hasher.similarity(original, [reworded, unrelated])
+    assert near >= 0.6
+    assert far <= 0.2
+
+
+def test_signatures_are_reproducible_across_hashers():
+    text = "Define a hash collision"
+    assert (MinHasher().signature(text) == MinHasher().signature(text)).all()
+
+
+def test_similarity_against_an_empty_bank():
+    hasher = MinHasher()
+    assert len(hasher.similarity(hasher.signature("anything"), [])) == 0
+
+
+def test_question_text_uses_stem_and_correct_answers():
+    question = {"question": "Which sort is stable?", "correct_option": ["Merge sort"]}
+    assert question_text(question) == "Which sort is stable? Merge sort"
+    assert keywords(question_text(question)) == {"sort", "stable", "merge"}
+
+
+def test_line_matcher_finds_the_line_answering_a_question():
+    lines = ["[00:00:00] welcome", "[00:00:10] merge sort is stable", "[00:00:20] quicksort is not stable"]
+    index, score = LineMatcher(lines).best_line("Which sort is stable? Merge sort")
+    assert index == 1
+    assert score == 1.0
+    assert LineMatcher(lines).best_line("photosynthesis") == (None, 0.0)
+
+
+def test_deduplicate_matches_the_bank_then_earlier_questions_of_the_batch():
+    hasher = MinHasher()
+    bank = hasher.matrix([hasher.signature("What is the time complexity of binary search on a sorted array")])
+    batch = hasher.matrix([
+        hasher.signature("What is the time complexity of binary search on a sorted list"),
+        hasher.signature("Which organelle produces most of the energy in a eukaryotic cell"),
+        hasher.signature("Which organelle produces most of the energy in the eukaryotic cell"),
+        hasher.signature("Define a hash collision")
+    ])
+    assert hasher.deduplicate(batch, bank, 0.6) == [("bank", 0), None, ("batch", 1), None]
+
+
+def test_deduplicate_handles_an_empty_bank_and_batch():
+    hasher = MinHasher()
+    empty = hasher.matrix([])
+    assert hasher.deduplicate(empty, empty, 0.7) == []
+    batch = hasher.matrix([hasher.signature("Define a hash collision")] * 2)
+    assert hasher.deduplicate(batch, empty, 0.7) == [None, ("batch", 0)]
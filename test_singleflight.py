@@ -0,0 +1,114 @@
+"""
+Unit tests for in-process single-flight of lecture and generation runs
+"""
+import asyncio
+import pytest
+from api.utils.singleflight import SingleFlight
+
+
+class Work:
+    """A factory whose runs block until released, counting how often it was started"""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+        self.release = None
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.started
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    work = Work()
+
+    async def scenario():
+        work.release = asyncio.Event()
+        callers = [asyncio.create_task(flights.do("lecture", work)) for _ in range(3)]
+        await settle()
+        assert "lecture" in flights
+        work.release.set()
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(scenario()) == [(1, False), (1, True), (1, True)]
+    assert work.started == 1
+    assert "lecture" not in flights
+
+
+def test_a_finished_run_is_not_shared_with_later_callers():
+    flights = SingleFlight()
+    work = Work()
+
+    async def scenario():
+        work.release = asyncio.Event()
+        work.release.set()
+        return [await flights.do("lecture", work), await flights.do("lecture", work)]
+
+    assert asyncio.run(scenario()) == [(1, False), (2, False)]
+
+
+def test_cancelling_one_caller_leaves_the_run_to_the_others():
+    flights = SingleFlight()
+    work = Work()
+
+    async def scenario():
+        work.release = asyncio.Event()
+        first = asyncio.create_task(flights.do("lecture", work))
+        second = asyncio.create_task(flights.do("lecture", work))
+        await settle()
+        first.cancel()
+        await settle()
+        work.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == (1, True)
+    assert work.cancelled == 0
+
+
+def test_run_is_cancelled_once_every_caller_gave_up_and_a_new_caller_starts_over():
+    flights = SingleFlight()
+    work = Work()
+
+    async def scenario():
+        work.release = asyncio.Event()
+        callers = [asyncio.create_task(flights.do("lecture", work)) for _ in range(2)]
+        await settle()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        # The abandoned run may still be unwinding; a new caller must not join it
+        later = asyncio.create_task(flights.do("lecture", work))
+        await settle()
+        work.release.set()
+        return await later
+
+    assert asyncio.run(scenario()) == (2, False)
+    assert work.cancelled == 1
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("lecture", fail) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert "lecture" not in flights
@@ -0,0 +1,114 @@
+"""
+Unit tests for the streaming transcript parser
+"""
+from itertools import islice
+from transcript_parser import Cue, iter_cues, coalesce_cues, render_cues, parse_timestamp, format_timestamp
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp("00:01:02,500") == 62.5
+    assert parse_timestamp("01:00:00.000") == 3600.0
+    assert parse_timestamp("01:02.250") == 62.25
+    assert format_timestamp(3723.9) == "01:02:03"
+
+
+def test_srt_cues(tmp_path):
+    path = write(tmp_path, "lecture.srt", (
+        "1\n00:00:01,000 --> 00:00:03,000\nHello <i>class</i>\n\n"
+        "2\n00:00:04,000 --> 00:00:06,000\nToday: sorting\nand searching\n"
+    ))
+    assert list(iter_cues(path)) == [
+        Cue(1.0, 3.0, "Hello class"),
+        Cue(4.0, 6.0, "Today: sorting and searching")
+    ]
+
+
+def test_vtt_skips_header_note_style_and_region_blocks(tmp_path):
+    path = write(tmp_path, "lecture.vtt", (
+        "WEBVTT\n\nNOTE written by hand\n\nSTYLE\n::cue { color: red }\n\nREGION\nid:left\n\n"
+        "intro\n00:01.000 --> 00:02.000\n<v Teacher>Welcome back\n"
+    ))
+    assert list(iter_cues(path)) == [Cue(1.0, 2.0, "Welcome back")]
+
+
+def test_plain_text_keeps_paragraphs_starting_with_vtt_keywords(tmp_path):
+    path = write(tmp_path, "lecture.txt", (
+        "Welcome to the lecture.\n\nNOTE that the exam is next week.\n\n"
+        "STYLE matters in essays.\n\n42\nREGION growth is covered later.\n"
+    ))
+    assert [cue.text for cue in iter_cues(path)] == [
+        "Welcome to the lecture.",
+        "NOTE that the exam is next week.",
+        "STYLE matters in essays.",
+        "REGION growth is covered later."
+    ]
+
+
+def test_srt_keeps_cues_starting_with_vtt_keywords(tmp_path):
+    path = write(tmp_path, "lecture.srt", "1\n00:00:01,000 --> 00:00:02,000\nNOTE this down\n")
+    assert list(iter_cues(path)) == [Cue(1.0, 2.0, "NOTE this down")]
+
+
+def test_coalesce_merges_cues_within_window():
+    cues = [Cue(0.0, 2.0, "a"), Cue(5.0, 7.0, "b"), Cue(20.0, 22.0, "c"), Cue(None, None, "untimed"), Cue(23.0, 24.0, "d")]
+    assert list(coalesce_cues(cues, 15)) == [
+        Cue(0.0, 7.0, "a b"), Cue(20.0, 22.0, "c"), Cue(None, None, "untimed"), Cue(23.0, 24.0, "d")
+    ]
+
+
+def test_render_cues_with_and_without_timestamps():
+    cues = [Cue(61.0, 62.0, "timed"), Cue(None, None, "plain")]
+    assert list(render_cues(cues)) == ["[00:01:01] timed", "plain"]
+    assert list(render_cues(cues, with_timestamps=False)) == ["timed", "plain"]
+
+
+def endless_lines(first_lines):
+    """A stand-in for open() whose file never ends, so only a streaming parser can yield from it"""
+    class EndlessFile:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def __iter__(self):
+            yield from first_lines
+            number = 0
+            while True:
+                number += 1
+                yield f"and so on {number}\n"
+
+    return lambda *args, **kwargs: EndlessFile()
+
+
+def test_plain_text_without_blank_lines_is_streamed(monkeypatch):
+    import transcript_parser
+    monkeypatch.setattr(transcript_parser, "open", endless_lines(["Welcome.\n", "Today: sorting.\n"]), raising=False)
+    assert [cue.text for cue in islice(iter_cues("endless.txt"), 3)] == ["Welcome.", "Today: sorting.", "and so on 1"]
+
+
+
+def test_webvtt_header_lines_without_blank_lines_are_skipped(tmp_path):
+    path = write(tmp_path, "lecture.vtt", (
+        "WEBVTT\nKind: captions\nLanguage: en\n\n"
+        "00:01.000 --> 00:02.000\nWelcome back\n"
+    ))
+    assert list(iter_cues(path)) == [Cue(1.0, 2.0, "Welcome back")]
+
+
+def test_streamed_lines_chunk_like_the_joined_transcript(tmp_path):
+    from chunking import split_transcript
+    from pipeline.runner import iter_transcript_lines, load_and_clean_transcript
+    path = write(tmp_path, "lecture.srt", "".join(
+        f"{index}\n00:{index // 60:02d}:{index % 60:02d},000 --> 00:{index // 60:02d}:{index % 60:02d},900\nPoint number {index}\n\n"
+        for index in range(1, 200)
+    ))
+    streamed = split_transcript(iter_transcript_lines(path), 200)
+    assert len(streamed) > 1
+    assert streamed == split_transcript(load_and_clean_transcript(path), 200)
@@ -0,0 +1,129 @@
+"""
+Streaming SRT/VTT/plain-text transcript parser
+"""
+import re
+from typing import NamedTuple, Optional
+
+TIMING_RE = re.compile(r"^\s*(\S+)\s*-->\s*(\S+)")
+TAG_RE = re.compile(r"<[^>]*>")
+VTT_HEADER_BLOCKS = ("WEBVTT", "NOTE", "STYLE", "REGION")
+
+
+class Cue(NamedTuple):
+    start: Optional[float]
+    end: Optional[float]
+    text: str
+
+
+def parse_timestamp(value):
+    """Convert an SRT/VTT timestamp (HH:MM:SS,mmm, HH:MM:SS.mmm or MM:SS.mmm) to seconds"""
+    parts = value.replace(",", ".").split(":")
+    seconds = float(parts[-1])
+    if len(parts) > 1:
+        seconds += int(parts[-2]) * 60
+    if len(parts) > 2:
+        seconds += int(parts[-3]) * 3600
+    return seconds
+
+
+def format_timestamp(seconds):
+    """Format seconds as HH:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _parse_block(lines, webvtt=False):
+    """Turn one blank-line separated block into cues; header, NOTE, STYLE and REGION blocks only exist in WebVTT"""
+    if webvtt and lines[0].startswith(VTT_HEADER_BLOCKS):
+        return
+    for index, line in enumerate(lines):
+        match = TIMING_RE.match(line) if "-->" in line else None
+        if match:
+            # Lines before the timing line are SRT indexes or VTT cue identifiers
+            text = " ".join(TAG_RE.sub("", text_line).strip() for text_line in lines[index + 1:])
+            text = text.strip()
+            if text:
+                try:
+                    yield Cue(parse_timestamp(match.group(1)), parse_timestamp(match.group(2)), text)
+                except ValueError:
+                    yield Cue(None, None, text)
+            return
+    # Plain text block: keep each line, dropping bare caption indexes
+    for line in lines:
+        if not line.isdigit():
+            yield Cue(None, None, line)
+
+
+# A cue's timing line follows at most one SRT index or VTT identifier line
+MAX_CUE_HEADER_LINES = 1
+
+
+def iter_cues(file_path):
+    """
+    Stream cues from an SRT, VTT or plain-text transcript in a single pass.
+    Only the current caption block is held in memory; a block with no timing line where a
+    cue would have one is plain text (or a skipped WebVTT block) and is streamed line by line.
+    """
+    block = []
+    # A WebVTT file opens with its header block; anything else is SRT or plain text
+    webvtt = None
+    # The rest of the current block is plain text to emit line by line, or a WebVTT block to skip
+    streaming = skipping = False
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if not line:
+                if block:
+                    yield from _parse_block(block, webvtt)
+                block = []
+                streaming = skipping = False
+                continue
+            if webvtt is None:
+                webvtt = line.startswith("WEBVTT")
+            if streaming:
+                if not line.isdigit():
+                    yield Cue(None, None, line)
+                continue
+            if skipping:
+                continue
+            block.append(line)
+            if len(block) > MAX_CUE_HEADER_LINES and not any("-->" in held for held in block):
+                # No timing line where a cue would have one
+                skipping = webvtt and block[0].startswith(VTT_HEADER_BLOCKS)
+                streaming = not skipping
+                yield from _parse_block(block, webvtt)
+                block = []
+    if block:
+        yield from _parse_block(block, webvtt)
+
+
+def coalesce_cues(cues, window_seconds):
+    """
+    Merge consecutive timed cues spanning at most window_seconds into one record,
+    so short caption fragments don't each pay for a timestamp in the prompt
+    """
+    pending = None
+    for cue in cues:
+        if cue.start is None:
+            if pending:
+                yield pending
+                pending = None
+            yield cue
+            continue
+        if pending and cue.start - pending.start <= window_seconds:
+            pending = Cue(pending.start, cue.end, f"{pending.text} {cue.text}")
+            continue
+        if pending:
+            yield pending
+        pending = cue
+    if pending:
+        yield pending
+
+
+def render_cues(cues, with_timestamps=True):
+    """Render cues as prompt lines, optionally prefixed with [HH:MM:SS]"""
+    for cue in cues:
+        if with_timestamps and cue.start is not None:
+            yield f"[{format_timestamp(cue.start)}] {cue.text}"
+        else:
+            yield cue.text
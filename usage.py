@@ -0,0 +1,105 @@
+"""
+Per-run token, latency and cost accounting for LLM calls
+"""
+import time
+import threading
+import contextvars
+from datetime import datetime
+
+_current_usage = contextvars.ContextVar("usage_context", default=None)
+
+
+_cost_per_token = None
+
+
+def load_pricing():
+    """Import litellm's pricing lookup; the first import takes seconds, so servers call this off the event loop"""
+    global _cost_per_token
+    if _cost_per_token is None:
+        from litellm import cost_per_token
+        _cost_per_token = cost_per_token
+    return _cost_per_token
+
+
+def estimate_cost(model_name, prompt_tokens, completion_tokens, cached_tokens=0):
+    """Estimate the USD cost of a call from litellm's pricing table, 0.0 if the model is unknown"""
+    try:
+        prompt_cost, completion_cost = load_pricing()(
+            model=model_name, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            cache_read_input_tokens=cached_tokens
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        return 0.0
+
+
+class UsageContext:
+    """Collects the LLM calls made by one pipeline run; safe to share across tasks and threads"""
+
+    def __init__(self):
+        self.calls = []
+        self.cache_hits = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, step_name, model_name, prompt_tokens, completion_tokens, latency=0.0, retries=0, cached_tokens=0):
+        call = {
+            "step": step_name,
+            "model": model_name,
+            "promptTokens": prompt_tokens,
+            "cachedTokens": cached_tokens,
+            "completionTokens": completion_tokens,
+            "latencyMs": round(latency * 1000, 1),
+            "retries": retries,
+            "cost": estimate_cost(model_name, prompt_tokens, completion_tokens, cached_tokens)
+        }
+        with self.lock:
+            self.calls.append(call)
+        return call
+
+    def record_cache_hit(self):
+        with self.lock:
+            self.cache_hits += 1
+
+    def totals(self):
+        with self.lock:
+            calls = list(self.calls)
+        prompt_tokens = sum(call["promptTokens"] for call in calls)
+        completion_tokens = sum(call["completionTokens"] for call in calls)
+        return {
+            "promptTokens": prompt_tokens,
+            "cachedTokens": sum(call.get("cachedTokens", 0) for call in calls),
+            "completionTokens": completion_tokens,
+            "totalTokens": prompt_tokens + completion_tokens,
+            "cost": sum(call["cost"] for call in calls),
+            "latencyMs": round(sum(call["latencyMs"] for call in calls), 1),
+            "retries": sum(call["retries"] for call in calls),
+            "llmCalls": len(calls),
+            "cacheHits": self.cache_hits
+        }
+
+    def to_document(self):
+        """Usage summary for storing on lecture and quiz documents"""
+        with self.lock:
+            calls = list(self.calls)
+        return {
+            **self.totals(),
+            "wallTimeMs": round((time.monotonic() - self.started) * 1000, 1),
+            "calls": calls,
+            "recordedAt": datetime.utcnow()
+        }
+
+
+def current_usage():
+    """Return the usage context of the current run, or None outside of one"""
+    return _current_usage.get()
+
+
+def start_usage():
+    """Start a new usage context for the current task; returns it and the token to restore the previous one"""
+    usage = UsageContext()
+    return usage, _current_usage.set(usage)
+
+
+def end_usage(token):
+    _current_usage.reset(token)